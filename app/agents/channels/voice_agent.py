@@ -3,10 +3,8 @@ Voice Channel Agent — Step 6 (Voice)
 Modular: developers can extend this independently.
 """
 from app.agents.state import RenewalState
-import aiosqlite
-from app.core.config import get_settings
-
-settings = get_settings()
+from app.db.write_behind import enqueue_writes
+from app.db.context_cache import invalidate_policy
 
 
 async def voice_send_node(state: RenewalState) -> dict:
@@ -21,20 +19,16 @@ async def voice_send_node(state: RenewalState) -> dict:
     # Check for escalation markers in voice script
     escalate = "[ESCALATE]" in call_script
     
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
-        await db.execute(
-            "INSERT INTO interactions (policy_id, channel, message_direction, content, sentiment_score) VALUES (?, ?, ?, ?, ?)",
-            (state["policy_id"], "Voice", "OUTBOUND", call_script, 0.0)
-        )
-        await db.execute(
-            "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
-            (state["policy_id"], "VOICE_CALL_INITIATED", f"IVR call initiated | Escalate: {escalate}", "Voice Agent")
-        )
-        await db.execute(
-            "UPDATE policy_state SET current_node=?, last_channel=?, updated_at=CURRENT_TIMESTAMP WHERE policy_id=?",
-            ("AWAITING_RESPONSE", "Voice", state["policy_id"])
-        )
-        await db.commit()
+    # One transaction, committed before we report the message sent
+    await enqueue_writes([
+        ("INSERT INTO interactions (policy_id, channel, message_direction, content, sentiment_score) VALUES (?, ?, ?, ?, ?)",
+         (state["policy_id"], "Voice", "OUTBOUND", call_script, 0.0)),
+        ("INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
+         (state["policy_id"], "VOICE_CALL_INITIATED", f"IVR call initiated | Escalate: {escalate}", "Voice Agent")),
+        ("UPDATE policy_state SET current_node=?, last_channel=?, updated_at=CURRENT_TIMESTAMP WHERE policy_id=?",
+         ("AWAITING_RESPONSE", "Voice", state["policy_id"])),
+    ], durability="immediate")
+    invalidate_policy(state["policy_id"])
 
     result = {
         "current_node": "COMPLETED",
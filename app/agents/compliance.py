@@ -0,0 +1,144 @@
+"""
+Compliance pre-check — the mechanical half of Critique B (Step 5).
+
+Everything here is a compiled regex or a comparison against the loaded state, so
+it runs in microseconds and fails before the Critique B LLM call is spent:
+  - the mandatory AI disclosure line is present verbatim
+  - every ₹ amount is the premium (or its instalment), sum assured or fund value
+  - every date is the due date (or the end of its grace period)
+  - WhatsApp body and full message are within their character caps
+  - no reg_009 phrases (guaranteed/best returns, market-beating …); ULIP performance
+    talk carries the past-performance disclaimer
+
+check_message() returns issues as {"check", "part", "detail"}, where part is the
+piece to revise — greeting, draft or closing — so a revision only redoes that piece.
+"""
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set
+
+from app.agents.state import RenewalState
+from app.agents.templates import DISCLOSURE
+
+WHATSAPP_BODY_MAX = 200     # the WhatsApp draft prompt's limit
+WHATSAPP_MESSAGE_MAX = 1000  # whatsapp_agent truncates here — past it the disclosure is cut off
+GRACE_DAYS = 30
+PAST_PERFORMANCE = "Past performance is not indicative of future returns"
+
+INSTALMENTS = {"Monthly": 12, "Quarterly": 4, "Half-Yearly": 2, "Semi-Annual": 2}
+SCALES = {"k": 1_000, "thousand": 1_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000,
+          "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000}
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"))}
+
+AMOUNT_RE = re.compile(
+    r"(?:₹|\bRs\.?|\bINR)\s*(\d[\d,]*(?:\.\d+)?)(?:\s*(k|thousand|lakhs?|lac|crores?|cr)\b)?", re.IGNORECASE
+)
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b")  # dd/mm/yyyy
+DAY_MONTH_RE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3})[a-z]*,?\s+(\d{4})\b")
+MONTH_DAY_RE = re.compile(r"\b([A-Za-z]{3})[a-z]*\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b")
+
+BANNED = [
+    (re.compile(r"\bbest returns?\b", re.IGNORECASE), "'best returns'"),
+    (re.compile(r"\bmarket[- ]beating\b|\bbeat(?:s|ing)? the market\b", re.IGNORECASE), "'market-beating' claim"),
+    (re.compile(r"\bdouble your money\b", re.IGNORECASE), "'double your money'"),
+]
+ULIP_BANNED = [
+    (re.compile(r"\b(?:guaranteed|assured|fixed)\s+(?:\w+\s+)?returns?\b", re.IGNORECASE), "guaranteed returns on a ULIP"),
+    (re.compile(r"\brisk[- ]free\b", re.IGNORECASE), "'risk-free' on a ULIP"),
+]
+PERFORMANCE_RE = re.compile(r"\bNAV\b|\breturns?\b|\bperformance\b|\bgrown by\b|\d+(?:\.\d+)?\s*%", re.IGNORECASE)
+MARKERS_RE = re.compile(r"\[(?:GREETING|CLOSING)\]")
+
+
+def assemble_parts(state: RenewalState) -> Dict[str, str]:
+    """greeting / draft / closing as they will be sent (the draft's [GREETING]/[CLOSING] markers removed)."""
+    return {
+        "greeting": (state.get("greeting") or "").strip(),
+        "draft": MARKERS_RE.sub("", state.get("draft_message") or "").strip(),
+        "closing": (state.get("closing") or "").strip(),
+    }
+
+
+def assemble_message(state: RenewalState) -> str:
+    return "\n\n".join(p for p in assemble_parts(state).values() if p)
+
+
+def _amount(number: str, scale: Optional[str]) -> float:
+    return float(number.replace(",", "")) * SCALES.get((scale or "").lower(), 1)
+
+
+def allowed_amounts(state: RenewalState) -> List[float]:
+    premium = state.get("annual_premium")
+    amounts = [premium, state.get("sum_assured"), state.get("fund_value")]
+    if premium and state.get("payment_mode") in INSTALMENTS:
+        amounts.append(premium / INSTALMENTS[state["payment_mode"]])
+    return [float(a) for a in amounts if a]
+
+
+def _dates(text: str) -> Set[date]:
+    found = set()
+    candidates = [(int(y), int(m), int(d)) for y, m, d in ISO_DATE_RE.findall(text)]
+    candidates += [(int(y), int(m), int(d)) for d, m, y in NUMERIC_DATE_RE.findall(text)]
+    candidates += [(int(y), MONTHS.get(m.lower(), 0), int(d)) for d, m, y in DAY_MONTH_RE.findall(text)]
+    candidates += [(int(y), MONTHS.get(m.lower(), 0), int(d)) for m, d, y in MONTH_DAY_RE.findall(text)]
+    for y, m, d in candidates:
+        try:
+            found.add(date(y, m, d))
+        except ValueError:
+            continue
+    return found
+
+
+def allowed_dates(state: RenewalState) -> Set[date]:
+    try:
+        due = date.fromisoformat(str(state.get("premium_due_date"))[:10])
+    except ValueError:
+        return set()
+    return {due, due + timedelta(days=GRACE_DAYS)}
+
+
+def is_ulip(state: RenewalState) -> bool:
+    return bool(state.get("fund_value")) or "ULIP" in (state.get("policy_type") or "").upper()
+
+
+def check_message(state: RenewalState) -> List[Dict[str, str]]:
+    """Mechanical compliance issues in the assembled message; [] when it may go to the LLM review."""
+    parts = assemble_parts(state)
+    issues = []
+
+    def issue(check, part, detail):
+        issues.append({"check": check, "part": part, "detail": detail})
+
+    if DISCLOSURE not in parts["closing"]:
+        issue("disclosure", "closing", "Mandatory AI disclosure line missing or altered")
+
+    amounts, dates = allowed_amounts(state), allowed_dates(state)
+    ulip = is_ulip(state)
+    for part, text in parts.items():
+        for match in AMOUNT_RE.finditer(text):
+            value = _amount(*match.groups())
+            if not any(abs(value - a) <= max(1.0, a * 0.005 if match.group(2) else 1.0) for a in amounts):
+                issue("amount", part, f"{match.group(0).strip()} does not match the policy's premium, "
+                                      f"sum assured or fund value")
+        if dates:
+            for found in sorted(_dates(text) - dates):
+                issue("date", part, f"{found.isoformat()} is not the due date ({state.get('premium_due_date')})")
+        for pattern, label in BANNED + (ULIP_BANNED if ulip else []):
+            if pattern.search(text):
+                issue("banned_phrase", part, f"Prohibited under reg_009: {label}")
+
+    if ulip and PERFORMANCE_RE.search(parts["draft"]) and PAST_PERFORMANCE.lower() not in assemble_message(state).lower():
+        issue("disclaimer", "draft", f"ULIP performance mentioned without '{PAST_PERFORMANCE}.'")
+
+    if state.get("selected_channel") == "WhatsApp":
+        if len(parts["draft"]) > WHATSAPP_BODY_MAX:
+            issue("length", "draft", f"WhatsApp body is {len(parts['draft'])} characters (max {WHATSAPP_BODY_MAX})")
+        elif len(assemble_message(state)) > WHATSAPP_MESSAGE_MAX:
+            issue("length", "draft", f"WhatsApp message is over {WHATSAPP_MESSAGE_MAX} characters")
+    return issues
+
+
+def fix_instructions(issues: List[Dict[str, str]]) -> str:
+    return "\n".join(f"- {i['detail']}" for i in issues)
@@ -2,6 +2,7 @@
 Critique Agent Phase A — Step 2
 Verifies Orchestrator's channel selection with evidence-based reasoning.
 """
+from app.agents.rules import allowed_channels
 from app.agents.state import RenewalState
 from app.core.gemini_client import call_llm_json
 from app.rag.chroma_store import hybrid_search_and_rerank
@@ -16,6 +17,7 @@ Check ALL of:
 2. Has this channel been EXHAUSTED (3+ attempts, no result)?
 3. Does the customer segment/preference align with this channel?
 4. Is escalation threshold already met (distress or objection_count >= 3)?
+5. Is the channel allowed this cycle? An alternative_channel must be one of the allowed channels.
 
 Respond ONLY with valid JSON:
 {
@@ -58,6 +60,7 @@ Customer:
 
 Channel Attempts for "{channel}": {channel_attempts}
 Total Interaction History Count: {len(history)}
+Channels allowed this cycle (reg_008 contact limit): {', '.join(allowed_channels(state))}
 
 Recent History:
 {json.dumps(history[-5:], indent=2)}
@@ -78,7 +81,7 @@ Regulatory Context:
     if verdict == "OVERRIDE":
         # Provide alternative channel back to orchestrator
         alt_channel = result.get("alternative_channel")
-        if alt_channel:
+        if alt_channel in allowed_channels(state):
             updates["selected_channel"] = alt_channel
             updates["channel_justification"] = result.get("override_reason", "Critique A override")
         updates["current_node"] = "PLANNER"  # Proceed with override channel
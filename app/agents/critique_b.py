@@ -1,12 +1,27 @@
 """
 Critique Agent Phase B — Step 5
 Reviews the final assembled message for compliance, tone, accuracy.
+
+With COMPLIANCE_PRECHECK on (default), app.agents.compliance checks the mechanical
+rules first and the LLM review only runs on a message that passes them. Failures —
+mechanical or from the LLM — get a targeted revision of just the failing part, up to
+COMPLIANCE_MAX_REVISIONS times and COMPLIANCE_REVISION_BUDGET_S each; a message
+still failing after that goes to a human instead of being sent.
 """
+import asyncio
+import time
+from app.agents.compliance import assemble_message, check_message, fix_instructions
 from app.agents.state import RenewalState
+from app.agents.templates import DISCLOSURE
+from app.core.config import get_settings
 from app.core.gemini_client import call_llm_json
 from app.rag.chroma_store import hybrid_search_and_rerank
+from app.utils.logger import logger
+from app.utils.metrics import metrics
 import json
 
+settings = get_settings()
+
 CRITIQUE_B_SYSTEM_PROMPT = """
 You are the RenewAI Critique Agent, Phase B — the content compliance reviewer.
 Review the assembled renewal message before sending.
@@ -35,9 +50,7 @@ Respond ONLY with valid JSON:
 """
 
 
-async def critique_b_node(state: RenewalState) -> dict:
-    """Step 5: Review assembled message for compliance and quality."""
-    
+async def llm_review(state: RenewalState, full_message: str) -> dict:
     # RAG: regulatory guidelines for compliance check
     reg_results = hybrid_search_and_rerank(
         "regulatory_guidelines",
@@ -47,12 +60,6 @@ async def critique_b_node(state: RenewalState) -> dict:
     )
     reg_context = "\n".join([r["document"] for r in reg_results]) if reg_results else ""
 
-    # Assemble the full message
-    greeting = state.get("greeting", "")
-    draft = state.get("draft_message", "")
-    closing = state.get("closing", "")
-    full_message = f"{greeting}\n\n{draft}\n\n{closing}"
-
     user_prompt = f"""
 Assembled Message to Review:
 ---
@@ -71,10 +78,100 @@ Context:
 Regulatory Guidelines:
 {reg_context}
 """
+    return await call_llm_json(CRITIQUE_B_SYSTEM_PROMPT, user_prompt)
 
-    result = await call_llm_json(CRITIQUE_B_SYSTEM_PROMPT, user_prompt)
-    verdict = result.get("verdict", "APPROVED")
 
+async def revise_parts(state: RenewalState, issues: list) -> dict:
+    """Redo only the parts with issues: the draft via the Draft Agent, greeting/closing from Step 4a."""
+    from app.agents.draft_agent import revise_draft
+    from app.agents.greeting_closing import greeting_closing_node
+
+    parts = {i["part"] for i in issues}
+    updates = {}
+    if "draft" in parts:
+        updates["draft_message"] = await revise_draft(
+            state, fix_instructions([i for i in issues if i["part"] == "draft"])
+        )
+    if parts & {"greeting", "closing"}:
+        if all(i["check"] == "disclosure" for i in issues if i["part"] != "draft"):
+            updates["closing"] = f"{(state.get('closing') or '').strip()}\n\n{DISCLOSURE}"
+        else:
+            regenerated = await greeting_closing_node(state)
+            updates.update({k: regenerated[k] for k in parts & {"greeting", "closing"}})
+    return updates
+
+
+async def critique_b_node(state: RenewalState) -> dict:
+    """Step 5: Review assembled message for compliance and quality."""
+    if not settings.compliance_precheck:
+        return await critique_b_llm_only(state)
+
+    state = dict(state)
+    updates = {"audit_trail": []}
+    result = {}
+    for revision in range(settings.compliance_max_revisions + 1):
+        issues = check_message(state)
+        if issues:
+            updates["audit_trail"].append(
+                f"[CRITIQUE_B] Pre-check failed: {', '.join(sorted({i['check'] for i in issues}))}"
+            )
+        else:
+            result = await llm_review(state, assemble_message(state))
+            verdict = result.get("verdict", "APPROVED")
+            updates["audit_trail"].append(
+                f"[CRITIQUE_B] Verdict: {verdict} | Score: {result.get('compliance_score')} | Issues: {result.get('issues')}"
+            )
+            if verdict != "REVISION_NEEDED":
+                break
+            issues = [{"check": "review", "part": "draft",
+                       "detail": result.get("fix_instructions") or "; ".join(result.get("issues") or [])}]
+        if revision == settings.compliance_max_revisions:
+            verdict = "REVISIONS_EXHAUSTED"
+            break
+        started = time.perf_counter()
+        try:
+            revised = await asyncio.wait_for(revise_parts(state, issues), settings.compliance_revision_budget_s)
+        except asyncio.TimeoutError:
+            verdict = "REVISION_TIMEOUT"
+            break
+        finally:
+            metrics.observe("critique_b.revision", time.perf_counter() - started)
+        state.update(revised)
+        updates.update(revised)
+        updates["audit_trail"].append(f"[CRITIQUE_B] Revision {revision + 1}: {', '.join(sorted(revised))} redone")
+
+    # Hit = approved as first drafted
+    metrics.incr("compliance.hit" if verdict == "APPROVED" and revision == 0 else "compliance.miss")
+    updates["critique_b_result"] = verdict
+    if verdict == "APPROVED":
+        updates["current_node"] = "CHANNEL_SEND"
+        updates["final_message"] = assemble_message(state)
+    else:
+        reason = result.get("escalate_reason") if verdict == "ESCALATE" else (
+            f"Critique B: message still non-compliant after {settings.compliance_max_revisions} revisions"
+            if verdict == "REVISIONS_EXHAUSTED" else
+            f"Critique B: revision exceeded {settings.compliance_revision_budget_s}s budget"
+        )
+        logger.info(f"[CRITIQUE_B] {state['policy_id']}: {verdict} — escalating")
+        updates.update({
+            "current_node": "ESCALATION",
+            "escalate": True,
+            "escalation_reason": reason or "Critique B escalation",
+            "mode": "HUMAN_CONTROL",
+        })
+    return updates
+
+
+async def critique_b_llm_only(state: RenewalState) -> dict:
+    """Step 5 without the pre-check: one LLM review, no revisions."""
+    # Assemble the full message
+    greeting = state.get("greeting", "")
+    draft = state.get("draft_message", "")
+    closing = state.get("closing", "")
+    full_message = f"{greeting}\n\n{draft}\n\n{closing}"
+
+    result = await llm_review(state, full_message)
+    verdict = result.get("verdict", "APPROVED")
     updates = {
         "critique_b_result": verdict,
         "audit_trail": [f"[CRITIQUE_B] Verdict: {verdict} | Score: {result.get('compliance_score')} | Issues: {result.get('issues')}"]
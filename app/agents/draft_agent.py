@@ -73,22 +73,14 @@ def detect_distress(history: list) -> bool:
     return False
 
 
-async def draft_agent_node(state: RenewalState) -> dict:
-    """Step 4b: Generate channel-specific message body."""
-    
-    channel = state.get("selected_channel", "Email")
+DRAFT_PROMPTS = {"Email": EMAIL_SYSTEM_PROMPT, "WhatsApp": WHATSAPP_SYSTEM_PROMPT, "Voice": VOICE_SYSTEM_PROMPT}
+
+
+def draft_context(state: RenewalState) -> str:
     plan = state.get("execution_plan", {})
     language = plan.get("language", state.get("preferred_language", "English"))
     tone = plan.get("tone", "friendly")
-
-    # Check distress in history
-    distress_detected = detect_distress(state.get("interaction_history", []))
-    if distress_detected and not state.get("distress_flag"):
-        distress_flag = True
-    else:
-        distress_flag = state.get("distress_flag", False)
-
-    base_context = f"""
+    return f"""
 Language: {language}
 Tone: {tone}
 Customer Name: {state['customer_name']}
@@ -110,16 +102,21 @@ Objection Playbook:
 {state.get('rag_objections', '')[:300]}
 """
 
-    if channel == "Email":
-        system_prompt = EMAIL_SYSTEM_PROMPT
-    elif channel == "WhatsApp":
-        system_prompt = WHATSAPP_SYSTEM_PROMPT
-    elif channel == "Voice":
-        system_prompt = VOICE_SYSTEM_PROMPT
+
+async def draft_agent_node(state: RenewalState) -> dict:
+    """Step 4b: Generate channel-specific message body."""
+    
+    channel = state.get("selected_channel", "Email")
+
+    # Check distress in history
+    distress_detected = detect_distress(state.get("interaction_history", []))
+    if distress_detected and not state.get("distress_flag"):
+        distress_flag = True
     else:
-        system_prompt = EMAIL_SYSTEM_PROMPT
+        distress_flag = state.get("distress_flag", False)
 
-    draft = await call_llm(system_prompt, base_context, temperature=0.4)
+    system_prompt = DRAFT_PROMPTS.get(channel, EMAIL_SYSTEM_PROMPT)
+    draft = await call_llm(system_prompt, draft_context(state), temperature=0.4)
 
     updates = {
         "current_node": "CRITIQUE_B",
@@ -131,3 +128,17 @@ Objection Playbook:
         updates["audit_trail"].append("[DRAFT_AGENT] ⚠️ DISTRESS DETECTED in message history")
 
     return updates
+
+
+async def revise_draft(state: RenewalState, fix_instructions: str) -> str:
+    """Targeted revision for Critique B: the same draft with only the listed issues fixed."""
+    system_prompt = DRAFT_PROMPTS.get(state.get("selected_channel", "Email"), EMAIL_SYSTEM_PROMPT)
+    user_prompt = f"""{draft_context(state)}
+Previous Draft:
+{state.get('draft_message', '')}
+
+Revise the previous draft. Fix ONLY these issues and keep everything else unchanged:
+{fix_instructions}
+"""
+    draft = await call_llm(system_prompt, user_prompt, temperature=0.2)
+    return draft.strip()
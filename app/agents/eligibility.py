@@ -0,0 +1,66 @@
+"""
+Contact eligibility — reg_008 before any LLM work.
+
+reg_008 allows at most MAX_CONTACTS_PER_CYCLE outbound contacts per channel in a
+premium cycle, and WhatsApp / Voice only inside CONTACT_WINDOWS of the customer's
+local time (CONTACT_TIMEZONE). contact_counters (migration 13) keeps the count per
+policy, channel and cycle, maintained by a trigger on outbound interactions; messages
+already held for a window (scheduled_sends) count as contacts too.
+
+The runner calls eligible_channels() before Step 1 and puts the result in
+state["allowed_channels"]: the rules, the channel model, the orchestrator, Critique A
+and the lite/express paths only ever pick from it, and a policy with no channel left
+is skipped before the graph runs. The windows don't rule a channel out — a message
+approved outside its window is held by app.agents.send_scheduler until next_window().
+"""
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from app.agents.rules import CHANNELS
+from app.agents.state import RenewalState
+from app.core.config import get_settings
+from app.db.pool import read_db
+
+settings = get_settings()
+
+# Customer local time, [start, end); Email has no window
+CONTACT_WINDOWS = {"WhatsApp": (time(8), time(20)), "Voice": (time(9), time(19))}
+MAX_CONTACTS_PER_CYCLE = 3
+
+COUNTS_SQL = """
+    SELECT channel, contacts FROM contact_counters WHERE policy_id = ? AND cycle_due_date = ?
+    UNION ALL
+    SELECT channel, COUNT(*) FROM scheduled_sends WHERE policy_id = ? AND status IN ('PENDING', 'SENDING')
+    GROUP BY channel
+"""
+
+
+def next_window(channel: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """None if the channel may be used now, else the (UTC) start of its next window."""
+    window = CONTACT_WINDOWS.get(channel)
+    if not window:
+        return None
+    tz = ZoneInfo(settings.contact_timezone)
+    local = (now or datetime.now(timezone.utc)).astimezone(tz)
+    start, end = window
+    if start <= local.time() < end:
+        return None
+    day = local.date() if local.time() < start else local.date() + timedelta(days=1)
+    return datetime.combine(day, start, tzinfo=tz).astimezone(timezone.utc)
+
+
+async def contact_counts(policy_id: str, cycle_due_date: Optional[str]) -> Dict[str, int]:
+    """Contacts made (or held) this cycle, per channel."""
+    async with read_db() as db:
+        rows = await db.execute_fetchall(COUNTS_SQL, (policy_id, cycle_due_date or "", policy_id))
+    counts = {channel: 0 for channel in CHANNELS}
+    for channel, count in rows:
+        counts[channel] = counts.get(channel, 0) + count
+    return counts
+
+
+async def eligible_channels(state: RenewalState) -> List[str]:
+    """Channels with contacts left this cycle, in CHANNELS order."""
+    counts = await contact_counts(state["policy_id"], state.get("premium_due_date"))
+    return [channel for channel in CHANNELS if counts[channel] < MAX_CONTACTS_PER_CYCLE]
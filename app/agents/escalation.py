@@ -3,12 +3,11 @@ Escalation / Human Queue Manager
 Routes distressed or complex cases to human agents.
 """
 from app.agents.state import RenewalState
-import aiosqlite
-from app.core.config import get_settings
+from app.db.pool import write_db
+from app.db.write_behind import enqueue_write
+from app.db.context_cache import invalidate_policy
 from datetime import datetime, timedelta
 
-settings = get_settings()
-
 PRIORITY_MAP = {
     "distress_flag": 1.0,
     "objection_threshold": 0.8,
@@ -25,7 +24,7 @@ async def escalation_node(state: RenewalState) -> dict:
     sla_hours = 2 if priority >= 0.9 else 4 if priority >= 0.7 else 8
     sla_deadline = (datetime.utcnow() + timedelta(hours=sla_hours)).isoformat()
 
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
+    async with write_db() as db:
         cursor = await db.execute("""
             INSERT INTO escalation_cases 
             (policy_id, escalation_reason, priority_score, status, sla_deadline)
@@ -33,15 +32,17 @@ async def escalation_node(state: RenewalState) -> dict:
         """, (state["policy_id"], reason, priority, "OPEN", sla_deadline))
         case_id = cursor.lastrowid
         
-        await db.execute(
-            "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
-            (state["policy_id"], "ESCALATION_CREATED", f"Case #{case_id} | Reason: {reason} | SLA: {sla_deadline}", "Escalation Manager")
-        )
         await db.execute(
             "UPDATE policy_state SET current_node=?, mode=?, distress_flag=?, updated_at=CURRENT_TIMESTAMP WHERE policy_id=?",
             ("HUMAN_QUEUE", "HUMAN_CONTROL", 1 if state.get("distress_flag") else 0, state["policy_id"])
         )
-        await db.commit()
+    invalidate_policy(state["policy_id"])
+
+    # Case + HUMAN_CONTROL are committed above; the audit line can ride the write-behind batch
+    await enqueue_write(
+        "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
+        (state["policy_id"], "ESCALATION_CREATED", f"Case #{case_id} | Reason: {reason} | SLA: {sla_deadline}", "Escalation Manager")
+    )
 
     print(f"[ESCALATION] Case #{case_id} created | Policy: {state['policy_id']} | Priority: {priority} | SLA: {sla_deadline}")
 
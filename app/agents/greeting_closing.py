@@ -1,11 +1,19 @@
 """
 Greeting/Closing Agent — Step 4a (runs in parallel with Draft Agent)
 Generates culturally appropriate greetings and compliant closings.
+
+With GREETING_TEMPLATES on (default) both are rendered from app.agents.templates —
+the LLM is only called to write a template for a language/tone/channel that has
+none yet — and the disclosure line is appended verbatim.
 """
 from app.agents.state import RenewalState
+from app.agents.templates import cta_text, get_variant, render, render_closing
+from app.core.config import get_settings
 from app.core.gemini_client import call_llm
 import json
 
+settings = get_settings()
+
 GREETING_SYSTEM_PROMPT = """
 You are the RenewAI Greeting Agent for Suraksha Life Insurance.
 Generate a culturally appropriate, warm greeting in the specified language.
@@ -40,6 +48,21 @@ async def greeting_closing_node(state: RenewalState) -> dict:
     tone = plan.get("tone", "friendly")
     first_name = state["customer_name"].split()[0]
 
+    if settings.greeting_templates:
+        variant = await get_variant(language, tone, channel)
+        slots = {
+            "first_name": first_name,
+            "policy_type": state["policy_type"],
+            "due_date": state["premium_due_date"],
+            "cta": cta_text(language, plan.get("cta_type")),
+        }
+        return {
+            "current_node": "DRAFT_AND_GREETING",
+            "greeting": render(variant["greeting"], **slots),
+            "closing": render_closing(variant["closing"], **slots),
+            "audit_trail": [f"[GREETING_CLOSING] Greeting/Closing rendered from template for {channel} in {language}"]
+        }
+
     greeting_prompt = f"""
 Customer First Name: {first_name}
 Policy Type: {state['policy_type']}
@@ -0,0 +1,118 @@
+"""
+Lite pipeline — Steps 1–3 in one LLM call for low-risk first reminders.
+
+A first reminder on a low premium, with no objections and no distress, has nothing
+for the orchestrator to weigh or Critique A to catch, so lite_plan_node asks one
+fused prompt for the channel, its own check of that channel and the execution plan
+(the planner's schema). Payment/escalation rules and a rule-decided channel still
+apply first; only policy documents are retrieved (no objections to handle).
+
+lite_eligible() decides from the loaded state; with LITE_PIPELINE on, runs triggered
+without a variant ("auto") take the lite graph when it holds and the full one
+otherwise. Per-variant latency and LLM usage are in the worker's metrics log.
+"""
+import asyncio
+from app.agents.compliance import is_ulip
+from app.agents.orchestrator import rule_updates
+from app.agents.rules import PAID_STATUSES, allowed_channels, evaluate_rules, restrict_channel
+from app.agents.state import RenewalState
+from app.core.config import get_settings
+from app.core.gemini_client import call_llm_json
+from app.rag.chroma_store import hybrid_search_and_rerank
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+LITE_SYSTEM_PROMPT = """
+You are the RenewAI Lite Planner for Suraksha Life Insurance.
+This is a low-risk first renewal reminder. In ONE step:
+1. Choose the channel from the Allowed Channels — the preferred channel unless the profile clearly argues otherwise.
+   If a channel is marked FIXED, use it.
+2. Verify your choice against the profile (segment, age, preference) as a critic would.
+3. Build the execution plan for the Draft Agent. Do NOT write the message.
+
+Respond ONLY with valid JSON:
+{
+  "channel": "WhatsApp|Email|Voice",
+  "justification": "why this channel",
+  "verdict": "APPROVED|OVERRIDE",
+  "evidence": "what the verification checked",
+  "plan": {
+    "tone": "formal|friendly|empathetic|hni",
+    "language": "English|Hindi|Tamil|...",
+    "key_facts": ["fact1","fact2","fact3"],
+    "greeting_style": "formal|warm|regional",
+    "timing_window": "morning|evening|anytime",
+    "cta_type": "payment_link|callback|whatsapp_reply|ivr_press1",
+    "personalization_elements": ["name","policy_type"],
+    "language_note": "any regional language nuance"
+  }
+}
+"""
+
+
+def lite_eligible(state: RenewalState) -> bool:
+    """Low premium, no objections, no distress, nothing sent yet, not a ULIP."""
+    history = state.get("interaction_history") or []
+    return (
+        settings.lite_pipeline
+        and 0 < (state.get("annual_premium") or 0) <= settings.lite_max_premium
+        and not state.get("distress_flag")
+        and not state.get("objection_count")
+        and state.get("policy_status") not in PAID_STATUSES
+        and not state.get("cycle_paid")
+        and not any(h.get("direction") == "OUTBOUND" for h in history)
+        and not is_ulip(state)
+    )
+
+
+def _policy_docs(state: RenewalState) -> str:
+    results = hybrid_search_and_rerank(
+        "policy_documents",
+        query=f"{state['policy_type']} renewal benefits premium due",
+        n_results=5,
+        rerank_top_k=3
+    )
+    return "\n".join([r["document"] for r in results]) if results else "No policy document found."
+
+
+async def lite_plan_node(state: RenewalState) -> dict:
+    """Steps 1–3 fused: channel, verification and plan from one LLM call."""
+    matched = evaluate_rules(state, channel_rules=settings.rules_fast_path)
+    metrics.incr("rules.hit" if matched else "rules.miss")
+    if matched and matched[1]["action"] != "CHANNEL":
+        return rule_updates(state, *matched)
+    fixed = matched[1]["channel"] if matched else None
+
+    policy_context = await asyncio.to_thread(_policy_docs, state)
+    user_prompt = f"""
+Customer: {state['customer_name']}, {state['customer_age']}y, {state['customer_city']}
+Segment: {state['segment']}
+Preferred Channel: {state['preferred_channel']}
+Allowed Channels: {', '.join(allowed_channels(state))}
+{f"Channel: {fixed} (FIXED)" if fixed else ""}
+Language: {state['preferred_language']}
+Policy Type: {state['policy_type']}
+Premium: ₹{state['annual_premium']}
+Due Date: {state['premium_due_date']}
+
+Retrieved Policy Documents:
+{policy_context}
+"""
+    result = await call_llm_json(LITE_SYSTEM_PROMPT, user_prompt)
+    channel = fixed or restrict_channel(state, result.get("channel"))
+    plan = result.get("plan") or {}
+    justification = f"{matched[0]['id']}: {matched[0]['why']}" if fixed else result.get("justification", "")
+
+    return {
+        "current_node": "DRAFT_AND_GREETING",
+        "selected_channel": channel,
+        "channel_justification": justification,
+        "critique_a_result": result.get("verdict", "APPROVED"),
+        "decision_rule": matched[0]["id"] if fixed else None,
+        "execution_plan": plan,
+        "rag_policy_docs": policy_context,
+        "rag_objections": "",
+        "audit_trail": [f"[LITE] Channel {channel} ({result.get('verdict', 'APPROVED')}) | "
+                        f"Tone: {plan.get('tone')} | Language: {plan.get('language')} — one LLM call for Steps 1-3"]
+    }
@@ -1,12 +1,26 @@
 """
 Orchestrator Agent — Step 1
 Decides the best channel (Email/WhatsApp/Voice) for a policyholder renewal.
+Clear-cut cases are decided by app.agents.rules without an LLM call; a channel
+picked by a rule also skips Critique A (the graph goes straight to the planner).
+Otherwise the channel bandit proposes a channel, and the LLM is only asked when
+the bandit is unsure.
+
+fixed_channel_node is Step 1 for the express and reply graphs, where the channel is
+already known (an operator override, or the channel the customer replied on): only
+the payment/escalation rules run, and the graph goes straight to the planner.
 """
+from app.agents.channel_bandit import channel_bandit
+from app.agents.rules import CHANNELS, EXHAUSTED_AFTER, decision_facts, evaluate_rules, restrict_channel
 from app.agents.state import RenewalState
+from app.core.config import get_settings
 from app.core.gemini_client import call_llm_json
 from app.rag.chroma_store import hybrid_search_and_rerank
+from app.utils.metrics import metrics
 import json
 
+settings = get_settings()
+
 ORCHESTRATOR_SYSTEM_PROMPT = """
 You are the RenewAI Renewal Orchestrator for Suraksha Life Insurance.
 Your job: Given a customer profile, policy data, and full interaction history, 
@@ -17,6 +31,7 @@ Rules:
 2. If distress_flag is True OR objection_count >= 3 → set escalate: true
 3. Consider preferred_channel first, then interaction history to see what worked
 4. If a channel has been tried 3+ times with no result, switch to fallback
+5. Only choose a channel listed as allowed this cycle
 
 Respond ONLY with valid JSON:
 {
@@ -30,18 +45,83 @@ Respond ONLY with valid JSON:
 """
 
 
-async def orchestrator_node(state: RenewalState) -> dict:
-    """Step 1: Select best communication channel."""
-    
-    # Check escalation conditions upfront
-    if state.get("distress_flag") or state.get("objection_count", 0) >= 3:
+def rule_updates(state: RenewalState, rule: dict, decision: dict) -> dict:
+    if decision["action"] == "COMPLETE":
+        return {
+            "current_node": "COMPLETED",
+            "decision_rule": rule["id"],
+            "audit_trail": [f"[ORCHESTRATOR] Rule {rule['id']}: payment already done for {state['policy_id']}"]
+        }
+    if decision["action"] == "ESCALATE":
         return {
             "current_node": "ESCALATION",
             "escalate": True,
-            "escalation_reason": "distress_flag" if state.get("distress_flag") else "objection_threshold",
+            "escalation_reason": decision["reason"],
             "mode": "HUMAN_CONTROL",
-            "audit_trail": [f"[ORCHESTRATOR] Direct escalation: distress={state.get('distress_flag')}, objections={state.get('objection_count')}"]
+            "decision_rule": rule["id"],
+            "audit_trail": [f"[ORCHESTRATOR] Rule {rule['id']}: direct escalation: distress={state.get('distress_flag')}, objections={state.get('objection_count')}"]
         }
+    return {
+        "current_node": "PLANNER",
+        "selected_channel": decision["channel"],
+        "channel_justification": f"{rule['id']}: {rule['why']}",
+        "decision_rule": rule["id"],
+        "audit_trail": [f"[ORCHESTRATOR] Rule {rule['id']}: selected channel {decision['channel']} | {rule['why']} (LLM and Critique A skipped)"]
+    }
+
+
+async def fixed_channel_node(state: RenewalState) -> dict:
+    """Step 1 (express/reply graphs): keep the given channel, still honouring payment/escalation rules."""
+    matched = evaluate_rules(state, channel_rules=False)
+    if matched:
+        return rule_updates(state, *matched)
+    if state.get("selected_channel"):
+        channel, why = state["selected_channel"], "Channel set by operator"
+    else:
+        # History is newest first
+        channel = next((h.get("channel") for h in state.get("interaction_history") or []
+                        if h.get("direction") == "INBOUND" and h.get("channel") in CHANNELS), None)
+        why = "Customer's last reply channel" if channel else "Preferred channel (no reply yet)"
+        channel = channel or state["preferred_channel"]
+    allowed = restrict_channel(state, channel)
+    if allowed != channel and channel in CHANNELS:
+        why = f"{channel} has no contacts left this cycle (reg_008) — {allowed} instead"
+    channel = allowed
+    return {
+        "current_node": "PLANNER",
+        "selected_channel": channel,
+        "channel_justification": why,
+        "audit_trail": [f"[ORCHESTRATOR] Fixed channel {channel} | {why} (LLM and Critique A skipped)"]
+    }
+
+
+async def orchestrator_node(state: RenewalState) -> dict:
+    """Step 1: Select best communication channel."""
+    
+    # Deterministic rules first: payment, escalation, and (with RULES_FAST_PATH) clear-cut channels
+    matched = evaluate_rules(state, channel_rules=settings.rules_fast_path)
+    if matched:
+        metrics.incr("rules.hit")
+        return rule_updates(state, *matched)
+    metrics.incr("rules.miss")
+
+    proposal = None
+    if settings.channel_bandit:
+        facts = decision_facts(state)
+        proposal = await channel_bandit.propose(state, exclude=[
+            c for c, n in facts["channel_attempts"].items()
+            if n >= EXHAUSTED_AFTER or c not in facts["allowed_channels"]
+        ])
+        if proposal and proposal[1] >= settings.bandit_confidence:
+            metrics.incr("bandit.hit")
+            channel, confidence = proposal
+            return {
+                "current_node": "CRITIQUE_A",
+                "selected_channel": channel,
+                "channel_justification": f"Channel model: {confidence:.0%} likely the best channel for similar customers",
+                "audit_trail": [f"[ORCHESTRATOR] Selected channel: {channel} | Channel model confidence {confidence:.0%} (LLM skipped)"]
+            }
+        metrics.incr("bandit.miss")
 
     # Build RAG context for objection library
     rag_results = hybrid_search_and_rerank(
@@ -78,7 +158,10 @@ Objection Context from RAG:
 
 Distress Flag: {state.get('distress_flag', False)}
 Objection Count: {state.get('objection_count', 0)}
+Channels allowed this cycle (reg_008 contact limit): {', '.join(decision_facts(state)['allowed_channels'])}
 """
+    if proposal:
+        user_prompt += f"Channel model suggestion (from outcomes of similar customers): {proposal[0]}, confidence {proposal[1]:.0%}\n"
 
     result = await call_llm_json(ORCHESTRATOR_SYSTEM_PROMPT, user_prompt)
     
@@ -99,7 +182,7 @@ Objection Count: {state.get('objection_count', 0)}
 
     return {
         "current_node": "CRITIQUE_A",
-        "selected_channel": result.get("channel", state["preferred_channel"]),
+        "selected_channel": restrict_channel(state, result.get("channel")),
         "channel_justification": result.get("justification", ""),
         "rag_objections": rag_context,
         "audit_trail": [f"[ORCHESTRATOR] Selected channel: {result.get('channel')} | Reason: {result.get('justification')}"]
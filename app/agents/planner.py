@@ -6,6 +6,7 @@ RAG retrieves policy documents + objection playbooks.
 from app.agents.state import RenewalState
 from app.core.gemini_client import call_llm_json
 from app.rag.chroma_store import hybrid_search_and_rerank
+from typing import Tuple
 import json
 
 PLANNER_SYSTEM_PROMPT = """
@@ -30,11 +31,8 @@ Output ONLY valid JSON:
 """
 
 
-async def planner_node(state: RenewalState) -> dict:
-    """Step 3: Build channel-specific execution plan."""
-    
-    channel = state.get("selected_channel", "Email")
-    
+def retrieve_planner_context(state: RenewalState) -> Tuple[str, str]:
+    """Policy documents + objection playbooks — independent of the channel (blocking)."""
     # RAG: policy documents
     policy_results = hybrid_search_and_rerank(
         "policy_documents",
@@ -53,7 +51,12 @@ async def planner_node(state: RenewalState) -> dict:
         rerank_top_k=3
     )
     obj_context = "\n".join([r["document"] for r in obj_results]) if obj_results else "Standard objection handling."
+    return policy_context, obj_context
 
+
+async def build_plan(state: RenewalState, policy_context: str, obj_context: str) -> dict:
+    """The planner's LLM step for the state's selected channel."""
+    channel = state.get("selected_channel", "Email")
     user_prompt = f"""
 Channel: {channel}
 Customer: {state['customer_name']}, {state['customer_age']}y, {state['customer_city']}
@@ -84,3 +87,9 @@ Recent Interactions: {json.dumps(state.get('interaction_history', [])[-3:], inde
         "rag_objections": obj_context,
         "audit_trail": [f"[PLANNER] Plan built for {channel} | Tone: {plan.get('tone')} | Language: {plan.get('language')}"]
     }
+
+
+async def planner_node(state: RenewalState) -> dict:
+    """Step 3: Build channel-specific execution plan."""
+    policy_context, obj_context = retrieve_planner_context(state)
+    return await build_plan(state, policy_context, obj_context)
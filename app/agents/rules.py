@@ -0,0 +1,119 @@
+"""
+Decision rules — the orchestrator's fast path.
+
+Most first reminders don't need an LLM to pick a channel: the orchestrator prompt's
+own rules (payment done, distress, 3+ objections, a channel tried 3+ times, preferred
+channel with no history) are plain counts over the loaded state. They are written
+here as data and evaluated in order; the first rule whose conditions all hold
+decides. A channel decided by a rule skips the orchestrator and Critique A LLM
+calls; anything the rules don't cover (replies to interpret, every channel
+exhausted) still goes to the LLM.
+
+Conditions are (fact, op, value) over decision_facts(); a CHANNEL decision names
+the fact holding the channel ("preferred_channel" or "fallback_channel").
+
+Channels are only picked from state["allowed_channels"] (set by the runner from the
+reg_008 contact quota, app.agents.eligibility; all of CHANNELS when unset): a preferred
+channel out of quota counts as exhausted.
+"""
+import operator
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agents.state import RenewalState
+from app.db.payments import PAID_STATUSES
+
+CHANNELS = ("WhatsApp", "Email", "Voice")  # fallback order: cheapest first
+EXHAUSTED_AFTER = 3
+
+OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "in": lambda fact, values: fact in values,
+}
+
+DECISION_RULES = [
+    {"id": "R1-PAID", "when": [("premium_paid", "==", True)],
+     "then": {"action": "COMPLETE"}, "why": "Premium already paid"},
+    {"id": "R2-DISTRESS", "when": [("distress_flag", "==", True)],
+     "then": {"action": "ESCALATE", "reason": "distress_flag"}, "why": "Distress detected"},
+    {"id": "R3-OBJECTIONS", "when": [("objection_count", ">=", 3)],
+     "then": {"action": "ESCALATE", "reason": "objection_threshold"}, "why": "3+ objections"},
+    {"id": "R4-FIRST-CONTACT", "when": [("history_count", "==", 0), ("preferred_allowed", "==", True)],
+     "then": {"action": "CHANNEL", "channel": "preferred_channel"},
+     "why": "No history yet — preferred channel"},
+    {"id": "R5-PREFERRED-NO-REPLY",
+     "when": [("inbound_count", "==", 0), ("preferred_open", "==", True)],
+     "then": {"action": "CHANNEL", "channel": "preferred_channel"},
+     "why": f"Preferred channel tried fewer than {EXHAUSTED_AFTER} times, no reply yet"},
+    {"id": "R6-PREFERRED-EXHAUSTED",
+     "when": [("inbound_count", "==", 0), ("preferred_exhausted", "==", True),
+              ("fallback_channel", "!=", None)],
+     "then": {"action": "CHANNEL", "channel": "fallback_channel"},
+     "why": f"Preferred channel tried {EXHAUSTED_AFTER}+ times with no reply, or out of contacts this cycle — least-tried fallback"},
+]
+
+
+def allowed_channels(state: RenewalState) -> List[str]:
+    allowed = state.get("allowed_channels")
+    return list(CHANNELS) if allowed is None else [c for c in CHANNELS if c in allowed]
+
+
+def restrict_channel(state: RenewalState, channel: Optional[str]) -> Optional[str]:
+    """channel if allowed, else the preferred channel, else Email, else the first allowed one."""
+    allowed = allowed_channels(state)
+    for candidate in (channel, state.get("preferred_channel"), "Email"):
+        if candidate in allowed:
+            return candidate
+    return allowed[0] if allowed else None
+
+
+def decision_facts(state: RenewalState) -> Dict[str, Any]:
+    history = state.get("interaction_history") or []
+    attempts = {channel: 0 for channel in CHANNELS}
+    inbound = 0
+    for h in history:
+        if h.get("direction") == "OUTBOUND" and h.get("channel") in attempts:
+            attempts[h["channel"]] += 1
+        elif h.get("direction") == "INBOUND":
+            inbound += 1
+    preferred = state.get("preferred_channel")
+    allowed = allowed_channels(state)
+    fallbacks = [c for c in allowed if c != preferred and attempts[c] < EXHAUSTED_AFTER]
+    # Out of contacts this cycle counts as exhausted
+    preferred_open = preferred in allowed and attempts[preferred] < EXHAUSTED_AFTER
+    return {
+        "policy_status": state.get("policy_status"),
+        "premium_paid": state.get("policy_status") in PAID_STATUSES or bool(state.get("cycle_paid")),
+        "distress_flag": bool(state.get("distress_flag")),
+        "objection_count": state.get("objection_count") or 0,
+        "history_count": len(history),
+        "inbound_count": inbound,
+        "preferred_channel": preferred,
+        "preferred_attempts": attempts.get(preferred, 0),
+        "preferred_allowed": preferred in allowed,
+        "preferred_open": preferred_open,
+        "preferred_exhausted": preferred in CHANNELS and not preferred_open,
+        "channel_attempts": attempts,
+        "allowed_channels": allowed,
+        # min() keeps the first of equals, so ties go in CHANNELS order
+        "fallback_channel": min(fallbacks, key=lambda c: attempts[c]) if fallbacks else None,
+    }
+
+
+def evaluate_rules(state: RenewalState, channel_rules: bool = True) -> Optional[Tuple[dict, dict]]:
+    """
+    (rule, decision) for the first matching rule, or None when the LLM has to decide.
+    decision is the rule's "then" with "channel" resolved to a channel name.
+    """
+    facts = decision_facts(state)
+    for rule in DECISION_RULES:
+        if rule["then"]["action"] == "CHANNEL" and not channel_rules:
+            continue
+        if all(OPS[op](facts.get(fact), value) for fact, op, value in rule["when"]):
+            decision = dict(rule["then"])
+            if decision["action"] == "CHANNEL":
+                decision["channel"] = facts[decision["channel"]]
+            return rule, decision
+    return None
@@ -0,0 +1,194 @@
+"""
+Workflow runner — executes one renewal workflow for a policy and records its progress
+(policy_state.current_node, workflow_logs) as each node finishes.
+Called by the job worker (app.worker); raises on failure so the queue can retry.
+Per-node wall time goes to app.utils.metrics as node.<name>.
+
+Only one run per policy at a time: the run holds the policy's lease (app.db.policy_lock)
+from start to finish and renews it after every node. A run that finds the lease taken
+returns "COALESCED"; one that loses it mid-flight stops and returns "LEASE_LOST".
+
+Queued runs are checkpointed (app.db.checkpoints) under their job's thread id, so a
+retry or a reclaimed job resumes after the last node that finished; the checkpoints
+are deleted once the run completes. WORKFLOW_CHECKPOINTS=false turns this off.
+
+variant picks the compiled graph (app.agents.workflow.GRAPH_VARIANTS); with express or
+reply, override_channel becomes the selected channel instead of a preference. "auto"
+takes the lite graph when app.agents.lite.lite_eligible() holds, else the full one; a
+resumed run stays on the graph its checkpoint was made with. Wall time and LLM usage
+per variant go to metrics as workflow.<variant> and workflow.<variant>.<calls|tokens_in|…>.
+
+A policy that is PAID, RENEWED or LAPSED by the time its run starts (app.db.payments)
+is skipped before the graph runs, counted as workflow.preflight_skipped. So is one with
+no reg_008 contacts left this cycle on any channel (app.agents.eligibility,
+workflow.contact_limit); otherwise the channels it may still use go in allowed_channels.
+"""
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+
+from app.agents.eligibility import MAX_CONTACTS_PER_CYCLE, eligible_channels
+from app.agents.lite import lite_eligible
+from app.agents.workflow import get_workflow
+from app.core.config import get_settings
+from app.db.checkpoints import checkpointer
+from app.db.context_cache import invalidate_policy
+from app.db.payments import outreach_closed
+from app.db.policy_context import load_policy_state
+from app.db.policy_lock import PolicyLeaseLost, acquire_policy_lease, release_policy_lease, renew_policy_lease
+from app.db.write_behind import enqueue_write
+from app.utils.logger import logger
+from app.utils.metrics import metrics, run_usage
+
+settings = get_settings()
+
+
+def run_thread_id(job_id: int) -> str:
+    """Checkpoint thread for a job — the same across its attempts."""
+    return f"job-{job_id}"
+
+
+async def run_renewal(
+    policy_id: str,
+    override_channel: Optional[str] = None,
+    job_id: Optional[int] = None,
+    owner: Optional[str] = None,
+    variant: str = "auto"
+) -> str:
+    """
+    Run the workflow on the policy's current context. Returns the last node reached,
+    "SKIPPED" when the policy is gone or a human has taken over since it was queued,
+    or "COALESCED" / "LEASE_LOST" when another run owns the policy.
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}/{uuid.uuid4().hex[:8]}"
+    lease = await acquire_policy_lease(policy_id, owner, job_id)
+    if not lease["acquired"]:
+        if lease["run_owner"] is None:
+            logger.warning(f"[WORKFLOW] {policy_id} no longer exists — skipping")
+            return "SKIPPED"
+        logger.info(
+            f"[WORKFLOW] {policy_id} already running under {lease['run_owner']} "
+            f"(job {lease['run_job_id']}) — coalesced"
+        )
+        metrics.incr("workflow.coalesced")
+        return "COALESCED"
+    try:
+        return await _run_leased(policy_id, override_channel, owner, job_id, variant)
+    finally:
+        await release_policy_lease(policy_id, owner)
+
+
+async def _run_leased(policy_id: str, override_channel: Optional[str], owner: str, job_id: Optional[int],
+                      variant: str) -> str:
+    # Loaded after taking the lease, and fresh: the cache may not yet have seen another
+    # process's writes (e.g. the API just handing the policy to a human)
+    state = await load_policy_state(policy_id, fresh=True)
+    if not state:
+        logger.warning(f"[WORKFLOW] {policy_id} no longer exists — skipping")
+        return "SKIPPED"
+    if state["mode"] == "HUMAN_CONTROL":
+        logger.info(f"[WORKFLOW] {policy_id} is in HUMAN_CONTROL — skipping")
+        return "SKIPPED"
+    closed = outreach_closed(state["policy_status"], state.get("cycle_paid"))
+    if closed:
+        # Paid (or lapsed) since it was queued — no LLM work for it
+        logger.info(f"[WORKFLOW] {policy_id}: {closed} — skipping")
+        metrics.incr("workflow.preflight_skipped")
+        return "SKIPPED"
+    if settings.contact_eligibility:
+        state["allowed_channels"] = await eligible_channels(state)
+        if not state["allowed_channels"]:
+            logger.info(f"[WORKFLOW] {policy_id} has no contacts left this cycle on any channel — skipping")
+            metrics.incr("workflow.contact_limit")
+            await enqueue_write(
+                "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
+                (policy_id, "CONTACT_LIMIT_REACHED",
+                 f"reg_008: every channel used {MAX_CONTACTS_PER_CYCLE} times this premium cycle", "System")
+            )
+            return "SKIPPED"
+    current_node = state["current_node"]
+    inputs, config = state, None
+    checkpointed = settings.workflow_checkpoints and job_id is not None
+    if checkpointed:
+        config = {"configurable": {"thread_id": run_thread_id(job_id)}}
+        saved = await checkpointer.aget_tuple(config)
+        if saved:
+            # Resume on the graph the run started on, whatever "auto" would pick now
+            variant = saved.checkpoint["channel_values"].get("graph_variant") or variant
+    if variant == "auto":
+        variant = "lite" if lite_eligible(state) else "full"
+    state["graph_variant"] = variant
+    if variant in ("express", "reply"):
+        # fixed_channel keeps this, or falls back to the last reply / preferred channel
+        state["selected_channel"] = override_channel
+    elif override_channel:
+        state["preferred_channel"] = override_channel
+
+    if checkpointed:
+        saved = await get_workflow(checkpointed=True, variant=variant).aget_state(config)
+        if saved.values and not saved.next:
+            # Finished last time, but the job wasn't marked done — don't send twice
+            await checkpointer.adelete_thread(run_thread_id(job_id))
+            return saved.values.get("current_node", current_node)
+        if saved.next:
+            logger.info(f"[WORKFLOW] Resuming {policy_id} (job {job_id}) at {', '.join(saved.next)}")
+            metrics.incr("workflow.resumed")
+            inputs, current_node = None, saved.values.get("current_node", current_node)
+
+    if inputs is not None:
+        logger.info(f"[WORKFLOW] Starting {variant} workflow for {policy_id}")
+    node_started = run_started = time.perf_counter()
+    with run_usage() as usage:
+        try:
+            async for chunk in get_workflow(checkpointed, variant).astream(inputs, config, stream_mode="updates"):
+                # Nodes run one after another, so the gap between chunks is the node's time
+                now = time.perf_counter()
+                for node_name in chunk:
+                    metrics.observe(f"node.{node_name}", now - node_started)
+                node_started = now
+                if settings.log_workflow_chunks:
+                    # Formatting whole state updates is costly; the file log is always at DEBUG
+                    logger.debug(f"[WORKFLOW] Chunk: {list(chunk.items())}")
+                # chunk is a dict: {node_name: {updates}}
+                for node_name, updates in chunk.items():
+                    current_node = updates.get("current_node", node_name.upper())
+                    audit_entry = updates.get("audit_trail", ["Node execution"])[-1]
+
+                    logger.info(f"[WORKFLOW] {policy_id} -> {node_name} -> {current_node}")
+
+                    # Update current state
+                    await enqueue_write(
+                        "UPDATE policy_state SET current_node=?, updated_at=CURRENT_TIMESTAMP WHERE policy_id=?",
+                        (current_node, policy_id)
+                    )
+                    # Log to workflow_logs
+                    await enqueue_write(
+                        "INSERT INTO workflow_logs (policy_id, node_name, content) VALUES (?, ?, ?)",
+                        (policy_id, node_name, audit_entry), settings.workflow_log_durability
+                    )
+                    invalidate_policy(policy_id)
+                await renew_policy_lease(policy_id, owner)
+        except PolicyLeaseLost as e:
+            # Someone reclaimed the policy while a node overran the lease; they carry on, we stop
+            logger.warning(f"[WORKFLOW] {policy_id}: {e} — stopping at {current_node}")
+            metrics.incr("workflow.lease_lost")
+            return "LEASE_LOST"
+        except Exception as e:
+            logger.error(f"[WORKFLOW ERROR] {policy_id}: {e}")
+            await enqueue_write(
+                "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
+                (policy_id, "WORKFLOW_ERROR", str(e), "System")
+            )
+            raise
+        finally:
+            # Wall time and LLM usage per graph variant (compare lite vs full)
+            metrics.observe(f"workflow.{variant}", time.perf_counter() - run_started)
+            for name, value in usage.items():
+                metrics.incr(f"workflow.{variant}.{name}", value)
+
+    if checkpointed:
+        await checkpointer.adelete_thread(run_thread_id(job_id))
+    logger.info(f"[WORKFLOW] Completed for {policy_id}")
+    return current_node
@@ -0,0 +1,278 @@
+"""
+Deferred sends — approved WhatsApp/Voice messages held until the next legal window.
+
+send_window_node sits between Critique B and the channel agents (in place of the old
+pass-through channel router). Inside the channel's reg_008 window
+(app.agents.eligibility.CONTACT_WINDOWS) it passes the message on; outside it the
+approved message goes into scheduled_sends with send_after = the window's next start
+and the run ends as SCHEDULED. A newer message for the same policy supersedes one
+still held.
+
+Workers release held messages through the same channel agents, earliest send_after
+first. scheduled_sends, indexed on (status, send_after), is the timer queue shared by
+every worker process; SendScheduler adds the per-process side: no query until the
+earliest held message is due (or SEND_RECHECK_S), and a token bucket of
+SEND_RELEASE_RATE per second (bursts up to SEND_RELEASE_BATCH), so the 8 AM backlog goes
+out in paced batches. Each message is released under its policy's run lease
+(app.db.policy_lock), so it never goes out alongside a live workflow run — a policy
+that is running is simply tried again shortly. Under the lease it is checked again:
+dropped if the policy was paid, lapsed, handed to a human or used its quota meanwhile;
+held again if its window closed before its turn.
+
+Claims are atomic (status SENDING) and count an attempt. A failed send is retried with
+the job queue's backoff and marked FAILED after SEND_MAX_ATTEMPTS; a claim left behind
+by a crashed worker is picked up again after SEND_CLAIM_TIMEOUT_S, and marked SENT
+rather than sent twice if the channel agent had already recorded the message.
+
+Usage (worker loop):
+    released = await send_scheduler.tick()
+"""
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+from app.agents.channels.email_agent import email_send_node
+from app.agents.channels.voice_agent import voice_send_node
+from app.agents.channels.whatsapp_agent import whatsapp_send_node
+from app.agents.eligibility import MAX_CONTACTS_PER_CYCLE, next_window
+from app.agents.state import RenewalState
+from app.core.config import get_settings
+from app.db.context_cache import invalidate_policy
+from app.db.job_queue import backoff_seconds
+from app.db.payments import outreach_closed
+from app.db.policy_lock import acquire_policy_lease, release_policy_lease
+from app.db.pool import read_db, write_db
+from app.db.write_behind import enqueue_write
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+SEND_NODES = {"Email": email_send_node, "WhatsApp": whatsapp_send_node, "Voice": voice_send_node}
+SEND_RECHECK_S = 60
+SEND_CLAIM_TIMEOUT_S = 300
+SEND_MAX_ATTEMPTS = 3
+DB_TIME = "%Y-%m-%d %H:%M:%S"  # CURRENT_TIMESTAMP format (UTC)
+
+# Read before claiming: a stale SENDING row's updated_at is when its last attempt started
+DUE_SQL = """
+    SELECT id, policy_id, channel, content, status, attempts, updated_at FROM scheduled_sends
+    WHERE (status='PENDING' AND send_after <= datetime('now'))
+       OR (status='SENDING' AND updated_at <= datetime('now', ?))
+    ORDER BY send_after, id
+    LIMIT ?
+"""
+
+CLAIM_SQL = """
+    UPDATE scheduled_sends SET status='SENDING', attempts=attempts + 1, updated_at=CURRENT_TIMESTAMP
+    WHERE id IN ({ids})
+"""
+
+POLICY_SQL = """
+    SELECT p.policy_id, p.status, p.policy_type, p.premium_due_date, c.name AS customer_name, ps.mode, pc.cycle_paid,
+           (SELECT cc.contacts FROM contact_counters cc
+            WHERE cc.policy_id = p.policy_id AND cc.channel = ? AND cc.cycle_due_date = COALESCE(p.premium_due_date, ''))
+           AS contacts
+    FROM policies p
+    JOIN policy_cycle pc ON pc.policy_id = p.policy_id
+    LEFT JOIN customers c ON c.customer_id = p.customer_id
+    LEFT JOIN policy_state ps ON ps.policy_id = p.policy_id
+    WHERE p.policy_id = ?
+"""
+
+# The channel agent recorded the message before the claiming worker stopped
+SENT_SINCE_SQL = """
+    SELECT 1 FROM interactions
+    WHERE policy_id = ? AND channel = ? AND message_direction = 'OUTBOUND' AND created_at >= ?
+    LIMIT 1
+"""
+
+
+def _local(when: datetime) -> str:
+    return when.astimezone(ZoneInfo(settings.contact_timezone)).strftime("%d %b %H:%M")
+
+
+async def send_window_node(state: RenewalState) -> dict:
+    """Pass the approved message to its channel agent, or hold it until the channel's window opens."""
+    channel = state.get("selected_channel", "Email")
+    send_after = next_window(channel) if settings.contact_eligibility else None
+    if send_after is None:
+        return {"current_node": "CHANNEL_SEND"}
+
+    policy_id = state["policy_id"]
+    content = state.get("final_message") or \
+        f"{state.get('greeting','')}\n\n{state.get('draft_message','')}\n\n{state.get('closing','')}".strip()
+    async with write_db() as db:
+        await db.execute(
+            "UPDATE scheduled_sends SET status='SUPERSEDED', updated_at=CURRENT_TIMESTAMP "
+            "WHERE policy_id=? AND status='PENDING'", (policy_id,)
+        )
+        await db.execute(
+            "INSERT INTO scheduled_sends (policy_id, channel, content, send_after) VALUES (?, ?, ?, ?)",
+            (policy_id, channel, content, send_after.strftime(DB_TIME))
+        )
+    await enqueue_write(
+        "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
+        (policy_id, "SEND_SCHEDULED", f"{channel} outside its reg_008 window — held until {_local(send_after)}",
+         "Send Scheduler")
+    )
+    invalidate_policy(policy_id)
+    metrics.incr("sends.held")
+    send_scheduler.wake(send_after)
+    return {
+        "current_node": "SCHEDULED",
+        "messages_sent": [f"[{channel.upper()}] Held until {_local(send_after)} | Policy: {policy_id}"],
+        "audit_trail": [f"[SEND_WINDOW] {channel} is outside its reg_008 window — held until {_local(send_after)}"]
+    }
+
+
+def _drop_reason(policy: Optional[dict], contacts: int) -> Optional[str]:
+    if policy is None:
+        return "Policy no longer exists"
+    closed = outreach_closed(policy["status"], policy["cycle_paid"])
+    if closed:
+        return closed
+    if policy["mode"] == "HUMAN_CONTROL":
+        return "Policy is in HUMAN_CONTROL"
+    if contacts >= MAX_CONTACTS_PER_CYCLE:
+        return f"Channel used {contacts} times this cycle (reg_008)"
+    return None
+
+
+def _after(seconds: int) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).strftime(DB_TIME)
+
+
+async def _settle(send_id: int, status: str, reason: Optional[str] = None, send_after: Optional[str] = None,
+                  refund: bool = False):
+    """Final status of this claim; refund=True when nothing was tried (not an attempt)."""
+    async with write_db() as db:
+        await db.execute(
+            "UPDATE scheduled_sends SET status=?, reason=COALESCE(?, reason), send_after=COALESCE(?, send_after), "
+            "attempts=attempts - ?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+            (status, reason, send_after, int(refund), send_id)
+        )
+
+
+async def _release_leased(row) -> str:
+    attempt = row["attempts"] + 1
+    async with read_db() as db:
+        sent_before = row["status"] == "SENDING" and bool(await db.execute_fetchall(
+            SENT_SINCE_SQL, (row["policy_id"], row["channel"], row["updated_at"])))
+        found = await db.execute_fetchall(POLICY_SQL, (row["channel"], row["policy_id"]))
+    if sent_before:
+        await _settle(row["id"], "SENT", "Sent before its worker stopped")
+        return "released"
+    if row["attempts"] >= SEND_MAX_ATTEMPTS:
+        await _settle(row["id"], "FAILED", f"Gave up after {row['attempts']} attempts")
+        return "failed"
+    policy = dict(found[0]) if found else None
+    reason = _drop_reason(policy, (policy or {}).get("contacts") or 0)
+    if reason:
+        await _settle(row["id"], "CANCELLED", reason)
+        return "dropped"
+    later = next_window(row["channel"])
+    if later:
+        await _settle(row["id"], "PENDING", send_after=later.strftime(DB_TIME), refund=True)
+        return "rescheduled"
+    try:
+        await SEND_NODES.get(row["channel"], email_send_node)({
+            "policy_id": row["policy_id"], "customer_name": policy["customer_name"] or "",
+            "policy_type": policy["policy_type"], "premium_due_date": policy["premium_due_date"],
+            "final_message": row["content"]
+        })
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Send {row['id']} ({row['policy_id']}, {row['channel']}) "
+                     f"failed, attempt {attempt}/{SEND_MAX_ATTEMPTS}: {e}")
+        if attempt >= SEND_MAX_ATTEMPTS:
+            await _settle(row["id"], "FAILED", str(e))
+        else:
+            await _settle(row["id"], "PENDING", str(e), _after(backoff_seconds(attempt)))
+        return "failed"
+    await _settle(row["id"], "SENT")
+    return "released"
+
+
+async def _release(row) -> str:
+    owner = f"{socket.gethostname()}:{os.getpid()}/send-{row['id']}"
+    lease = await acquire_policy_lease(row["policy_id"], owner)
+    if not lease["acquired"]:
+        if lease["run_owner"] is None:
+            await _settle(row["id"], "CANCELLED", "Policy no longer exists")
+            return "dropped"
+        # A workflow run holds the policy — try again shortly
+        await _settle(row["id"], "PENDING", send_after=_after(SEND_RECHECK_S), refund=True)
+        return "rescheduled"
+    try:
+        return await _release_leased(row)
+    finally:
+        await release_policy_lease(row["policy_id"], owner)
+
+
+async def release_due_sends(limit: int) -> Dict[str, int]:
+    """Claim up to `limit` due messages and send, drop or re-hold each one under its policy's lease."""
+    outcome = {"released": 0, "dropped": 0, "rescheduled": 0, "failed": 0}
+    async with write_db() as db:
+        claimed = await db.execute_fetchall(DUE_SQL, (f"-{SEND_CLAIM_TIMEOUT_S} seconds", limit))
+        if not claimed:
+            return outcome
+        await db.execute(CLAIM_SQL.format(ids=",".join("?" * len(claimed))), [row["id"] for row in claimed])
+
+    for row in claimed:
+        try:
+            outcome[await _release(row)] += 1
+        except Exception as e:
+            # Left SENDING: picked up again after SEND_CLAIM_TIMEOUT_S
+            logger.error(f"[SCHEDULER] Release of send {row['id']} ({row['policy_id']}) failed: {e}")
+    for name, count in outcome.items():
+        metrics.incr(f"sends.{name}", count)
+    logger.info(f"[SCHEDULER] Released {outcome['released']} held messages ({outcome['dropped']} dropped, "
+                f"{outcome['rescheduled']} held again, {outcome['failed']} failed)")
+    return outcome
+
+
+async def next_due() -> Optional[datetime]:
+    async with read_db() as db:
+        rows = await db.execute_fetchall("SELECT MIN(send_after) FROM scheduled_sends WHERE status='PENDING'")
+    if not rows or not rows[0][0]:
+        return None
+    return datetime.strptime(rows[0][0], DB_TIME).replace(tzinfo=timezone.utc)
+
+
+class SendScheduler:
+    """Per-process timer and token bucket in front of release_due_sends()."""
+
+    def __init__(self, rate: Optional[float] = None, batch: Optional[int] = None):
+        self.rate = rate or settings.send_release_rate
+        self.batch = batch or settings.send_release_batch
+        self.tokens = float(self.batch)
+        self.refilled = time.monotonic()
+        self.next_check = 0.0
+
+    def wake(self, send_after: datetime):
+        """A message was held in this process — make sure we look again by its send time."""
+        due_in = (send_after - datetime.now(timezone.utc)).total_seconds()
+        self.next_check = min(self.next_check, time.monotonic() + max(0.0, due_in))
+
+    async def tick(self) -> int:
+        """Release what is due and the bucket allows; returns the number sent."""
+        now = time.monotonic()
+        self.tokens = min(float(self.batch), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+        if now < self.next_check or self.tokens < 1:
+            return 0
+        limit = int(self.tokens)
+        outcome = await release_due_sends(limit)
+        self.tokens -= outcome["released"]
+        if sum(outcome.values()) < limit:
+            # Nothing more due: sleep until the earliest held message (another process may hold an earlier one)
+            due = await next_due()
+            wait = (due - datetime.now(timezone.utc)).total_seconds() if due else SEND_RECHECK_S
+            self.next_check = time.monotonic() + min(max(0.0, wait), SEND_RECHECK_S)
+        return outcome["released"]
+
+
+send_scheduler = SendScheduler()
@@ -0,0 +1,70 @@
+"""
+Speculative Critique A + Planner — Steps 2 and 3 at once.
+
+Critique A approves the orchestrator's channel most of the time, and the planner's
+retrieval doesn't depend on its verdict at all. With SPECULATIVE_PLANNING on, the
+planner starts on the orchestrator's channel while Critique A is still deciding
+(and with SPECULATIVE_DRAFT, the draft + greeting after it). The speculative work
+is kept unless Critique A moves the policy to another channel; then the plan is
+rebuilt for the new channel from the retrieval already done, and the draft runs
+as a normal step.
+
+Hits and misses go to app.utils.metrics as speculation.hit / speculation.miss.
+"""
+import asyncio
+from app.agents.critique_a import critique_a_node
+from app.agents.planner import build_plan, retrieve_planner_context
+from app.agents.state import RenewalState
+from app.core.config import get_settings
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+
+async def critique_and_plan_node(state: RenewalState) -> dict:
+    """Steps 2 + 3 (+ 4 with SPECULATIVE_DRAFT): verify the channel while planning for it."""
+    from app.agents.workflow import parallel_draft_and_greeting
+
+    channel = state.get("selected_channel")
+    # Retrieval blocks, so it runs in a thread while Critique A waits on the LLM
+    context = asyncio.create_task(asyncio.to_thread(retrieve_planner_context, state))
+
+    async def speculate():
+        # Shielded: the retrieval is still needed if this speculation gets cancelled
+        plan = await build_plan(state, *await asyncio.shield(context))
+        if not settings.speculative_draft:
+            return plan, None
+        return plan, await parallel_draft_and_greeting({**state, **plan})
+
+    speculation = asyncio.create_task(speculate())
+    # A discarded speculation's error isn't interesting
+    speculation.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        verdict = await critique_a_node(state)
+    except BaseException:
+        speculation.cancel()
+        raise
+
+    updates = dict(verdict)
+    final_channel = verdict.get("selected_channel", channel)
+    if final_channel == channel:
+        metrics.incr("speculation.hit")
+        plan, draft = await speculation
+    else:
+        # Critique A switched channel: the plan (and any draft) was for the wrong one
+        metrics.incr("speculation.miss")
+        speculation.cancel()
+        logger.info(f"[SPECULATION] {state['policy_id']}: {channel} → {final_channel}, re-planning")
+        plan, draft = await build_plan({**state, **verdict}, *await context), None
+
+    updates.update(plan)
+    updates["audit_trail"] = verdict.get("audit_trail", []) + plan.get("audit_trail", [])
+    if draft:
+        updates.update({k: v for k, v in draft.items() if k != "audit_trail"})
+        updates["audit_trail"] += draft.get("audit_trail", [])
+    updates["audit_trail"].append(
+        f"[SPECULATION] {'Hit' if final_channel == channel else 'Miss'} for {channel}"
+        + (" (draft kept)" if draft else "")
+    )
+    return updates
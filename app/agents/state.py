@@ -23,18 +23,22 @@ class RenewalState(TypedDict):
     payment_mode: str
     fund_value: Optional[int]
     policy_status: str
+    cycle_paid: bool                       # current premium cycle covered by payments (app.db.payments)
 
     # Workflow state
+    graph_variant: str                     # app.agents.workflow.GRAPH_VARIANTS — the graph this run uses
     current_node: str
     selected_channel: Optional[str]
+    allowed_channels: Optional[List[str]]  # reg_008 contact quota left this cycle (app.agents.eligibility); unset = all
     channel_justification: Optional[str]
     critique_a_result: Optional[str]       # APPROVED / OVERRIDE
+    decision_rule: Optional[str]           # app.agents.rules id when Step 1 was decided by a rule
     execution_plan: Optional[Dict]
     draft_message: Optional[str]
     greeting: Optional[str]
     closing: Optional[str]
     final_message: Optional[str]
-    critique_b_result: Optional[str]       # APPROVED / REVISION_NEEDED / ESCALATE
+    critique_b_result: Optional[str]       # APPROVED / REVISION_NEEDED / ESCALATE / REVISIONS_EXHAUSTED / REVISION_TIMEOUT
 
     # Escalation / distress
     distress_flag: bool
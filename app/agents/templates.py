@@ -0,0 +1,195 @@
+"""
+Greeting/closing templates — language × tone × channel, with slots.
+
+A greeting or closing only depends on the customer's first name, policy type, due
+date and CTA, plus the cohort (language, tone, channel), so it doesn't need an LLM
+call per run. Templates use the slots {first_name}, {policy_type}, {due_date} and
+{cta}; the mandatory AI disclosure is never part of a template — render_closing()
+appends it verbatim.
+
+Lookup: built-in library (exact channel, then the language/tone's "*" variant), then
+message_templates (variants generated earlier, migration 11), and only then one LLM
+call that writes a new variant for the cohort. Generated variants are validated
+(known slots only, greeting must use {first_name}), stored, and shared by every
+worker; concurrent misses for the same cohort wait on a single generation.
+"""
+import asyncio
+from string import Formatter
+from typing import Dict, Optional, Tuple
+
+from app.core.gemini_client import call_llm_json
+from app.db.pool import read_db, write_db
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+DISCLOSURE = (
+    "This message is from an AI assistant of Suraksha Life Insurance. "
+    "Reply HUMAN anytime to speak with a specialist."
+)
+
+SLOTS = {"first_name", "policy_type", "due_date", "cta"}
+TONES = ("formal", "friendly", "empathetic", "hni")
+CHANNELS = ("Email", "WhatsApp", "Voice")
+
+CTA_TEXT = {
+    "English": {
+        "payment_link": "You can renew in a minute here: [PAYMENT_LINK]",
+        "callback": "Reply CALL and we will ring you back at a time that suits you.",
+        "whatsapp_reply": "Reply PAY and we will send your secure payment link.",
+        "ivr_press1": "Press 1 now to renew, or press 2 to talk to us.",
+    },
+    "Hindi": {
+        "payment_link": "यहाँ एक मिनट में नवीनीकरण करें: [PAYMENT_LINK]",
+        "callback": "CALL लिखकर भेजें, हम आपकी सुविधा के समय पर कॉल करेंगे।",
+        "whatsapp_reply": "PAY लिखकर भेजें, हम आपको सुरक्षित भुगतान लिंक भेज देंगे।",
+        "ivr_press1": "नवीनीकरण के लिए अभी 1 दबाएँ, या हमसे बात करने के लिए 2 दबाएँ।",
+    },
+}
+
+# (language, tone, channel) → {"greeting", "closing"}; channel "*" covers the rest
+LIBRARY: Dict[Tuple[str, str, str], Dict[str, str]] = {
+    ("English", "formal", "*"): {
+        "greeting": "Dear {first_name},",
+        "closing": "We remain at your service for your {policy_type} policy, due on {due_date}. {cta}\n\nYours sincerely,\nSuraksha Life Insurance",
+    },
+    ("English", "friendly", "*"): {
+        "greeting": "Hi {first_name}! Hope you're doing well.",
+        "closing": "Your {policy_type} cover keeps going once you renew by {due_date}. {cta}\n\nWarm regards,\nTeam Suraksha Life",
+    },
+    ("English", "friendly", "WhatsApp"): {
+        "greeting": "Hi {first_name}! 👋",
+        "closing": "Renew your {policy_type} by {due_date} to stay covered. {cta}\n\nTeam Suraksha Life 🛡️",
+    },
+    ("English", "empathetic", "*"): {
+        "greeting": "Dear {first_name}, we hope you and your family are keeping well.",
+        "closing": "We're here to help with your {policy_type} policy in whatever way works for you — there is time until {due_date}. {cta}\n\nWith care,\nSuraksha Life Insurance",
+    },
+    ("English", "hni", "*"): {
+        "greeting": "Dear {first_name},",
+        "closing": "Your relationship manager is available to review your {policy_type} portfolio ahead of {due_date}. {cta}\n\nWith warm regards,\nPriority Services, Suraksha Life Insurance",
+    },
+    ("English", "formal", "Voice"): {
+        "greeting": "Good day, {first_name}. This is Suraksha Life Insurance calling about your {policy_type} policy.",
+        "closing": "Your renewal is due on {due_date}. {cta} Thank you for your time.",
+    },
+    ("English", "friendly", "Voice"): {
+        "greeting": "Hello {first_name}! This is Suraksha Life calling about your {policy_type} policy.",
+        "closing": "Just a reminder that it's due on {due_date}. {cta} Thanks, and have a great day!",
+    },
+    ("Hindi", "formal", "*"): {
+        "greeting": "आदरणीय {first_name} जी, नमस्कार।",
+        "closing": "आपकी {policy_type} पॉलिसी की नवीनीकरण तिथि {due_date} है। {cta}\n\nसादर,\nसुरक्षा लाइफ इंश्योरेंस",
+    },
+    ("Hindi", "friendly", "*"): {
+        "greeting": "नमस्ते {first_name} जी! 🙏",
+        "closing": "{due_date} तक अपनी {policy_type} पॉलिसी रिन्यू करें और सुरक्षित रहें। {cta}\n\nधन्यवाद,\nटीम सुरक्षा लाइफ",
+    },
+    ("Hindi", "empathetic", "*"): {
+        "greeting": "{first_name} जी, आशा है आप और आपका परिवार कुशल हैं।",
+        "closing": "आपकी {policy_type} पॉलिसी के लिए हम हर तरह से मदद को तैयार हैं — {due_date} तक का समय है। {cta}\n\nशुभकामनाओं सहित,\nसुरक्षा लाइफ इंश्योरेंस",
+    },
+}
+
+TEMPLATE_SYSTEM_PROMPT = """
+You are the RenewAI Template Writer for Suraksha Life Insurance.
+Write a reusable greeting and closing for renewal messages in the given language, tone and channel.
+Use these placeholders literally, with curly braces: {first_name}, {policy_type}, {due_date}, {cta}.
+The greeting must contain {first_name}. The closing must contain {cta} and a warm sign-off.
+Be culturally appropriate (e.g. "जी" in Hindi). Do NOT add any AI disclosure line.
+For Voice, write for speech (no emojis or links).
+
+Respond ONLY with valid JSON:
+{"greeting": "...", "closing": "..."}
+"""
+
+_generated: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+_pending: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+
+def cohort(language: Optional[str], tone: Optional[str], channel: Optional[str]) -> Tuple[str, str, str]:
+    """Normalised template key; unknown tones/channels fall back to friendly/Email."""
+    tone = (tone or "").lower()
+    return ((language or "English").strip().title(), tone if tone in TONES else "friendly",
+            channel if channel in CHANNELS else "Email")
+
+
+def _fields(template: str) -> set:
+    return {field for _, field, _, _ in Formatter().parse(template) if field is not None}
+
+
+def valid_variant(variant: dict) -> bool:
+    try:
+        greeting, closing = variant["greeting"], variant["closing"]
+        return (isinstance(greeting, str) and isinstance(closing, str)
+                and _fields(greeting) <= SLOTS and _fields(closing) <= SLOTS
+                and "first_name" in _fields(greeting) and "cta" in _fields(closing))
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def library_variant(key: Tuple[str, str, str]) -> Optional[Dict[str, str]]:
+    language, tone, channel = key
+    return LIBRARY.get(key) or LIBRARY.get((language, tone, "*"))
+
+
+async def _load_or_generate(key: Tuple[str, str, str]) -> Dict[str, str]:
+    language, tone, channel = key
+    async with read_db() as db:
+        rows = await db.execute_fetchall(
+            "SELECT greeting, closing FROM message_templates WHERE language=? AND tone=? AND channel=?", key
+        )
+    if rows:
+        return {"greeting": rows[0][0], "closing": rows[0][1]}
+
+    metrics.incr("templates.generated")
+    variant = await call_llm_json(
+        TEMPLATE_SYSTEM_PROMPT, f"Language: {language}\nTone: {tone}\nChannel: {channel}"
+    )
+    if not valid_variant(variant):
+        logger.warning(f"[TEMPLATES] Generated variant for {key} rejected: {variant}")
+        # Kept in-process only, so a restart tries the generation again
+        return library_variant(("English", tone, channel))
+    async with write_db() as db:
+        # Another worker may have stored one first; everyone uses the stored variant
+        await db.execute(
+            "INSERT OR IGNORE INTO message_templates (language, tone, channel, greeting, closing) VALUES (?, ?, ?, ?, ?)",
+            (language, tone, channel, variant["greeting"], variant["closing"])
+        )
+        rows = await db.execute_fetchall(
+            "SELECT greeting, closing FROM message_templates WHERE language=? AND tone=? AND channel=?", key
+        )
+    logger.info(f"[TEMPLATES] New variant stored for {key}")
+    return {"greeting": rows[0][0], "closing": rows[0][1]}
+
+
+async def get_variant(language: Optional[str], tone: Optional[str], channel: Optional[str]) -> Dict[str, str]:
+    """Greeting + closing templates for a cohort; generates (once) if none exists."""
+    key = cohort(language, tone, channel)
+    variant = library_variant(key) or _generated.get(key)
+    if variant:
+        metrics.incr("templates.hit")
+        return variant
+    metrics.incr("templates.miss")
+    if key not in _pending:
+        _pending[key] = asyncio.ensure_future(_load_or_generate(key))
+    try:
+        variant = await asyncio.shield(_pending[key])
+    finally:
+        if _pending.get(key) is not None and _pending[key].done():
+            _pending.pop(key, None)
+    _generated[key] = variant
+    return variant
+
+
+def render(template: str, first_name: str, policy_type: str, due_date: str, cta: str) -> str:
+    return template.format(first_name=first_name, policy_type=policy_type, due_date=due_date, cta=cta).strip()
+
+
+def render_closing(template: str, **slots) -> str:
+    """Closing with the mandatory disclosure appended verbatim."""
+    return f"{render(template, **slots)}\n\n{DISCLOSURE}"
+
+
+def cta_text(language: str, cta_type: Optional[str]) -> str:
+    texts = CTA_TEXT.get(language, CTA_TEXT["English"])
+    return texts.get(cta_type or "payment_link", texts["payment_link"])
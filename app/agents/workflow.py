@@ -1,10 +1,24 @@
 """
 LangGraph Workflow Definition
 Connects all agents in the correct sequence.
+With SPECULATIVE_PLANNING, Critique A and the Planner run as one node (app.agents.speculative).
+
+Graph variants, picked per run at trigger time (GRAPH_VARIANTS):
+  full    — orchestrator picks the channel, Critique A verifies it
+  express — channel given by the operator (override_channel): no orchestrator, no Critique A
+  reply   — answer on the channel the customer last replied on: no orchestrator, no Critique A
+  lite    — low-risk first reminders: channel, verification and plan in one call (app.agents.lite)
+express and reply start at fixed_channel, which still applies the payment/escalation rules.
+"auto" (the trigger default) is resolved per run by the runner: lite when eligible, else full.
+
+Every variant ends in channel_router (app.agents.send_scheduler.send_window_node): a
+WhatsApp/Voice message approved outside its reg_008 window is held there and the run
+ends as SCHEDULED instead of reaching the channel agent.
 """
 from langgraph.graph import StateGraph, END
 from app.agents.state import RenewalState
-from app.agents.orchestrator import orchestrator_node
+from app.core.config import get_settings
+from app.agents.orchestrator import fixed_channel_node, orchestrator_node
 from app.agents.critique_a import critique_a_node
 from app.agents.planner import planner_node
 from app.agents.greeting_closing import greeting_closing_node
@@ -14,6 +28,13 @@ from app.agents.escalation import escalation_node
 from app.agents.channels.email_agent import email_send_node
 from app.agents.channels.whatsapp_agent import whatsapp_send_node
 from app.agents.channels.voice_agent import voice_send_node
+from app.agents.speculative import critique_and_plan_node
+from app.agents.lite import lite_plan_node
+from app.agents.send_scheduler import send_window_node
+
+settings = get_settings()
+
+GRAPH_VARIANTS = ("full", "express", "reply", "lite")
 
 
 def route_after_orchestrator(state: RenewalState) -> str:
@@ -22,9 +43,28 @@ def route_after_orchestrator(state: RenewalState) -> str:
         return "escalation"
     if node == "COMPLETED":
         return END
+    if node == "PLANNER":
+        # Channel decided by a rule — nothing for Critique A to verify
+        return "planner"
     return "critique_a"
 
 
+def route_after_lite(state: RenewalState) -> str:
+    node = state.get("current_node", "")
+    if node == "ESCALATION":
+        return "escalation"
+    if node == "COMPLETED":
+        return END
+    return "draft_and_greeting"
+
+
+def route_after_speculation(state: RenewalState) -> str:
+    # The speculative draft was kept — straight to Critique B
+    if state.get("current_node") == "CRITIQUE_B":
+        return "critique_b"
+    return "draft_and_greeting"
+
+
 def route_after_critique_b(state: RenewalState) -> str:
     node = state.get("current_node", "")
     if node == "ESCALATION":
@@ -33,6 +73,9 @@ def route_after_critique_b(state: RenewalState) -> str:
 
 
 def route_channel(state: RenewalState) -> str:
+    if state.get("current_node") == "SCHEDULED":
+        # Held for the channel's next window — the send scheduler delivers it
+        return END
     channel = state.get("selected_channel", "Email")
     mapping = {
         "Email": "email_send",
@@ -64,32 +107,58 @@ async def parallel_draft_and_greeting(state: RenewalState) -> dict:
     return merged
 
 
-def build_workflow() -> StateGraph:
+def build_workflow(checkpointer=None, variant: str = "full") -> StateGraph:
+    if variant not in GRAPH_VARIANTS:
+        raise ValueError(f"Unknown graph variant {variant!r} (expected one of {', '.join(GRAPH_VARIANTS)})")
     graph = StateGraph(RenewalState)
 
     # Add nodes
-    graph.add_node("orchestrator", orchestrator_node)
-    graph.add_node("critique_a", critique_a_node)
-    graph.add_node("planner", planner_node)
+    if variant == "full":
+        graph.add_node("orchestrator", orchestrator_node)
+        if settings.speculative_planning:
+            graph.add_node("critique_and_plan", critique_and_plan_node)
+        else:
+            graph.add_node("critique_a", critique_a_node)
+    elif variant == "lite":
+        graph.add_node("lite_plan", lite_plan_node)
+    else:
+        graph.add_node("fixed_channel", fixed_channel_node)
+    if variant != "lite":
+        graph.add_node("planner", planner_node)
     graph.add_node("draft_and_greeting", parallel_draft_and_greeting)
     graph.add_node("critique_b", critique_b_node)
     graph.add_node("escalation", escalation_node)
     graph.add_node("email_send", email_send_node)
     graph.add_node("whatsapp_send", whatsapp_send_node)
     graph.add_node("voice_send", voice_send_node)
-    graph.add_node("channel_router", lambda s: s)  # pass-through router
+    graph.add_node("channel_router", send_window_node)  # pass-through, or hold until the reg_008 window
 
     # Entry point
-    graph.set_entry_point("orchestrator")
+    entry = {"full": "orchestrator", "lite": "lite_plan"}.get(variant, "fixed_channel")
+    graph.set_entry_point(entry)
 
     # Edges
-    graph.add_conditional_edges("orchestrator", route_after_orchestrator, {
-        "critique_a": "critique_a",
-        "escalation": "escalation",
-        END: END
-    })
-    graph.add_edge("critique_a", "planner")
-    graph.add_edge("planner", "draft_and_greeting")
+    if variant == "lite":
+        graph.add_conditional_edges("lite_plan", route_after_lite, {
+            "draft_and_greeting": "draft_and_greeting",
+            "escalation": "escalation",
+            END: END
+        })
+    else:
+        graph.add_conditional_edges(entry, route_after_orchestrator, {
+            "critique_a": "critique_and_plan" if settings.speculative_planning else "critique_a",
+            "planner": "planner",
+            "escalation": "escalation",
+            END: END
+        } if variant == "full" else {"planner": "planner", "escalation": "escalation", END: END})
+        graph.add_edge("planner", "draft_and_greeting")
+    if variant == "full" and settings.speculative_planning:
+        graph.add_conditional_edges("critique_and_plan", route_after_speculation, {
+            "draft_and_greeting": "draft_and_greeting",
+            "critique_b": "critique_b"
+        })
+    elif variant == "full":
+        graph.add_edge("critique_a", "planner")
     graph.add_edge("draft_and_greeting", "critique_b")
     graph.add_conditional_edges("critique_b", route_after_critique_b, {
         "escalation": "escalation",
@@ -98,22 +167,27 @@ def build_workflow() -> StateGraph:
     graph.add_conditional_edges("channel_router", route_channel, {
         "email_send": "email_send",
         "whatsapp_send": "whatsapp_send",
-        "voice_send": "voice_send"
+        "voice_send": "voice_send",
+        END: END
     })
     graph.add_edge("email_send", END)
     graph.add_edge("whatsapp_send", END)
     graph.add_edge("voice_send", END)
     graph.add_edge("escalation", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
-# Singleton workflow instance
-_workflow = None
+# Compiled graphs, one per (variant, checkpointed)
+_workflows = {}
 
 
-def get_workflow():
-    global _workflow
-    if _workflow is None:
-        _workflow = build_workflow()
-    return _workflow
+def get_workflow(checkpointed: bool = False, variant: str = "full"):
+    key = (variant, checkpointed)
+    if key not in _workflows:
+        if checkpointed:
+            from app.db.checkpoints import checkpointer
+            _workflows[key] = build_workflow(checkpointer, variant)
+        else:
+            _workflows[key] = build_workflow(variant=variant)
+    return _workflows[key]
@@ -3,9 +3,9 @@ Auth API — JWT login with email as primary key.
 """
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
-import aiosqlite
 from app.core.security import hash_password, verify_password, create_access_token
 from app.core.config import get_settings
+from app.db.pool import read_db, write_db
 from app.utils.logger import logger
 
 settings = get_settings()
@@ -34,7 +34,7 @@ class TokenResponse(BaseModel):
 @router.post("/register", summary="Register (Password-less setup)")
 async def register(req: RegisterRequest):
     try:
-        async with aiosqlite.connect(settings.sqlite_db_path) as db:
+        async with write_db() as db:
             cursor = await db.execute("SELECT email FROM users WHERE email=?", (req.email,))
             existing = await cursor.fetchone()
             if existing:
@@ -47,7 +47,6 @@ async def register(req: RegisterRequest):
                 "INSERT INTO users (email, name, hashed_password, role) VALUES (?, ?, ?, ?)",
                 (req.email, req.name, dummy_hash, req.role)
             )
-            await db.commit()
         return {"message": "User registered successfully", "email": req.email}
     except Exception as e:
         logger.error(f"❌ Registration error: {str(e)}", exc_info=True)
@@ -58,8 +57,7 @@ async def register(req: RegisterRequest):
 
 @router.post("/login", response_model=TokenResponse, summary="Login (Password-less for now)")
 async def login(req: LoginRequest):
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
-        db.row_factory = aiosqlite.Row
+    async with read_db() as db:
         cursor = await db.execute(
             "SELECT email, name, role FROM users WHERE email=?", (req.email,)
         )
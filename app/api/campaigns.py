@@ -0,0 +1,64 @@
+"""
+Campaigns API — bulk renewal runs over every policy due in a window.
+"""
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from app.core.security import get_current_user
+from app.db.campaigns import CAMPAIGN_STATUSES, create_campaign, get_campaign, list_campaigns, set_campaign_state
+
+router = APIRouter(prefix="/campaigns", tags=["Campaigns"])
+
+
+class CreateCampaignRequest(BaseModel):
+    due_from: Optional[date] = None
+    due_to: Optional[date] = None
+    segment: Optional[str] = None
+    status: Optional[str] = None  # policy status, e.g. ACTIVE (paid/lapsed policies are always excluded)
+    max_concurrent: Optional[int] = Field(None, ge=1, le=10000)  # default CAMPAIGN_MAX_CONCURRENT
+    name: Optional[str] = None
+
+
+@router.post("", summary="Start a renewal campaign for all matching policies")
+async def start_campaign(req: CreateCampaignRequest, current_user: str = Depends(get_current_user)):
+    if req.due_from and req.due_to and req.due_from > req.due_to:
+        raise HTTPException(status_code=400, detail="due_from must be on or before due_to")
+    return await create_campaign(
+        req.due_from.isoformat() if req.due_from else None,
+        req.due_to.isoformat() if req.due_to else None,
+        req.segment, req.status, req.max_concurrent, req.name, current_user
+    )
+
+
+@router.get("", summary="List campaigns, newest first")
+async def get_campaigns(
+    status: Optional[str] = Query(None, description=" | ".join(CAMPAIGN_STATUSES)),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: str = Depends(get_current_user)
+):
+    campaigns = await list_campaigns(status, limit)
+    return {"campaigns": campaigns, "count": len(campaigns)}
+
+
+@router.get("/{campaign_id}", summary="Campaign details and progress counters")
+async def get_campaign_progress(campaign_id: str, current_user: str = Depends(get_current_user)):
+    campaign = await get_campaign(campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
+    return campaign
+
+
+@router.post("/{campaign_id}/{action}", summary="Pause, resume or cancel a campaign")
+async def change_campaign_state(
+    campaign_id: str,
+    action: Literal["pause", "resume", "cancel"],
+    current_user: str = Depends(get_current_user)
+):
+    try:
+        campaign = await set_campaign_state(campaign_id, action)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not campaign:
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
+    return campaign
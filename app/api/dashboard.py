@@ -1,66 +1,91 @@
 """
 Dashboard API — metrics, escalations, audit logs.
 """
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from app.core.security import get_current_user
 from app.core.config import get_settings
-import aiosqlite
+from app.db.pool import write_db
+from app.db.counters import get_overview_counters, run_reconciliation
+from app.db.audit_export import date_bounds, export_slots, stream_export
+from app.db.context_cache import invalidate_policy
+from app.db.archive import fetch_page_with_archive, stream_ndjson_with_archive, run_retention, list_segments
+from app.db.pagination import (
+    Keyset, InvalidCursor, decode_cursor, fetch_page, stream_ndjson, NDJSON_MEDIA_TYPE
+)
 
 settings = get_settings()
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Stable sort orders for keyset pagination (last key is unique)
+POLICIES_ORDER = Keyset([
+    ("p.premium_due_date", "premium_due_date", False), ("p.policy_id", "policy_id", False)
+])
+CUSTOMERS_ORDER = Keyset([("c.customer_id", "customer_id", False)])
+ESCALATIONS_ORDER = Keyset([
+    ("ec.priority_score", "priority_score", True),
+    ("ec.created_at", "created_at", False),
+    ("ec.case_id", "case_id", False)
+])
+AUDIT_ORDER = Keyset([("created_at", "created_at", True), ("id", "id", True)])
+
+
+async def list_response(key: str, sql: str, where: list, params: list, keyset: Keyset,
+                        cursor: Optional[str], limit: int, format: str, **extra):
+    """JSON page ({key: rows, count, next_cursor}) or, with format=ndjson, every row streamed."""
+    try:
+        if format == "ndjson":
+            if cursor:
+                decode_cursor(cursor, len(keyset.keys))
+            return StreamingResponse(
+                stream_ndjson(sql, where, params, keyset, cursor), media_type=NDJSON_MEDIA_TYPE
+            )
+        rows, next_cursor = await fetch_page(sql, where, params, keyset, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**extra, key: rows, "count": len(rows), "next_cursor": next_cursor}
+
 
 @router.get("/overview", summary="Get renewal operations overview")
 async def get_overview(current_user: str = Depends(get_current_user)):
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
-        db.row_factory = aiosqlite.Row
-        
-        total = await (await db.execute("SELECT COUNT(*) as c FROM policies")).fetchone()
-        active = await (await db.execute("SELECT COUNT(*) as c FROM policies WHERE status='ACTIVE'")).fetchone()
-        ai_mode = await (await db.execute("SELECT COUNT(*) as c FROM policy_state WHERE mode='AI'")).fetchone()
-        human_mode = await (await db.execute("SELECT COUNT(*) as c FROM policy_state WHERE mode='HUMAN_CONTROL'")).fetchone()
-        distress = await (await db.execute("SELECT COUNT(*) as c FROM policy_state WHERE distress_flag=1")).fetchone()
-        open_esc = await (await db.execute("SELECT COUNT(*) as c FROM escalation_cases WHERE status='OPEN'")).fetchone()
-        
-        channel_dist = await (await db.execute("""
-            SELECT last_channel, COUNT(*) as count FROM policy_state 
-            WHERE last_channel IS NOT NULL GROUP BY last_channel
-        """)).fetchall()
-        
-        recent_actions = await (await db.execute("""
-            SELECT action_type, COUNT(*) as count FROM audit_logs 
-            WHERE created_at >= datetime('now', '-24 hours') GROUP BY action_type
-        """)).fetchall()
-    
-    return {
-        "total_policies": total["c"],
-        "active_policies": active["c"],
-        "ai_managed": ai_mode["c"],
-        "human_managed": human_mode["c"],
-        "distress_cases": distress["c"],
-        "open_escalations": open_esc["c"],
-        "channel_distribution": [dict(r) for r in channel_dist],
-        "last_24h_actions": [dict(r) for r in recent_actions]
-    }
+    # O(1): trigger-maintained counters instead of full-table COUNTs
+    return await get_overview_counters()
+
+
+@router.post("/counters/reconcile", summary="Recompute dashboard counters and correct drift")
+async def reconcile_dashboard_counters(current_user: str = Depends(get_current_user)):
+    drift = await run_reconciliation()
+    return {"status": "reconciled", "drifted": drift, "drift_count": len(drift)}
+
+
+@router.post("/retention/run", summary="Archive aged log rows into monthly cold segments")
+async def run_log_retention(
+    hot_days: Optional[int] = Query(None, ge=1, description="Defaults to RETENTION_HOT_DAYS"),
+    current_user: str = Depends(get_current_user)
+):
+    moved = await run_retention(hot_days)
+    return {"status": "archived", "moved": moved, "segments": [month for month, _ in list_segments()]}
 
 
 @router.get("/escalations", summary="List all open escalation cases")
 async def get_escalations(
     status: str = "OPEN",
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     current_user: str = Depends(get_current_user)
 ):
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
+    return await list_response(
+        "escalations",
+        """
             SELECT ec.*, c.name as customer_name, p.policy_type, p.annual_premium
             FROM escalation_cases ec
             JOIN policies p ON ec.policy_id = p.policy_id
             JOIN customers c ON p.customer_id = c.customer_id
-            WHERE ec.status = ?
-            ORDER BY ec.priority_score DESC, ec.created_at ASC
-        """, (status,))
-        cases = await cursor.fetchall()
-    return {"escalations": [dict(c) for c in cases], "count": len(cases)}
+        """,
+        ["ec.status = ?"], [status], ESCALATIONS_ORDER, cursor, limit, format
+    )
 
 
 @router.patch("/escalations/{case_id}/resolve", summary="Resolve an escalation case")
@@ -68,7 +93,7 @@ async def resolve_escalation(
     case_id: int,
     current_user: str = Depends(get_current_user)
 ):
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
+    async with write_db() as db:
         await db.execute(
             "UPDATE escalation_cases SET status='RESOLVED' WHERE case_id=?", (case_id,)
         )
@@ -80,55 +105,115 @@ async def resolve_escalation(
                 "UPDATE policy_state SET mode='AI', distress_flag=0, current_node='ORCHESTRATOR' WHERE policy_id=?",
                 (row[0],)
             )
-        await db.commit()
+    if row:
+        invalidate_policy(row[0])
     return {"message": f"Case {case_id} resolved", "status": "RESOLVED"}
 
 
 @router.get("/audit-logs/{policy_id}", summary="Get IRDAI-ready audit trail for a policy")
 async def get_audit_logs(
     policy_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    include_archive: bool = Query(True, description="Continue into archived months after the hot rows"),
     current_user: str = Depends(get_current_user)
 ):
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            "SELECT * FROM audit_logs WHERE policy_id=? ORDER BY created_at DESC",
-            (policy_id,)
+    sql, where, params = "SELECT * FROM audit_logs", ["policy_id = ?"], [policy_id]
+    if not include_archive:
+        return await list_response(
+            "audit_logs", sql, where, params, AUDIT_ORDER, cursor, limit, format, policy_id=policy_id
         )
-        logs = await cursor.fetchall()
-    return {"policy_id": policy_id, "audit_logs": [dict(l) for l in logs], "count": len(logs)}
+    try:
+        if cursor:
+            decode_cursor(cursor, len(AUDIT_ORDER.keys))
+        if format == "ndjson":
+            return StreamingResponse(
+                stream_ndjson_with_archive("audit_logs", sql, where, params, AUDIT_ORDER, cursor),
+                media_type=NDJSON_MEDIA_TYPE
+            )
+        logs, next_cursor = await fetch_page_with_archive(
+            "audit_logs", sql, where, params, AUDIT_ORDER, cursor, limit
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"policy_id": policy_id, "audit_logs": logs, "count": len(logs), "next_cursor": next_cursor}
+
+
+@router.get("/audit-export", summary="Bulk IRDAI audit export for a date range (streamed)")
+async def export_audit(
+    date_from: str = Query(..., description="YYYY-MM-DD (inclusive)"),
+    date_to: str = Query(..., description="YYYY-MM-DD (inclusive)"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    after_policy_id: str = Query("", description="Resume after this policy_id (last one fully received)"),
+    current_user: str = Depends(get_current_user)
+):
+    # Parquet needs a seekable file — use scripts/export_audit.py for it
+    try:
+        date_bounds(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if export_slots().locked():
+        raise HTTPException(status_code=429, detail="An audit export is already running, retry later")
+
+    filename = f"audit_{date_from}_{date_to}." + ("csv" if format == "csv" else "ndjson.gz")
+    return StreamingResponse(
+        stream_export(date_from, date_to, format, after_policy_id),
+        media_type="text/csv" if format == "csv" else "application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/customers", summary="List all customers with policy summary")
 async def list_customers(
     segment: str = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     current_user: str = Depends(get_current_user)
 ):
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
-        db.row_factory = aiosqlite.Row
-        if segment:
-            cursor = await db.execute("""
-                SELECT c.*, COUNT(p.policy_id) as policy_count 
-                FROM customers c LEFT JOIN policies p ON c.customer_id=p.customer_id
-                WHERE c.segment=? GROUP BY c.customer_id
-            """, (segment,))
-        else:
-            cursor = await db.execute("""
-                SELECT c.*, COUNT(p.policy_id) as policy_count 
-                FROM customers c LEFT JOIN policies p ON c.customer_id=p.customer_id
-                GROUP BY c.customer_id
-            """)
-        customers = await cursor.fetchall()
-    return {"customers": [dict(c) for c in customers], "count": len(customers)}
+    # Correlated count instead of GROUP BY so each page only touches its own customers
+    where, params = [], []
+    if segment:
+        where.append("c.segment = ?")
+        params.append(segment)
+    return await list_response(
+        "customers",
+        """
+            SELECT c.*, (SELECT COUNT(*) FROM policies p WHERE p.customer_id = c.customer_id) as policy_count
+            FROM customers c
+        """,
+        where, params, CUSTOMERS_ORDER, cursor, limit, format
+    )
+
+
 @router.get("/policies", summary="List all policies with customer names")
-async def list_policies(current_user: str = Depends(get_current_user)):
-    async with aiosqlite.connect(settings.sqlite_db_path) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
+async def list_policies(
+    segment: Optional[str] = None,
+    status: Optional[str] = None,
+    due_from: Optional[str] = Query(None, description="Premium due date >= (YYYY-MM-DD)"),
+    due_to: Optional[str] = Query(None, description="Premium due date <= (YYYY-MM-DD)"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: str = Depends(get_current_user)
+):
+    where, params = [], []
+    for clause, value in (
+        ("c.segment = ?", segment),
+        ("p.status = ?", status),
+        ("p.premium_due_date >= ?", due_from),
+        ("p.premium_due_date <= ?", due_to),
+    ):
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    return await list_response(
+        "policies",
+        """
             SELECT p.*, c.name as customer_name, c.segment
             FROM policies p
             JOIN customers c ON p.customer_id = c.customer_id
-            ORDER BY p.premium_due_date ASC
-        """)
-        policies = await cursor.fetchall()
-    return {"policies": [dict(p) for p in policies], "count": len(policies)}
+        """,
+        where, params, POLICIES_ORDER, cursor, limit, format
+    )
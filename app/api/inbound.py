@@ -0,0 +1,135 @@
+"""
+Inbound event pipeline — customer replies and delivery/read receipts from channel providers.
+Shared by POST /renewal/webhook/inbound (one event) and /renewal/webhook/inbound/batch
+(provider bursts): validate each event, classify the whole batch in one pass, write
+everything in a single transaction with executemany, return a result per event.
+"""
+import re
+from collections import Counter
+from typing import List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError, model_validator
+
+from app.db.context_cache import invalidate_policy
+from app.db.pool import read_db, write_db
+
+DISTRESS_KEYWORDS = ["lost job", "husband passed", "death", "can't pay", "hardship", "hospital"]
+OBJECTION_KEYWORDS = ["not interested", "too expensive", "cancel", "can't afford", "later"]
+
+# One alternation per class, compiled once, instead of a substring scan per keyword per message
+DISTRESS_RE = re.compile("|".join(map(re.escape, DISTRESS_KEYWORDS)))
+OBJECTION_RE = re.compile("|".join(map(re.escape, OBJECTION_KEYWORDS)))
+
+RECEIPT_ACTIONS = {"delivered": "MESSAGE_DELIVERED", "read": "MESSAGE_READ"}
+
+
+class InboundEvent(BaseModel):
+    policy_id: str
+    channel: str  # Email/WhatsApp/Voice
+    event_type: Literal["reply", "delivered", "read"] = "reply"
+    content: str = ""
+    customer_id: Optional[str] = None
+    event_id: Optional[str] = None  # provider message id, echoed back in the result
+
+    @model_validator(mode="after")
+    def check_event(self):
+        if not self.policy_id.strip() or not self.channel.strip():
+            raise ValueError("policy_id and channel are required")
+        if self.event_type == "reply" and not self.content.strip():
+            raise ValueError("reply events need content")
+        return self
+
+
+def parse_events(raw_events: List[dict]) -> Tuple[List[Tuple[int, InboundEvent]], List[dict]]:
+    """Validate each event on its own so one bad event doesn't reject the batch."""
+    valid, rejected = [], []
+    for index, raw in enumerate(raw_events):
+        try:
+            valid.append((index, InboundEvent.model_validate(raw)))
+        except ValidationError as e:
+            rejected.append({
+                "index": index,
+                "event_id": raw.get("event_id") if isinstance(raw, dict) else None,
+                "status": "rejected",
+                "error": "; ".join(err["msg"] for err in e.errors())
+            })
+    return valid, rejected
+
+
+async def _known_policies(policy_ids: List[str]) -> set:
+    known = set()
+    unique = list(set(policy_ids))
+    async with read_db() as db:
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            rows = await db.execute_fetchall(
+                f"SELECT policy_id FROM policies WHERE policy_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            known.update(r[0] for r in rows)
+    return known
+
+
+async def process_inbound_events(events: List[Tuple[int, InboundEvent]]) -> List[dict]:
+    """Classify + persist validated events in one transaction; one result per event, in order."""
+    if not events:
+        return []
+    known = await _known_policies([e.policy_id for _, e in events])
+
+    results, interactions, receipts = [], [], []
+    distressed, objections = {}, Counter()
+    for index, event in events:
+        result = {"index": index, "event_id": event.event_id, "policy_id": event.policy_id,
+                  "event_type": event.event_type, "channel": event.channel}
+        if event.policy_id not in known:
+            results.append({**result, "status": "rejected", "error": "unknown policy_id"})
+            continue
+
+        distress = is_objection = False
+        if event.event_type == "reply":
+            text = event.content.lower()
+            distress = DISTRESS_RE.search(text) is not None
+            is_objection = OBJECTION_RE.search(text) is not None
+            interactions.append((event.policy_id, event.channel, "INBOUND", event.content, -0.5 if distress else 0.0))
+            # Both are reported; distress takes precedence only for the policy_state update
+            if distress:
+                distressed[event.policy_id] = True
+            elif is_objection:
+                objections[event.policy_id] += 1
+        else:
+            receipts.append((
+                event.policy_id, RECEIPT_ACTIONS[event.event_type],
+                f"{event.channel} message {event.event_id or ''}".strip(), f"{event.channel} Provider"
+            ))
+        results.append({**result, "status": "accepted",
+                        "distress_detected": distress, "objection_detected": is_objection})
+
+    async with write_db() as db:
+        if interactions:
+            await db.executemany(
+                "INSERT INTO interactions (policy_id, channel, message_direction, content, sentiment_score) VALUES (?, ?, ?, ?, ?)",
+                interactions
+            )
+        if receipts:
+            await db.executemany(
+                "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
+                receipts
+            )
+        if distressed:
+            # One escalation per policy per batch, however many distress messages it carried
+            await db.executemany(
+                "UPDATE policy_state SET distress_flag=1, mode='HUMAN_CONTROL', updated_at=CURRENT_TIMESTAMP WHERE policy_id=?",
+                [(pid,) for pid in distressed]
+            )
+            await db.executemany(
+                "INSERT INTO escalation_cases (policy_id, escalation_reason, priority_score, status) VALUES (?, ?, ?, ?)",
+                [(pid, "Inbound distress detected", 1.0, "OPEN") for pid in distressed]
+            )
+        if objections:
+            await db.executemany(
+                "UPDATE policy_state SET objection_count=objection_count+?, updated_at=CURRENT_TIMESTAMP WHERE policy_id=?",
+                [(count, pid) for pid, count in objections.items()]
+            )
+
+    for policy_id in {e.policy_id for _, e in events if e.event_type == "reply" and e.policy_id in known}:
+        invalidate_policy(policy_id)
+    return results
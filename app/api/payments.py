@@ -0,0 +1,61 @@
+"""
+Payments API — premium payments from the gateway webhook or a bulk import.
+Both land in the payments ledger (app.db.payments); a policy whose current cycle is
+paid drops out of renewal outreach, and becomes PAID once the whole annual premium is.
+"""
+import hmac
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel, Field
+from app.core.config import get_settings
+from app.core.security import get_current_user
+from app.db.payments import MAX_BATCH, policy_payments, record_payments
+
+settings = get_settings()
+router = APIRouter(prefix="/payments", tags=["Payments"])
+
+
+class PaymentEvent(BaseModel):
+    payment_ref: str = Field(..., min_length=1)  # gateway payment id — duplicates are ignored
+    policy_id: str = Field(..., min_length=1)
+    amount: float = Field(..., gt=0)
+    paid_at: Optional[datetime] = None  # default: when received
+
+
+class PaymentImportRequest(BaseModel):
+    payments: List[PaymentEvent]
+
+
+def _rows(events: List[PaymentEvent]) -> List[dict]:
+    return [{**e.model_dump(), "paid_at": e.paid_at.isoformat(sep=" ") if e.paid_at else None} for e in events]
+
+
+@router.post("/webhook", summary="Payment gateway callback — one captured payment")
+async def payment_webhook(event: PaymentEvent, x_webhook_secret: str = Header("")):
+    # Fails closed: without a configured secret anyone could mark policies paid
+    if not settings.payment_webhook_secret:
+        raise HTTPException(status_code=503, detail="Payment webhook disabled — PAYMENT_WEBHOOK_SECRET is not set")
+    if not hmac.compare_digest(x_webhook_secret.encode(), settings.payment_webhook_secret.encode()):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+    summary = await record_payments(_rows([event]), source="webhook")
+    if summary["unknown_policy_refs"]:
+        raise HTTPException(status_code=404, detail=f"Policy {event.policy_id} not found")
+    return {
+        "status": "recorded" if summary["recorded"] else "duplicate",
+        "payment_ref": event.payment_ref,
+        "policy_id": event.policy_id,
+        "cycle_paid": event.policy_id in summary["cycle_paid_policies"]
+    }
+
+
+@router.post("/import", summary="Bulk import of reconciled payments")
+async def import_payments(req: PaymentImportRequest, current_user: str = Depends(get_current_user)):
+    if len(req.payments) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Import exceeds {MAX_BATCH} payments — split it")
+    return await record_payments(_rows(req.payments), source=f"import:{current_user}")
+
+
+@router.get("/{policy_id}", summary="Payments recorded for a policy")
+async def get_policy_payments(policy_id: str, current_user: str = Depends(get_current_user)):
+    return {"policy_id": policy_id, "payments": await policy_payments(policy_id)}
@@ -11,12 +11,67 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 1440
     sqlite_db_path: str = os.path.abspath("./data/renewai.db")
+    db_pool_readers: int = 4
+    db_busy_timeout_ms: int = 5000
+    db_cache_size_kb: int = 65536
+    db_mmap_size: int = 268435456
+    db_maintenance_interval_s: int = 300
+    write_behind_batch_size: int = 200
+    write_behind_flush_ms: int = 50
+    write_behind_durability: str = "group_commit"  # buffered | group_commit | immediate
+    workflow_log_durability: str = "buffered"  # workflow_logs only; send records are always immediate
+    counters_reconcile_interval_s: int = 3600
+    audit_export_chunk_policies: int = 200
+    audit_export_pause_ms: int = 20
+    audit_export_max_concurrent: int = 1
+    archive_dir: str = os.path.abspath("./data/archive")
+    retention_hot_days: int = 180
+    retention_interval_s: int = 86400
+    retention_batch_size: int = 500
+    context_cache_size: int = 10000
+    context_cache_sync_ms: int = 250
+    inbound_batch_max_events: int = 5000
+    worker_concurrency: int = 4
+    worker_poll_ms: int = 1000
+    worker_processes: int = 1  # >1 shards policies across processes (python -m app.worker)
+    worker_metrics_interval_s: int = 30
+    log_workflow_chunks: bool = False
+    api_embedded_workers: int = 0  # >0 runs a worker inside the API process (dev only)
+    job_lease_s: int = 120
+    job_max_attempts: int = 3
+    job_backoff_base_s: int = 30
+    job_backoff_max_s: int = 1800
+    job_retention_days: int = 14
+    campaign_max_concurrent: int = 100
+    policy_lease_s: int = 600  # per-policy run lease; renewed after every workflow node
+    workflow_checkpoints: bool = True  # queued runs resume after the last finished node
+    rules_fast_path: bool = True  # clear-cut channel decisions skip the orchestrator + Critique A LLMs
+    channel_bandit: bool = True  # learned channel proposal; the orchestrator LLM only when it's unsure
+    bandit_confidence: float = 0.8
+    bandit_reward_window_h: int = 72
+    bandit_train_interval_s: int = 300
+    bandit_refresh_s: int = 60
+    speculative_planning: bool = True  # plan while Critique A verifies the channel
+    speculative_draft: bool = False  # ...and draft too (wasted LLM calls on an override)
+    compliance_precheck: bool = True  # mechanical checks before the Critique B LLM, targeted revisions
+    compliance_max_revisions: int = 2
+    compliance_revision_budget_s: float = 20.0
+    lite_pipeline: bool = True  # low-risk first reminders: Steps 1-3 in one LLM call
+    lite_max_premium: int = 25000
+    greeting_templates: bool = True  # greeting/closing from templates; the LLM only writes missing variants
+    payment_webhook_secret: str = ""  # X-Webhook-Secret expected on /payments/webhook (empty = endpoint disabled, 503)
+    contact_eligibility: bool = True  # reg_008 contact quota + quiet hours before any LLM work
+    contact_timezone: str = "Asia/Kolkata"  # customers' local time for the contact windows
+    send_release_rate: float = 5.0  # held messages released per second, per worker process
+    send_release_batch: int = 50  # most held messages claimed per poll
 
     chroma_db_path: str = "./data/chroma_db"
     app_host: str = "0.0.0.0"
     app_port: int = 8000
     debug: bool = True
     embedding_model: str = "models/text-embedding-004"
+    embedding_provider: str = "gemini"  # gemini | local (offline hashing embedder)
+    local_embedding_dim: int = 384
     chroma_telemetry_gather: bool = False
 
     class Config:
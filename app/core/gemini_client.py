@@ -7,6 +7,7 @@ import json
 import re
 from typing import Optional
 from app.core.config import get_settings
+from app.utils.metrics import track_usage
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -45,6 +46,12 @@ async def call_llm(
             )
         )
     )
+    usage = getattr(response, "usage_metadata", None)
+    track_usage(
+        calls=1,
+        tokens_in=getattr(usage, "prompt_token_count", 0) or 0,
+        tokens_out=getattr(usage, "candidates_token_count", 0) or 0,
+    )
     text = response.text.strip()
     
     if expect_json:
@@ -0,0 +1,249 @@
+"""
+Tiered retention — cold archival of interactions, audit_logs and workflow_logs.
+
+Rows older than RETENTION_HOT_DAYS move out of the hot DB into monthly segment files
+(ARCHIVE_DIR/renewai_YYYY-MM.db) with the same tables and indexes; the bulky text column
+of each table is stored zlib-compressed. The hot DB keeps only recent rows, so
+policy_id lookups stay in page cache and backups stay small.
+
+Archival is copy-then-delete in batches: a batch is committed to its segment
+(INSERT OR IGNORE on the original id) before it is deleted from the hot DB, so a
+crash between the two only means the batch is copied again on the next run.
+
+Reads fall back transparently: fetch_page_with_archive() continues a keyset page
+into the segments once the hot rows run out, archived_rows() serves a whole
+per-policy history, and the audit export walks segments alongside the hot DB.
+"""
+import asyncio
+import glob
+import json
+import os
+import re
+import zlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiosqlite
+
+from app.core.config import get_settings
+from app.db.pagination import STREAM_PAGE_SIZE, Keyset, page_rows
+from app.db.pool import read_db, write_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+ARCHIVE_TABLES: Dict[str, Tuple[str, ...]] = {
+    "interactions": ("id", "policy_id", "channel", "message_direction", "content", "sentiment_score", "created_at"),
+    "audit_logs": ("id", "policy_id", "action_type", "action_reason", "triggered_by", "created_at"),
+    "workflow_logs": ("id", "policy_id", "node_name", "content", "created_at"),
+}
+
+# Column stored compressed in segments (the one that carries message bodies / reasoning)
+COMPRESSED_COLUMN = {"interactions": "content", "audit_logs": "action_reason", "workflow_logs": "content"}
+
+# Same table and index names as the hot DB, so the same SQL runs against a segment
+SEGMENT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS interactions (
+        id INTEGER PRIMARY KEY, policy_id TEXT, channel TEXT, message_direction TEXT,
+        content BLOB, sentiment_score REAL, created_at TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_interactions_policy_created ON interactions(policy_id, created_at);
+
+    CREATE TABLE IF NOT EXISTS audit_logs (
+        id INTEGER PRIMARY KEY, policy_id TEXT, action_type TEXT, action_reason BLOB,
+        triggered_by TEXT, created_at TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_audit_policy_created ON audit_logs(policy_id, created_at);
+
+    CREATE TABLE IF NOT EXISTS workflow_logs (
+        id INTEGER PRIMARY KEY, policy_id TEXT, node_name TEXT, content BLOB, created_at TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_workflow_logs_policy_created ON workflow_logs(policy_id, created_at);
+"""
+
+SEGMENT_NAME = re.compile(r"renewai_(\d{4}-\d{2})\.db$")
+
+
+def segment_path(month: str) -> str:
+    return os.path.join(settings.archive_dir, f"renewai_{month}.db")
+
+
+def list_segments(month_from: Optional[str] = None, month_to: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(YYYY-MM, path) of existing segments, oldest first, optionally bounded (inclusive)."""
+    segments = []
+    for path in glob.glob(os.path.join(settings.archive_dir, "renewai_*.db")):
+        match = SEGMENT_NAME.search(path)
+        if not match:
+            continue
+        month = match.group(1)
+        if (month_from and month < month_from) or (month_to and month > month_to):
+            continue
+        segments.append((month, path))
+    return sorted(segments)
+
+
+@asynccontextmanager
+async def open_segment(path: str, create: bool = False):
+    if create:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = aiosqlite.connect(path)
+    else:
+        db = aiosqlite.connect(f"file:{path}?mode=ro", uri=True)
+    db.daemon = True
+    await db
+    db.row_factory = aiosqlite.Row
+    try:
+        if create:
+            await db.executescript(SEGMENT_SCHEMA)
+        yield db
+    finally:
+        await db.close()
+
+
+def compress_value(value):
+    if value is None:
+        return None
+    return zlib.compress(str(value).encode("utf-8"), 6)
+
+
+def decode_row(table: str, row: dict) -> dict:
+    """Undo segment compression in place (no-op for hot rows)."""
+    column = COMPRESSED_COLUMN.get(table)
+    if column and isinstance(row.get(column), bytes):
+        row[column] = zlib.decompress(row[column]).decode("utf-8")
+    return row
+
+
+# ── Archival ──────────────────────────────────────────────────────────────────
+
+async def archive_table(table: str, cutoff: str, batch_size: int) -> int:
+    """Move every `table` row with created_at < cutoff into its monthly segment."""
+    columns = ARCHIVE_TABLES[table]
+    compressed = columns.index(COMPRESSED_COLUMN[table])
+    insert_sql = (
+        f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})"
+    )
+    moved = 0
+    while True:
+        async with read_db() as db:
+            rows = await db.execute_fetchall(
+                # rowid order: no created_at index needed on the hot write path
+                f"SELECT {', '.join(columns)} FROM {table} WHERE created_at < ? ORDER BY id LIMIT ?",
+                (cutoff, batch_size)
+            )
+        if not rows:
+            return moved
+
+        by_month: Dict[str, List[tuple]] = {}
+        for row in rows:
+            values = list(row)
+            values[compressed] = compress_value(values[compressed])
+            by_month.setdefault(row["created_at"][:7], []).append(tuple(values))
+
+        for month, batch in by_month.items():
+            async with open_segment(segment_path(month), create=True) as segment:
+                await segment.executemany(insert_sql, batch)
+                await segment.commit()
+
+        ids = [row["id"] for row in rows]
+        async with write_db() as db:
+            await db.execute(f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        moved += len(rows)
+
+
+async def run_retention(hot_days: Optional[int] = None, batch_size: Optional[int] = None,
+                        vacuum: bool = False) -> Dict[str, int]:
+    """Archive everything older than hot_days (RETENTION_HOT_DAYS) from the three log tables."""
+    hot_days = settings.retention_hot_days if hot_days is None else hot_days
+    if hot_days <= 0:
+        raise ValueError("Retention needs a positive hot window (RETENTION_HOT_DAYS)")
+    batch_size = batch_size or settings.retention_batch_size
+    cutoff = (datetime.utcnow() - timedelta(days=hot_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+    moved = {}
+    for table in ARCHIVE_TABLES:
+        moved[table] = await archive_table(table, cutoff, batch_size)
+    logger.info(f"[RETENTION] Archived rows older than {cutoff}: {moved}")
+
+    if vacuum and any(moved.values()):
+        # Reclaims file space; blocks writers for the duration, so only on request (CLI)
+        async with write_db() as db:
+            await db.commit()
+            await db.execute_fetchall("VACUUM")
+    return moved
+
+
+async def retention_loop():
+    """Background job: archive aged rows every RETENTION_INTERVAL_S."""
+    while True:
+        await asyncio.sleep(settings.retention_interval_s)
+        try:
+            await run_retention()
+        except Exception as e:
+            logger.error(f"[RETENTION] Archival failed: {e}")
+
+
+# ── Reads with archive fallback ───────────────────────────────────────────────
+
+async def fetch_page_with_archive(
+    table: str,
+    sql: str,
+    where: List[str],
+    params: list,
+    keyset: Keyset,
+    cursor: Optional[str],
+    limit: int,
+    newest_first: bool = True
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Keyset page over the hot DB and then the archive segments. Segments hold only
+    rows older than anything left in the hot DB, so the union stays in sort order
+    as long as segments are visited newest first for DESC (oldest first for ASC).
+    """
+    async with read_db() as db:
+        rows = await page_rows(db, sql, where, params, keyset, cursor, limit + 1)
+
+    segments = list_segments()
+    if newest_first:
+        segments.reverse()
+    for _, path in segments:
+        if len(rows) > limit:
+            break
+        after = keyset.cursor_for(rows[-1]) if rows else cursor
+        async with open_segment(path) as segment:
+            more = await page_rows(segment, sql, where, params, keyset, after, limit + 1 - len(rows))
+        rows += [decode_row(table, r) for r in more]
+
+    next_cursor = keyset.cursor_for(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+async def stream_ndjson_with_archive(
+    table: str,
+    sql: str,
+    where: List[str],
+    params: list,
+    keyset: Keyset,
+    cursor: Optional[str] = None,
+    newest_first: bool = True
+) -> AsyncIterator[str]:
+    """NDJSON over hot + archived rows, one keyset page at a time."""
+    while True:
+        rows, cursor = await fetch_page_with_archive(
+            table, sql, where, params, keyset, cursor, STREAM_PAGE_SIZE, newest_first
+        )
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+        if cursor is None:
+            return
+
+
+async def archived_rows(table: str, sql: str, params: tuple) -> List[dict]:
+    """Run a per-policy query against every segment, oldest first (cold path)."""
+    rows = []
+    for _, path in list_segments():
+        async with open_segment(path) as segment:
+            rows += [decode_row(table, dict(r)) for r in await segment.execute_fetchall(sql, params)]
+    return rows
@@ -0,0 +1,219 @@
+"""
+Bulk IRDAI audit export — audit_logs, interactions and workflow_logs for a date range,
+grouped by policy, as gzip NDJSON, CSV or Parquet.
+
+Policies are walked in policy_id order, a chunk at a time (AUDIT_EXPORT_CHUNK_POLICIES),
+across the hot DB and the archive segments for the months in range (app.db.archive):
+each chunk is one short read on a pool reader, encoded and flushed before the next,
+so memory is bounded by one chunk and the live API keeps its readers. A pause between
+chunks (AUDIT_EXPORT_PAUSE_MS) and a cap on concurrent exports keep a full-year
+export from starving interactive traffic.
+
+Resumable: the last fully written policy_id is the checkpoint. The HTTP endpoint takes
+it as `after_policy_id`; the CLI (scripts/export_audit.py) persists it to
+<output>.checkpoint.json together with the byte offset of the last complete chunk.
+"""
+import asyncio
+import csv
+import gzip
+import io
+import json
+from contextlib import AsyncExitStack
+from datetime import date, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.db.archive import decode_row, list_segments, open_segment
+from app.db.pool import read_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+
+# One flat schema for all three sources so CSV/Parquet columns are fixed
+EXPORT_COLUMNS = [
+    "policy_id", "created_at", "record_type", "record_id",
+    "action_type", "action_reason", "triggered_by",
+    "channel", "message_direction", "sentiment_score",
+    "node_name", "content",
+]
+
+RECORD_TABLES = {"audit": "audit_logs", "interaction": "interactions", "workflow": "workflow_logs"}
+
+# Policies with any row in the three tables, in policy_id order (each leg seeks its policy index)
+POLICY_CHUNK_SQL = """
+    SELECT policy_id FROM (
+        SELECT policy_id FROM audit_logs WHERE policy_id > ?
+        UNION SELECT policy_id FROM interactions WHERE policy_id > ?
+        UNION SELECT policy_id FROM workflow_logs WHERE policy_id > ?
+    ) ORDER BY policy_id LIMIT ?
+"""
+
+RECORDS_SQL = """
+    SELECT policy_id, created_at, 'audit' AS record_type, id AS record_id,
+           action_type, action_reason, triggered_by,
+           NULL AS channel, NULL AS message_direction, NULL AS sentiment_score,
+           NULL AS node_name, NULL AS content
+    FROM audit_logs WHERE policy_id IN ({ids}) AND created_at >= ? AND created_at < ?
+    UNION ALL
+    SELECT policy_id, created_at, 'interaction', id,
+           NULL, NULL, NULL,
+           channel, message_direction, sentiment_score,
+           NULL, content
+    FROM interactions WHERE policy_id IN ({ids}) AND created_at >= ? AND created_at < ?
+    UNION ALL
+    SELECT policy_id, created_at, 'workflow', id,
+           NULL, NULL, NULL,
+           NULL, NULL, NULL,
+           node_name, content
+    FROM workflow_logs WHERE policy_id IN ({ids}) AND created_at >= ? AND created_at < ?
+    ORDER BY policy_id, created_at, record_type, record_id
+"""
+
+_export_slots: Optional[asyncio.Semaphore] = None
+
+
+def export_slots() -> asyncio.Semaphore:
+    global _export_slots
+    if _export_slots is None:
+        _export_slots = asyncio.Semaphore(max(1, settings.audit_export_max_concurrent))
+    return _export_slots
+
+
+def date_bounds(date_from: str, date_to: str) -> Tuple[str, str]:
+    """Inclusive YYYY-MM-DD range → [start, end) timestamps comparable with created_at."""
+    start = date.fromisoformat(date_from)
+    end = date.fromisoformat(date_to) + timedelta(days=1)
+    if end <= start:
+        raise ValueError("date_to must not be before date_from")
+    return start.isoformat(), end.isoformat()
+
+
+async def _chunk_from(db, cursor_policy: str, chunk_policies: int) -> List[str]:
+    rows = await db.execute_fetchall(POLICY_CHUNK_SQL, (cursor_policy, cursor_policy, cursor_policy, chunk_policies))
+    return [r[0] for r in rows]
+
+
+async def _records_from(db, policy_ids: List[str], start: str, end: str) -> List[dict]:
+    params = []
+    for _ in range(3):
+        params += policy_ids + [start, end]
+    rows = await db.execute_fetchall(RECORDS_SQL.format(ids=",".join("?" * len(policy_ids))), params)
+    return [dict(r) for r in rows]
+
+
+def _record_key(record: dict):
+    return record["policy_id"], record["created_at"] or "", record["record_type"], record["record_id"]
+
+
+async def iter_export_chunks(
+    date_from: str,
+    date_to: str,
+    after_policy_id: str = "",
+    chunk_policies: Optional[int] = None,
+    pause_ms: Optional[int] = None
+) -> AsyncIterator[Tuple[str, List[dict]]]:
+    """
+    Yield (last policy_id in chunk, records) per chunk of policies. Archive segments
+    for the months in range are read alongside the hot DB and merged per chunk.
+    """
+    start, end = date_bounds(date_from, date_to)
+    chunk_policies = chunk_policies or settings.audit_export_chunk_policies
+    pause = (settings.audit_export_pause_ms if pause_ms is None else pause_ms) / 1000
+    cursor_policy = after_policy_id or ""
+
+    async with AsyncExitStack() as stack:
+        segments = [
+            await stack.enter_async_context(open_segment(path))
+            for _, path in list_segments(date_from[:7], date_to[:7])
+        ]
+        while True:
+            async with read_db() as db:
+                candidates = set(await _chunk_from(db, cursor_policy, chunk_policies))
+                for segment in segments:
+                    candidates.update(await _chunk_from(segment, cursor_policy, chunk_policies))
+                policy_ids = sorted(candidates)[:chunk_policies]
+                if not policy_ids:
+                    return
+                records = await _records_from(db, policy_ids, start, end)
+
+            for segment in segments:
+                archived = await _records_from(segment, policy_ids, start, end)
+                records += [decode_row(RECORD_TABLES[r["record_type"]], r) for r in archived]
+            if segments:
+                records.sort(key=_record_key)
+
+            cursor_policy = policy_ids[-1]
+            yield cursor_policy, records
+            if pause:
+                await asyncio.sleep(pause)
+
+
+# ── Encoders ──────────────────────────────────────────────────────────────────
+# Each chunk encodes independently so output can be streamed or appended on resume.
+
+def encode_ndjson_gzip(records: List[dict]) -> bytes:
+    """One gzip member per chunk; concatenated members are a valid gzip stream."""
+    lines = "".join(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in records)
+    return gzip.compress(lines.encode("utf-8"), compresslevel=6)
+
+
+def encode_csv(records: List[dict], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue().encode("utf-8")
+
+
+def parquet_writer(path: str):
+    """ParquetWriter with the export schema (one row group per chunk). Needs pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (col, pa.float64() if col == "sentiment_score" else pa.int64() if col == "record_id" else pa.string())
+        for col in EXPORT_COLUMNS
+    ])
+
+    class _Writer:
+        def __init__(self):
+            self._writer = pq.ParquetWriter(path, schema, compression="zstd")
+
+        def write(self, records: List[dict]):
+            if records:
+                columns = {col: [r.get(col) for r in records] for col in EXPORT_COLUMNS}
+                self._writer.write_table(pa.table(columns, schema=schema))
+
+        def close(self):
+            self._writer.close()
+
+    return _Writer()
+
+
+async def stream_export(
+    date_from: str,
+    date_to: str,
+    format: str = "ndjson",
+    after_policy_id: str = ""
+) -> AsyncIterator[bytes]:
+    """HTTP body for the export endpoint (gzip NDJSON or CSV) — one chunk at a time."""
+    records_total = 0
+    async with export_slots():
+        first = True
+        async for last_policy, records in iter_export_chunks(date_from, date_to, after_policy_id):
+            if format == "csv":
+                body = encode_csv(records, header=first and not after_policy_id)
+            else:
+                body = encode_ndjson_gzip(records) if records else b""
+            first = False
+            records_total += len(records)
+            if body:
+                yield body
+            logger.debug(f"[AUDIT_EXPORT] Chunk through {last_policy} | {len(records)} records")
+    logger.info(f"[AUDIT_EXPORT] {date_from}..{date_to} ({format}) streamed {records_total} records")
@@ -0,0 +1,221 @@
+"""
+Bulk renewal campaigns — every policy due in a window, run through the job queue.
+
+create_campaign() freezes the selection (due-date window, customer segment, policy
+status; policies under HUMAN_CONTROL, already PAID/RENEWED/LAPSED or with the current
+cycle paid are left out) into campaign_policies, ranked by
+premium_due_date and then annual_premium (largest first), in one INSERT ... SELECT.
+
+Workers call feed_campaigns() as they poll: each RUNNING campaign is topped up so that
+at most max_concurrent of its jobs are queued or running, next-ranked policies first.
+The top-up is a single INSERT ... SELECT with the free slots computed inside it, so
+any number of workers can feed the same campaign without overshooting.
+
+Pause parks the campaign's queued jobs (PAUSED) and stops feeding; running jobs finish.
+Resume puts them back. Cancel drops queued/parked jobs and everything not yet fed.
+"""
+import json
+import uuid
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+from app.db.payments import CLOSED_STATUSES, CYCLE_PAID_FILTER
+from app.db.pool import read_db, write_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+CAMPAIGN_STATUSES = ("RUNNING", "PAUSED", "CANCELLED", "COMPLETED")
+
+SELECT_POLICIES_SQL = """
+    INSERT INTO campaign_policies (campaign_id, policy_id, rank)
+    SELECT ?, p.policy_id,
+           ROW_NUMBER() OVER (ORDER BY p.premium_due_date, p.annual_premium DESC, p.policy_id)
+    FROM policies p
+    JOIN customers c ON p.customer_id = c.customer_id
+    LEFT JOIN policy_state ps ON p.policy_id = ps.policy_id
+    WHERE {where}
+"""
+
+# A policy that already has an active job elsewhere (e.g. in a paused campaign) stays pending
+# until that job is done. It is passed over in the SELECT — left to idx_jobs_one_active, the
+# same blocked top-ranked rows would be picked and ignored on every tick. OR IGNORE is the backstop.
+FEED_SQL = """
+    INSERT OR IGNORE INTO renewal_jobs (queue, policy_id, campaign_id, max_attempts)
+    SELECT 'renewal', cp.policy_id, cp.campaign_id, ? FROM campaign_policies cp
+    WHERE cp.campaign_id = ? AND cp.job_id IS NULL
+      AND NOT EXISTS (SELECT 1 FROM renewal_jobs j
+                      WHERE j.policy_id = cp.policy_id AND j.status IN ('QUEUED', 'RUNNING', 'PAUSED'))
+    ORDER BY cp.rank
+    LIMIT MAX(0, ? - (
+        SELECT COUNT(*) FROM renewal_jobs WHERE campaign_id = ? AND status IN ('QUEUED', 'RUNNING')
+    ))
+    RETURNING id, policy_id
+"""
+
+# Job outcome → progress counter (DONE jobs are split by the last workflow node). Only a
+# run that reached COMPLETED sent its message; SCHEDULED holds it in scheduled_sends for the
+# contact window; any other end (SKIPPED, COALESCED, LEASE_LOST, ...) sent nothing.
+PROGRESS_SQL = """
+    SELECT CASE
+               WHEN status = 'DONE' AND result = 'COMPLETED' THEN 'sent'
+               WHEN status = 'DONE' AND result = 'SCHEDULED' THEN 'scheduled'
+               WHEN status = 'DONE' AND result IN ('HUMAN_QUEUE', 'ESCALATION') THEN 'escalated'
+               WHEN status = 'DONE' THEN 'skipped'
+               WHEN status = 'DEAD' THEN 'failed'
+               ELSE lower(status)
+           END AS counter, COUNT(*)
+    FROM renewal_jobs WHERE campaign_id = ? GROUP BY 1
+"""
+
+
+def _filters_where(filters: dict):
+    # Paid and lapsed policies (or a paid current cycle) are never selected, whatever the status filter
+    where = ["COALESCE(ps.mode, 'AI') != 'HUMAN_CONTROL'",
+             f"COALESCE(p.status, '') NOT IN ({','.join('?' * len(CLOSED_STATUSES))})", CYCLE_PAID_FILTER]
+    params = list(CLOSED_STATUSES)
+    if filters.get("due_from"):
+        where.append("p.premium_due_date >= ?")
+        params.append(filters["due_from"])
+    if filters.get("due_to"):
+        where.append("p.premium_due_date <= ?")
+        params.append(filters["due_to"])
+    if filters.get("segment"):
+        where.append("c.segment = ?")
+        params.append(filters["segment"])
+    if filters.get("status"):
+        where.append("p.status = ?")
+        params.append(filters["status"])
+    return " AND ".join(where), params
+
+
+async def create_campaign(
+    due_from: Optional[str] = None,
+    due_to: Optional[str] = None,
+    segment: Optional[str] = None,
+    status: Optional[str] = None,
+    max_concurrent: Optional[int] = None,
+    name: Optional[str] = None,
+    created_by: Optional[str] = None
+) -> dict:
+    """Select and rank the matching policies and start feeding them to the workers."""
+    filters = {k: v for k, v in
+               {"due_from": due_from, "due_to": due_to, "segment": segment, "status": status}.items() if v}
+    max_concurrent = max_concurrent or settings.campaign_max_concurrent
+    if max_concurrent <= 0:
+        raise ValueError("max_concurrent must be positive")
+    campaign_id = f"CMP-{uuid.uuid4().hex[:10].upper()}"
+    where, params = _filters_where(filters)
+
+    async with write_db() as db:
+        await db.execute(
+            "INSERT INTO campaigns (campaign_id, name, filters, max_concurrent, created_by) VALUES (?, ?, ?, ?, ?)",
+            (campaign_id, name or campaign_id, json.dumps(filters), max_concurrent, created_by)
+        )
+        cursor = await db.execute(SELECT_POLICIES_SQL.format(where=where), [campaign_id] + params)
+        total = cursor.rowcount
+        status_now = "RUNNING" if total else "COMPLETED"
+        await db.execute(
+            "UPDATE campaigns SET total=?, status=?, "
+            "finished_at=CASE WHEN ?='COMPLETED' THEN CURRENT_TIMESTAMP END WHERE campaign_id=?",
+            (total, status_now, status_now, campaign_id)
+        )
+    logger.info(f"[CAMPAIGN] {campaign_id} created: {total} policies, {max_concurrent} in flight, filters {filters}")
+    return await get_campaign(campaign_id)
+
+
+async def feed_campaign(campaign_id: str, max_concurrent: int) -> int:
+    """Top up one campaign's in-flight jobs; marks it COMPLETED once nothing is left."""
+    async with write_db() as db:
+        fed = await db.execute_fetchall(
+            FEED_SQL, (settings.job_max_attempts, campaign_id, max_concurrent, campaign_id)
+        )
+        if fed:
+            await db.executemany(
+                "UPDATE campaign_policies SET job_id=? WHERE campaign_id=? AND policy_id=?",
+                [(r["id"], campaign_id, r["policy_id"]) for r in fed]
+            )
+            return len(fed)
+        await db.execute("""
+            UPDATE campaigns SET status='COMPLETED', finished_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP
+            WHERE campaign_id=? AND status='RUNNING'
+              AND NOT EXISTS (SELECT 1 FROM campaign_policies WHERE campaign_id=? AND job_id IS NULL)
+              AND NOT EXISTS (SELECT 1 FROM renewal_jobs WHERE campaign_id=? AND status IN ('QUEUED', 'RUNNING'))
+        """, (campaign_id, campaign_id, campaign_id))
+    return 0
+
+
+async def feed_campaigns() -> int:
+    """Top up every RUNNING campaign (called from the worker poll loop)."""
+    async with read_db() as db:
+        running = await db.execute_fetchall(
+            "SELECT campaign_id, max_concurrent FROM campaigns WHERE status='RUNNING'"
+        )
+    fed = 0
+    for campaign_id, max_concurrent in running:
+        fed += await feed_campaign(campaign_id, max_concurrent)
+    return fed
+
+
+async def set_campaign_state(campaign_id: str, action: str) -> Optional[dict]:
+    """pause | resume | cancel. Returns the campaign, or None if it doesn't exist."""
+    transitions = {
+        "pause": (("RUNNING",), "PAUSED", "QUEUED", "PAUSED"),
+        "resume": (("PAUSED",), "RUNNING", "PAUSED", "QUEUED"),
+        "cancel": (("RUNNING", "PAUSED"), "CANCELLED", None, "CANCELLED"),
+    }
+    if action not in transitions:
+        raise ValueError(f"Unknown campaign action '{action}'")
+    allowed, new_status, job_from, job_to = transitions[action]
+
+    async with write_db() as db:
+        rows = await db.execute_fetchall("SELECT status FROM campaigns WHERE campaign_id=?", (campaign_id,))
+        if not rows:
+            return None
+        if rows[0][0] not in allowed:
+            raise ValueError(f"Cannot {action} a campaign that is {rows[0][0]}")
+        job_where = "status=?" if job_from else "status IN ('QUEUED', 'PAUSED')"
+        await db.execute(
+            f"UPDATE renewal_jobs SET status=?, updated_at=CURRENT_TIMESTAMP WHERE campaign_id=? AND {job_where}",
+            [job_to, campaign_id] + ([job_from] if job_from else [])
+        )
+        await db.execute(
+            "UPDATE campaigns SET status=?, updated_at=CURRENT_TIMESTAMP, "
+            "finished_at=CASE WHEN ?='CANCELLED' THEN CURRENT_TIMESTAMP END WHERE campaign_id=?",
+            (new_status, new_status, campaign_id)
+        )
+    logger.info(f"[CAMPAIGN] {campaign_id} {action} → {new_status}")
+    return await get_campaign(campaign_id)
+
+
+async def campaign_progress(campaign_id: str, total: int) -> Dict[str, int]:
+    """pending (not fed yet) / queued / running / sent / scheduled / escalated / skipped / failed / paused / cancelled."""
+    progress = {k: 0 for k in ("queued", "running", "sent", "scheduled", "escalated", "skipped", "failed",
+                               "paused", "cancelled")}
+    async with read_db() as db:
+        for counter, count in await db.execute_fetchall(PROGRESS_SQL, (campaign_id,)):
+            progress[counter] = count
+    progress["pending"] = total - sum(progress.values())
+    return progress
+
+
+async def get_campaign(campaign_id: str) -> Optional[dict]:
+    async with read_db() as db:
+        rows = await db.execute_fetchall("SELECT * FROM campaigns WHERE campaign_id=?", (campaign_id,))
+    if not rows:
+        return None
+    campaign = dict(rows[0])
+    campaign["filters"] = json.loads(campaign["filters"])
+    campaign["progress"] = await campaign_progress(campaign_id, campaign["total"])
+    return campaign
+
+
+async def list_campaigns(status: Optional[str] = None, limit: int = 50) -> List[dict]:
+    sql = "SELECT * FROM campaigns"
+    params: list = []
+    if status:
+        sql += " WHERE status=?"
+        params.append(status)
+    async with read_db() as db:
+        rows = await db.execute_fetchall(sql + " ORDER BY created_at DESC, campaign_id LIMIT ?", params + [limit])
+    return [{**dict(r), "filters": json.loads(r["filters"])} for r in rows]
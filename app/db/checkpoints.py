@@ -0,0 +1,156 @@
+"""
+Workflow checkpoints — a LangGraph checkpointer on the shared SQLite pool (migration 9).
+
+The graph saves its state after every node under a thread id (one per job, see
+app.agents.runner.run_thread_id). When a worker dies mid-run, or a deploy hands the
+job back to the queue, the next attempt of the same job picks up after the last
+finished node instead of paying for the orchestrator, planner and drafts again.
+The runner deletes a thread's checkpoints once its run finishes; prune_checkpoints()
+clears threads nobody came back for.
+
+Async only — the workflow is always driven with astream().
+"""
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP, BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata,
+    CheckpointTuple, get_checkpoint_id, get_checkpoint_metadata
+)
+from langchain_core.runnables import RunnableConfig
+
+from app.db.pool import read_db, write_db
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[RunnableConfig]:
+    if not checkpoint_id:
+        return None
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """Stores each checkpoint as one serialized row plus its pending writes."""
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        async for found in self.alist(config, limit=1):
+            return found
+        return None
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        where, params = [], []
+        if config:
+            where.append("thread_id=?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                where.append("checkpoint_ns=?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id=?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        sql = "SELECT * FROM workflow_checkpoints"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # Checkpoint ids are uuid6, so they sort by time
+        sql += " ORDER BY checkpoint_id DESC"
+        if limit and not filter:
+            sql += f" LIMIT {int(limit)}"
+
+        # Collected before yielding so the reader goes back to the pool even if the caller stops early
+        found = []
+        async with read_db() as db:
+            for row in await db.execute_fetchall(sql, params):
+                metadata = self.serde.loads_typed((row["metadata_type"], row["metadata"]))
+                if filter and any(metadata.get(k) != v for k, v in filter.items()):
+                    continue
+                writes = await db.execute_fetchall(
+                    "SELECT task_id, channel, type, value FROM workflow_checkpoint_writes "
+                    "WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id=? ORDER BY task_id, idx",
+                    (row["thread_id"], row["checkpoint_ns"], row["checkpoint_id"])
+                )
+                found.append(CheckpointTuple(
+                    config=_config(row["thread_id"], row["checkpoint_ns"], row["checkpoint_id"]),
+                    checkpoint=self.serde.loads_typed((row["type"], row["checkpoint"])),
+                    metadata=metadata,
+                    parent_config=_config(row["thread_id"], row["checkpoint_ns"], row["parent_checkpoint_id"]),
+                    pending_writes=[(w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["value"])))
+                                    for w in writes],
+                ))
+                if limit and len(found) >= limit:
+                    break
+        for checkpoint_tuple in found:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        async with write_db() as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO workflow_checkpoints "
+                "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                "metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, serialized, metadata_type, serialized_metadata)
+            )
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        conf = config["configurable"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized = self.serde.dumps_typed(value)
+            rows.append((conf["thread_id"], conf.get("checkpoint_ns", ""), conf["checkpoint_id"], task_id,
+                         WRITES_IDX_MAP.get(channel, idx), channel, type_, serialized, task_path))
+        # Special channels (errors, interrupts) overwrite; regular writes are saved once
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        async with write_db() as db:
+            await db.executemany(
+                f"{verb} INTO workflow_checkpoint_writes "
+                "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        async with write_db() as db:
+            await db.execute("DELETE FROM workflow_checkpoints WHERE thread_id=?", (thread_id,))
+            await db.execute("DELETE FROM workflow_checkpoint_writes WHERE thread_id=?", (thread_id,))
+
+
+async def prune_checkpoints(retention_days: int) -> int:
+    """Delete threads whose last checkpoint is older than retention_days. Returns threads removed."""
+    async with write_db() as db:
+        stale = [r[0] for r in await db.execute_fetchall(
+            "SELECT thread_id FROM workflow_checkpoints GROUP BY thread_id "
+            "HAVING MAX(created_at) < datetime('now', ?)",
+            (f"-{retention_days} days",)
+        )]
+        if stale:
+            await db.executemany("DELETE FROM workflow_checkpoints WHERE thread_id=?", [(t,) for t in stale])
+            await db.executemany("DELETE FROM workflow_checkpoint_writes WHERE thread_id=?", [(t,) for t in stale])
+    return len(stale)
+
+
+checkpointer = SQLiteCheckpointer()
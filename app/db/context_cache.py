@@ -0,0 +1,141 @@
+"""
+In-process LRU cache of policy context (load_policy_state) and /renewal/status views.
+
+Coherence:
+- Write-through: every write path calls invalidate_policy() right after its write.
+- Cross-worker: triggers append each changed policy_id to context_changes (migration 5).
+  Before serving, a worker reads the entries after the last seq it has seen, at most
+  once per CONTEXT_CACHE_SYNC_MS, and evicts those policies. A workflow run, which must
+  not act on a stale mode or distress flag, loads with fresh=True: a forced sync first. The same catches rows that
+  the write-behind queue commits after the caller has already invalidated. If the log
+  has been pruned past our position, the whole cache is flushed.
+
+A fill that races an invalidation is discarded, so a stale read can't land in the
+cache after the write that made it stale. Values are deep-copied on the way in and out,
+because callers mutate the workflow state they get back.
+"""
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.db.pool import read_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+
+class PolicyContextCache:
+    def __init__(self, max_entries: int = 10000, sync_interval_ms: int = 250):
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval_ms / 1000
+        # policy_id → {kind: value}; LRU order is per policy
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loading: Dict[str, int] = {}
+        self._dirty = set()
+        self._last_seq: Optional[int] = None
+        self._last_sync = 0.0
+        self._sync_lock = asyncio.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "flushes": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    async def get_or_load(self, policy_id: str, kind: str, loader: Callable[[], Awaitable[Any]]):
+        """Cached value for (policy_id, kind), else loader() — None results are not cached."""
+        if not self.enabled:
+            return await loader()
+        await self.sync()
+
+        cached = self._entries.get(policy_id)
+        if cached is not None and kind in cached:
+            self._entries.move_to_end(policy_id)
+            self.stats["hits"] += 1
+            return copy.deepcopy(cached[kind])
+
+        self.stats["misses"] += 1
+        self._loading[policy_id] = self._loading.get(policy_id, 0) + 1
+        try:
+            value = await loader()
+        finally:
+            self._loading[policy_id] -= 1
+            raced = policy_id in self._dirty
+            if not self._loading[policy_id]:
+                del self._loading[policy_id]
+                self._dirty.discard(policy_id)
+
+        if value is not None and not raced:
+            self._entries.setdefault(policy_id, {})[kind] = copy.deepcopy(value)
+            self._entries.move_to_end(policy_id)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return value
+
+    def invalidate(self, policy_id: str):
+        self._entries.pop(policy_id, None)
+        if policy_id in self._loading:
+            self._dirty.add(policy_id)
+        self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._dirty.update(self._loading)
+        self.stats["flushes"] += 1
+
+    async def sync(self, force: bool = False):
+        """
+        Apply other workers' changes from context_changes (rate-limited). force=True skips
+        the rate limit and waits out a sync already in flight, which may predate our caller's
+        lease, then reads the log itself.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        if not force and self._sync_lock.locked():
+            return
+        async with self._sync_lock:
+            self._last_sync = now
+            async with read_db() as db:
+                if self._last_seq is None:
+                    rows = await db.execute_fetchall("SELECT COALESCE(MAX(seq), 0) FROM context_changes")
+                    self._last_seq = rows[0][0]
+                    self.clear()
+                    return
+                rows = await db.execute_fetchall("SELECT MIN(seq) FROM context_changes")
+                oldest = rows[0][0]
+                changes = await db.execute_fetchall(
+                    "SELECT seq, policy_id FROM context_changes WHERE seq > ? ORDER BY seq", (self._last_seq,)
+                )
+
+            if oldest is not None and oldest > self._last_seq + 1:
+                logger.warning("[CONTEXT_CACHE] Change log pruned past our position — flushing cache")
+                self.clear()
+            else:
+                for _, policy_id in changes:
+                    self.invalidate(policy_id)
+            if changes:
+                self._last_seq = changes[-1][0]
+
+
+_cache: Optional[PolicyContextCache] = None
+
+
+def get_context_cache() -> PolicyContextCache:
+    """Process-wide cache (rebuilt per event loop, like the pool)."""
+    global _cache
+    loop = asyncio.get_running_loop()
+    if _cache is None or _cache.loop is not loop:
+        _cache = PolicyContextCache(settings.context_cache_size, settings.context_cache_sync_ms)
+        _cache.loop = loop
+    return _cache
+
+
+def invalidate_policy(policy_id: str):
+    """Write-through hook: call after any write that changes a policy's context or status."""
+    if _cache is not None:
+        _cache.invalidate(policy_id)
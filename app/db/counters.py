@@ -0,0 +1,132 @@
+"""
+Materialized dashboard counters.
+dashboard_counters / audit_action_buckets are maintained by triggers (migration 3),
+so /dashboard/overview is a handful of primary-key reads instead of full-table scans.
+reconcile_counters() recomputes everything from the base tables and corrects drift.
+"""
+import asyncio
+from typing import Dict, List, Tuple
+
+import aiosqlite
+
+from app.core.config import get_settings
+from app.db.payments import PAID_STATUSES
+from app.db.pool import read_db, write_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+COUNTER_SOURCES_SQL = """
+    SELECT 'policies' AS counter, '' AS dim, COUNT(*) AS value FROM policies
+    UNION ALL SELECT 'policy_status', COALESCE(status, ''), COUNT(*) FROM policies GROUP BY 2
+    UNION ALL SELECT 'mode', COALESCE(mode, ''), COUNT(*) FROM policy_state GROUP BY 2
+    UNION ALL SELECT 'distress', '', COALESCE(SUM(distress_flag = 1), 0) FROM policy_state
+    UNION ALL SELECT 'channel', COALESCE(last_channel, ''), COUNT(*) FROM policy_state GROUP BY 2
+    UNION ALL SELECT 'escalation_status', COALESCE(status, ''), COUNT(*) FROM escalation_cases GROUP BY 2
+    UNION ALL SELECT 'premium', dim, COALESCE(SUM(value), 0) FROM policy_premium GROUP BY 2
+"""
+
+
+async def read_overview_counters(db: aiosqlite.Connection, window_hours: int = 24) -> dict:
+    """Overview numbers from the counters tables (hourly granularity for the action window)."""
+    cursor = await db.execute("SELECT counter, dim, value FROM dashboard_counters")
+    counters: Dict[Tuple[str, str], int] = {(r[0], r[1]): r[2] for r in await cursor.fetchall()}
+
+    cursor = await db.execute("""
+        SELECT action_type, SUM(count) as count FROM audit_action_buckets
+        WHERE bucket >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+        GROUP BY action_type HAVING SUM(count) > 0
+    """, (f"-{window_hours} hours",))
+    recent_actions = [dict(r) for r in await cursor.fetchall()]
+
+    return {
+        "total_policies": counters.get(("policies", ""), 0),
+        "active_policies": counters.get(("policy_status", "ACTIVE"), 0),
+        "ai_managed": counters.get(("mode", "AI"), 0),
+        "human_managed": counters.get(("mode", "HUMAN_CONTROL"), 0),
+        "distress_cases": counters.get(("distress", ""), 0),
+        "open_escalations": counters.get(("escalation_status", "OPEN"), 0),
+        "premium": _premium_split(counters),
+        "channel_distribution": [
+            {"last_channel": dim, "count": value}
+            for (counter, dim), value in sorted(counters.items())
+            if counter == "channel" and dim and value > 0
+        ],
+        "last_24h_actions": recent_actions
+    }
+
+
+def _premium_split(counters: Dict[Tuple[str, str], int]) -> dict:
+    """
+    Paid vs outstanding annual premium (policy_premium view, migration 14): what this
+    cycle's payments cover is paid, the rest outstanding; lapsed policies are neither.
+    Policy counts go by status.
+    """
+    split = {bucket: counters.get(("premium", bucket), 0) for bucket in ("paid", "outstanding", "lapsed")}
+    split.update(paid_policies=0, outstanding_policies=0, lapsed_policies=0)
+    for (counter, status), value in counters.items():
+        if counter == "policy_status":
+            bucket = "paid" if status in PAID_STATUSES else "lapsed" if status == "LAPSED" else "outstanding"
+            split[f"{bucket}_policies"] += value
+    return split
+
+
+async def reconcile_counters(db: aiosqlite.Connection, bucket_retention_days: int = 7) -> List[dict]:
+    """
+    Recompute counters from the base tables inside the caller's transaction.
+    Returns the drifted entries (stored vs actual); prunes expired action buckets.
+    """
+    cursor = await db.execute(f"""
+        WITH actual AS ({COUNTER_SOURCES_SQL})
+        SELECT a.counter, a.dim, COALESCE(d.value, 0) AS stored, a.value AS actual
+        FROM actual a LEFT JOIN dashboard_counters d ON d.counter = a.counter AND d.dim = a.dim
+        WHERE COALESCE(d.value, 0) != a.value
+        UNION ALL
+        SELECT d.counter, d.dim, d.value, 0 FROM dashboard_counters d
+        WHERE d.value != 0 AND NOT EXISTS (
+            SELECT 1 FROM actual a WHERE a.counter = d.counter AND a.dim = d.dim
+        )
+    """)
+    drift = [dict(r) for r in await cursor.fetchall()]
+
+    await db.execute("DELETE FROM dashboard_counters")
+    await db.execute(f"INSERT INTO dashboard_counters (counter, dim, value) {COUNTER_SOURCES_SQL}")
+
+    # Rebuild the retained action buckets from audit_logs
+    cutoff = f"-{bucket_retention_days} days"
+    await db.execute(
+        "DELETE FROM audit_action_buckets WHERE bucket >= strftime('%Y-%m-%d %H:00:00', 'now', ?)", (cutoff,)
+    )
+    await db.execute("""
+        INSERT INTO audit_action_buckets (bucket, action_type, count)
+        SELECT strftime('%Y-%m-%d %H:00:00', created_at), COALESCE(action_type, ''), COUNT(*)
+        FROM audit_logs WHERE created_at >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+        GROUP BY 1, 2
+    """, (cutoff,))
+    await db.execute(
+        "DELETE FROM audit_action_buckets WHERE bucket < strftime('%Y-%m-%d %H:00:00', 'now', ?)", (cutoff,)
+    )
+
+    if drift:
+        logger.warning(f"[COUNTERS] Corrected {len(drift)} drifted counters: {drift}")
+    return drift
+
+
+async def get_overview_counters() -> dict:
+    async with read_db() as db:
+        return await read_overview_counters(db)
+
+
+async def run_reconciliation() -> List[dict]:
+    async with write_db() as db:
+        return await reconcile_counters(db)
+
+
+async def reconcile_loop():
+    """Background job: periodic drift correction (COUNTERS_RECONCILE_INTERVAL_S)."""
+    while True:
+        await asyncio.sleep(settings.counters_reconcile_interval_s)
+        try:
+            await run_reconciliation()
+        except Exception as e:
+            logger.error(f"[COUNTERS] Reconciliation failed: {e}")
@@ -0,0 +1,238 @@
+"""
+Durable renewal job queue (renewal_jobs, migration 6).
+
+Lifecycle: QUEUED → RUNNING (leased) → DONE, or back to QUEUED with exponential
+backoff on failure, or DEAD once max_attempts is used up (dead letters stay in the
+table for inspection and can be re-driven with retry_job). Campaign jobs can also be
+PAUSED (not claimable until resumed) or CANCELLED (see app.db.campaigns).
+
+Leases: claim_jobs() marks jobs RUNNING with lease_owner/lease_expires_at in a single
+UPDATE ... RETURNING, so concurrent workers in any number of processes never claim
+the same job. A worker extends its leases with heartbeat(); a lease that expires
+(worker crashed or hung) is put back on the queue — counting as an attempt — by the
+next claim. complete/fail only apply while the caller still owns the lease.
+
+Single flight: a policy has at most one active (QUEUED/RUNNING/PAUSED) job — a unique
+partial index, migration 8. Enqueueing a policy that already has one returns that job
+instead (coalescing double clicks and repeated triggers).
+
+Sharding: a worker started with shard=(i, n) only claims policies whose
+policy_shard(policy_id, n) is i, so each policy always lands on the same process.
+
+Usage:
+    job_id = await enqueue_job("SLI-2298741", {"override_channel": "WhatsApp"})
+    jobs = await claim_jobs("host:1234", limit=4)
+    await complete_job(jobs[0]["id"], "host:1234")
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.db.pool import read_db, write_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+DEFAULT_QUEUE = "renewal"
+JOB_STATUSES = ("QUEUED", "RUNNING", "DONE", "DEAD", "PAUSED", "CANCELLED")
+
+CLAIM_SQL = """
+    UPDATE renewal_jobs
+    SET status='RUNNING', lease_owner=?, lease_expires_at=datetime('now', ?),
+        attempts=attempts+1, updated_at=CURRENT_TIMESTAMP
+    WHERE id IN (
+        SELECT id FROM renewal_jobs
+        WHERE queue=? AND status='QUEUED' AND available_at <= datetime('now'){shard}
+        ORDER BY priority DESC, available_at, id
+        LIMIT ?
+    )
+    RETURNING *
+"""
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Delay before retry number `attempts` (1-based): base * 2^(n-1), capped."""
+    return min(settings.job_backoff_max_s, settings.job_backoff_base_s * 2 ** max(0, attempts - 1))
+
+
+def _job(row) -> dict:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"] or "{}")
+    return job
+
+
+async def submit_job(
+    policy_id: str,
+    payload: Optional[dict] = None,
+    priority: int = 0,
+    queue: str = DEFAULT_QUEUE,
+    max_attempts: Optional[int] = None,
+    delay_s: int = 0
+) -> Tuple[int, bool]:
+    """
+    Add a job unless the policy already has an active one.
+    Returns (job_id, created) — created is False when coalesced onto the existing job.
+    """
+    async with write_db() as db:
+        rows = await db.execute_fetchall(
+            "INSERT OR IGNORE INTO renewal_jobs (queue, policy_id, payload, priority, max_attempts, available_at) "
+            "VALUES (?, ?, ?, ?, ?, datetime('now', ?)) RETURNING id",
+            (queue, policy_id, json.dumps(payload or {}), priority,
+             max_attempts or settings.job_max_attempts, f"+{delay_s} seconds")
+        )
+        if rows:
+            return rows[0][0], True
+        rows = await db.execute_fetchall(
+            "SELECT id FROM renewal_jobs WHERE policy_id=? AND status IN ('QUEUED', 'RUNNING', 'PAUSED')",
+            (policy_id,)
+        )
+        return rows[0][0], False
+
+
+async def enqueue_job(policy_id: str, payload: Optional[dict] = None, priority: int = 0,
+                      queue: str = DEFAULT_QUEUE, max_attempts: Optional[int] = None, delay_s: int = 0) -> int:
+    """Add a job (or coalesce onto the policy's active one); higher priority is claimed first."""
+    job_id, _ = await submit_job(policy_id, payload, priority, queue, max_attempts, delay_s)
+    return job_id
+
+
+async def requeue_expired(queue: Optional[str] = None) -> Tuple[int, int]:
+    """Return expired leases to the queue (or dead-letter them). Returns (requeued, dead)."""
+    where = "status='RUNNING' AND lease_expires_at < datetime('now')"
+    params: list = []
+    if queue:
+        where += " AND queue=?"
+        params.append(queue)
+    async with write_db() as db:
+        rows = await db.execute_fetchall(f"""
+            UPDATE renewal_jobs
+            SET status=CASE WHEN attempts >= max_attempts THEN 'DEAD' ELSE 'QUEUED' END,
+                last_error='lease expired (worker ' || COALESCE(lease_owner, '?') || ')',
+                lease_owner=NULL, lease_expires_at=NULL, updated_at=CURRENT_TIMESTAMP,
+                finished_at=CASE WHEN attempts >= max_attempts THEN CURRENT_TIMESTAMP END
+            WHERE {where}
+            RETURNING id, status
+        """, params)
+    dead = sum(1 for r in rows if r["status"] == "DEAD")
+    if rows:
+        logger.warning(f"[JOBS] Reclaimed {len(rows)} expired leases ({dead} dead-lettered)")
+    return len(rows) - dead, dead
+
+
+async def claim_jobs(worker_id: str, limit: int, queue: str = DEFAULT_QUEUE,
+                     lease_s: Optional[int] = None, shard: Optional[Tuple[int, int]] = None) -> List[dict]:
+    """
+    Lease up to `limit` ready jobs to worker_id, highest priority first.
+    shard=(index, count) only claims policies with policy_shard(policy_id, count) == index.
+    """
+    if limit <= 0:
+        return []
+    await requeue_expired(queue)
+    lease_s = lease_s or settings.job_lease_s
+    params = [worker_id, f"+{lease_s} seconds", queue]
+    shard_sql = ""
+    if shard and shard[1] > 1:
+        shard_sql = " AND policy_shard(policy_id, ?) = ?"
+        params += [shard[1], shard[0]]
+    async with write_db() as db:
+        rows = await db.execute_fetchall(CLAIM_SQL.format(shard=shard_sql), params + [limit])
+    # RETURNING order is unspecified
+    return sorted((_job(r) for r in rows), key=lambda j: (-j["priority"], j["available_at"], j["id"]))
+
+
+async def heartbeat(worker_id: str, job_ids: List[int], lease_s: Optional[int] = None) -> set:
+    """Extend worker_id's leases; returns the ids it still holds (others were lost)."""
+    if not job_ids:
+        return set()
+    lease_s = lease_s or settings.job_lease_s
+    async with write_db() as db:
+        rows = await db.execute_fetchall(
+            f"UPDATE renewal_jobs SET lease_expires_at=datetime('now', ?), updated_at=CURRENT_TIMESTAMP "
+            f"WHERE status='RUNNING' AND lease_owner=? AND id IN ({','.join('?' * len(job_ids))}) RETURNING id",
+            [f"+{lease_s} seconds", worker_id] + list(job_ids)
+        )
+    return {r[0] for r in rows}
+
+
+async def complete_job(job_id: int, worker_id: str, result: Optional[str] = None) -> bool:
+    async with write_db() as db:
+        cursor = await db.execute(
+            "UPDATE renewal_jobs SET status='DONE', result=?, lease_owner=NULL, lease_expires_at=NULL, last_error=NULL, "
+            "finished_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP "
+            "WHERE id=? AND status='RUNNING' AND lease_owner=?",
+            (result, job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+
+async def fail_job(job_id: int, worker_id: str, error: str) -> Optional[str]:
+    """Retry later with backoff, or dead-letter. Returns the new status (None if the lease was lost)."""
+    async with write_db() as db:
+        rows = await db.execute_fetchall(
+            "SELECT attempts, max_attempts FROM renewal_jobs WHERE id=? AND status='RUNNING' AND lease_owner=?",
+            (job_id, worker_id)
+        )
+        if not rows:
+            return None
+        attempts, max_attempts = rows[0]
+        if attempts >= max_attempts:
+            await db.execute(
+                "UPDATE renewal_jobs SET status='DEAD', last_error=?, lease_owner=NULL, lease_expires_at=NULL, "
+                "finished_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (error, job_id)
+            )
+            return "DEAD"
+        await db.execute(
+            "UPDATE renewal_jobs SET status='QUEUED', last_error=?, lease_owner=NULL, lease_expires_at=NULL, "
+            "available_at=datetime('now', ?), updated_at=CURRENT_TIMESTAMP WHERE id=?",
+            (error, f"+{backoff_seconds(attempts)} seconds", job_id)
+        )
+        return "QUEUED"
+
+
+async def release_job(job_id: int, worker_id: str) -> bool:
+    """Hand a job back untouched (worker shutting down) — the attempt is not counted."""
+    async with write_db() as db:
+        cursor = await db.execute(
+            "UPDATE renewal_jobs SET status='QUEUED', attempts=MAX(attempts-1, 0), lease_owner=NULL, "
+            "lease_expires_at=NULL, updated_at=CURRENT_TIMESTAMP WHERE id=? AND status='RUNNING' AND lease_owner=?",
+            (job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+
+async def retry_job(job_id: int) -> bool:
+    """Re-drive a dead-lettered job with a fresh set of attempts (not if the policy has another active job)."""
+    async with write_db() as db:
+        cursor = await db.execute(
+            "UPDATE OR IGNORE renewal_jobs SET status='QUEUED', attempts=0, available_at=CURRENT_TIMESTAMP, "
+            "finished_at=NULL, updated_at=CURRENT_TIMESTAMP WHERE id=? AND status='DEAD'",
+            (job_id,)
+        )
+        return cursor.rowcount == 1
+
+
+async def get_job(job_id: int) -> Optional[dict]:
+    async with read_db() as db:
+        rows = await db.execute_fetchall("SELECT * FROM renewal_jobs WHERE id=?", (job_id,))
+    return _job(rows[0]) if rows else None
+
+
+async def job_counts(queue: str = DEFAULT_QUEUE) -> Dict[str, int]:
+    async with read_db() as db:
+        rows = await db.execute_fetchall(
+            "SELECT status, COUNT(*) FROM renewal_jobs WHERE queue=? GROUP BY status", (queue,)
+        )
+    counts = {status: 0 for status in JOB_STATUSES}
+    counts.update({r[0]: r[1] for r in rows})
+    return counts
+
+
+async def prune_jobs(retention_days: int) -> int:
+    """Delete finished (DONE) jobs older than retention_days; dead letters are kept."""
+    async with write_db() as db:
+        cursor = await db.execute(
+            "DELETE FROM renewal_jobs WHERE status='DONE' AND finished_at < datetime('now', ?)",
+            (f"-{retention_days} days",)
+        )
+        return cursor.rowcount
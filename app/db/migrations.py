@@ -0,0 +1,623 @@
+"""
+Versioned schema migrations.
+Each migration runs once, in order, inside its own transaction and is recorded
+in schema_migrations. Add new migrations at the end of MIGRATIONS — never edit
+one that has shipped.
+"""
+from typing import List, Tuple
+import aiosqlite
+
+from app.utils.logger import logger
+
+# (version, name, sql)
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, "baseline schema", """
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            hashed_password TEXT NOT NULL,
+            role TEXT DEFAULT 'agent',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER,
+            city TEXT,
+            preferred_channel TEXT,
+            preferred_language TEXT,
+            segment TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS policies (
+            policy_id TEXT PRIMARY KEY,
+            customer_id TEXT,
+            policy_type TEXT,
+            sum_assured INTEGER,
+            annual_premium INTEGER,
+            premium_due_date DATE,
+            payment_mode TEXT,
+            fund_value INTEGER,
+            status TEXT DEFAULT 'ACTIVE',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS policy_state (
+            policy_id TEXT PRIMARY KEY,
+            current_node TEXT DEFAULT 'ORCHESTRATOR',
+            last_channel TEXT,
+            waiting_for TEXT,
+            sentiment_score REAL DEFAULT 0.0,
+            distress_flag INTEGER DEFAULT 0,
+            objection_count INTEGER DEFAULT 0,
+            mode TEXT DEFAULT 'AI',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            policy_id TEXT,
+            channel TEXT,
+            message_direction TEXT,
+            content TEXT,
+            sentiment_score REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS escalation_cases (
+            case_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            policy_id TEXT,
+            escalation_reason TEXT,
+            priority_score REAL,
+            assigned_to TEXT,
+            status TEXT DEFAULT 'OPEN',
+            sla_deadline TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            policy_id TEXT,
+            action_type TEXT,
+            action_reason TEXT,
+            triggered_by TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS workflow_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            policy_id TEXT,
+            node_name TEXT,
+            content TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_interactions_policy ON interactions(policy_id);
+        CREATE INDEX IF NOT EXISTS idx_policy_state_node ON policy_state(current_node);
+        CREATE INDEX IF NOT EXISTS idx_escalation_status ON escalation_cases(status);
+        CREATE INDEX IF NOT EXISTS idx_audit_policy ON audit_logs(policy_id);
+    """),
+
+    (2, "indexes for hot queries", """
+        -- /renewal/logs: WHERE policy_id ORDER BY created_at (polled every 2s by the UI)
+        CREATE INDEX IF NOT EXISTS idx_workflow_logs_policy_created ON workflow_logs(policy_id, created_at);
+
+        -- /renewal/status: WHERE policy_id AND status='OPEN' ORDER BY created_at DESC LIMIT 1
+        CREATE INDEX IF NOT EXISTS idx_escalation_policy_status ON escalation_cases(policy_id, status, created_at);
+
+        -- /dashboard/escalations: WHERE status ORDER BY priority_score DESC, created_at
+        DROP INDEX IF EXISTS idx_escalation_status;
+        CREATE INDEX IF NOT EXISTS idx_escalation_status_priority ON escalation_cases(status, priority_score DESC, created_at);
+
+        -- load_policy_state / status: WHERE policy_id ORDER BY created_at DESC LIMIT N
+        DROP INDEX IF EXISTS idx_interactions_policy;
+        CREATE INDEX IF NOT EXISTS idx_interactions_policy_created ON interactions(policy_id, created_at);
+
+        -- /dashboard/overview: WHERE created_at >= ... GROUP BY action_type (covering)
+        CREATE INDEX IF NOT EXISTS idx_audit_created_action ON audit_logs(created_at, action_type);
+
+        -- /dashboard/audit-logs: WHERE policy_id ORDER BY created_at DESC
+        DROP INDEX IF EXISTS idx_audit_policy;
+        CREATE INDEX IF NOT EXISTS idx_audit_policy_created ON audit_logs(policy_id, created_at);
+
+        -- /dashboard/policies: ORDER BY premium_due_date
+        CREATE INDEX IF NOT EXISTS idx_policies_due_date ON policies(premium_due_date);
+    """),
+
+    (3, "materialized dashboard counters", """
+        -- O(1) /dashboard/overview: counters maintained transactionally by triggers,
+        -- corrected by app.db.counters.reconcile_counters()
+        CREATE TABLE IF NOT EXISTS dashboard_counters (
+            counter TEXT NOT NULL,
+            dim TEXT NOT NULL DEFAULT '',
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (counter, dim)
+        ) WITHOUT ROWID;
+
+        -- Hourly audit action counts for rolling-window metrics
+        CREATE TABLE IF NOT EXISTS audit_action_buckets (
+            bucket TEXT NOT NULL,
+            action_type TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, action_type)
+        ) WITHOUT ROWID;
+
+        -- policies: total + per status
+        CREATE TRIGGER IF NOT EXISTS trg_counters_policies_ins AFTER INSERT ON policies BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('policies', '', 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('policy_status', COALESCE(NEW.status, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_policies_del AFTER DELETE ON policies BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('policies', '', -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('policy_status', COALESCE(OLD.status, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_policies_status AFTER UPDATE OF status ON policies
+        WHEN OLD.status IS NOT NEW.status BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('policy_status', COALESCE(OLD.status, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('policy_status', COALESCE(NEW.status, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+
+        -- policy_state: mode, distress, last channel
+        CREATE TRIGGER IF NOT EXISTS trg_counters_state_ins AFTER INSERT ON policy_state BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('mode', COALESCE(NEW.mode, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('distress', '', IFNULL(NEW.distress_flag, 0) = 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('channel', COALESCE(NEW.last_channel, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_state_del AFTER DELETE ON policy_state BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('mode', COALESCE(OLD.mode, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('distress', '', -(IFNULL(OLD.distress_flag, 0) = 1))
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('channel', COALESCE(OLD.last_channel, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_state_mode AFTER UPDATE OF mode ON policy_state
+        WHEN OLD.mode IS NOT NEW.mode BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('mode', COALESCE(OLD.mode, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('mode', COALESCE(NEW.mode, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_state_distress AFTER UPDATE OF distress_flag ON policy_state
+        WHEN (IFNULL(OLD.distress_flag, 0) = 1) IS NOT (IFNULL(NEW.distress_flag, 0) = 1) BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('distress', '', (IFNULL(NEW.distress_flag, 0) = 1) - (IFNULL(OLD.distress_flag, 0) = 1))
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_state_channel AFTER UPDATE OF last_channel ON policy_state
+        WHEN OLD.last_channel IS NOT NEW.last_channel BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('channel', COALESCE(OLD.last_channel, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('channel', COALESCE(NEW.last_channel, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+
+        -- escalation_cases: per status
+        CREATE TRIGGER IF NOT EXISTS trg_counters_escalation_ins AFTER INSERT ON escalation_cases BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('escalation_status', COALESCE(NEW.status, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_escalation_del AFTER DELETE ON escalation_cases BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('escalation_status', COALESCE(OLD.status, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_escalation_status AFTER UPDATE OF status ON escalation_cases
+        WHEN OLD.status IS NOT NEW.status BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('escalation_status', COALESCE(OLD.status, ''), -1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('escalation_status', COALESCE(NEW.status, ''), 1)
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+
+        -- audit_logs: hourly action buckets
+        CREATE TRIGGER IF NOT EXISTS trg_counters_audit_ins AFTER INSERT ON audit_logs BEGIN
+            INSERT INTO audit_action_buckets (bucket, action_type, count)
+            VALUES (strftime('%Y-%m-%d %H:00:00', COALESCE(NEW.created_at, CURRENT_TIMESTAMP)), COALESCE(NEW.action_type, ''), 1)
+            ON CONFLICT(bucket, action_type) DO UPDATE SET count = count + 1;
+        END;
+
+        -- Seed from existing data
+        INSERT OR REPLACE INTO dashboard_counters (counter, dim, value)
+        SELECT 'policies', '', COUNT(*) FROM policies
+        UNION ALL SELECT 'policy_status', COALESCE(status, ''), COUNT(*) FROM policies GROUP BY 2
+        UNION ALL SELECT 'mode', COALESCE(mode, ''), COUNT(*) FROM policy_state GROUP BY 2
+        UNION ALL SELECT 'distress', '', COALESCE(SUM(distress_flag = 1), 0) FROM policy_state
+        UNION ALL SELECT 'channel', COALESCE(last_channel, ''), COUNT(*) FROM policy_state GROUP BY 2
+        UNION ALL SELECT 'escalation_status', COALESCE(status, ''), COUNT(*) FROM escalation_cases GROUP BY 2;
+
+        INSERT OR REPLACE INTO audit_action_buckets (bucket, action_type, count)
+        SELECT strftime('%Y-%m-%d %H:00:00', created_at), COALESCE(action_type, ''), COUNT(*)
+        FROM audit_logs WHERE created_at >= datetime('now', '-7 days') GROUP BY 1, 2;
+    """),
+
+    (4, "keyset pagination indexes", """
+        -- /dashboard/policies: ORDER BY premium_due_date, policy_id (policy_id is TEXT, not the rowid)
+        DROP INDEX IF EXISTS idx_policies_due_date;
+        CREATE INDEX IF NOT EXISTS idx_policies_due_date_id ON policies(premium_due_date, policy_id);
+
+        -- /dashboard/customers: policy_count per customer, segment filter in customer_id order
+        CREATE INDEX IF NOT EXISTS idx_policies_customer ON policies(customer_id);
+        CREATE INDEX IF NOT EXISTS idx_customers_segment_id ON customers(segment, customer_id);
+
+        -- escalations / audit logs page on (..., case_id|id): INTEGER PRIMARY KEY is the rowid,
+        -- already the implicit tail of idx_escalation_status_priority / idx_audit_policy_created
+    """),
+
+    (5, "policy context change log", """
+        -- Cross-worker invalidation for app.db.context_cache: every write that changes what
+        -- load_policy_state / /renewal/status return appends the policy_id here; workers
+        -- poll for seq > last seen. Self-pruning: keeps the last 10000 changes.
+        CREATE TABLE IF NOT EXISTS context_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            policy_id TEXT
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_context_changes_prune AFTER INSERT ON context_changes BEGIN
+            DELETE FROM context_changes WHERE seq <= NEW.seq - 10000;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_context_policies_upd AFTER UPDATE ON policies BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (NEW.policy_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_policies_del AFTER DELETE ON policies BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (OLD.policy_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_customers_upd AFTER UPDATE ON customers BEGIN
+            INSERT INTO context_changes (policy_id)
+            SELECT policy_id FROM policies WHERE customer_id = NEW.customer_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_state_ins AFTER INSERT ON policy_state BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (NEW.policy_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_state_upd AFTER UPDATE ON policy_state BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (NEW.policy_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_state_del AFTER DELETE ON policy_state BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (OLD.policy_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_interactions_ins AFTER INSERT ON interactions BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (NEW.policy_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_escalation_ins AFTER INSERT ON escalation_cases BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (NEW.policy_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_context_escalation_upd AFTER UPDATE ON escalation_cases BEGIN
+            INSERT INTO context_changes (policy_id) VALUES (NEW.policy_id);
+        END;
+    """),
+    (6, "renewal job queue", """
+        -- Durable work queue for app.worker (see app.db.job_queue). A claim is one
+        -- UPDATE ... RETURNING, so any number of worker processes can share it.
+        CREATE TABLE IF NOT EXISTS renewal_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            queue TEXT NOT NULL DEFAULT 'renewal',
+            policy_id TEXT NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'QUEUED',  -- QUEUED | RUNNING | DONE | DEAD
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            lease_owner TEXT,
+            lease_expires_at TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+
+        -- Claim order: highest priority, then oldest due
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim ON renewal_jobs(queue, status, priority DESC, available_at, id);
+        CREATE INDEX IF NOT EXISTS idx_jobs_lease ON renewal_jobs(status, lease_expires_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_policy ON renewal_jobs(policy_id, created_at);
+    """),
+    (7, "renewal campaigns", """
+        -- Bulk campaigns (app.db.campaigns): the selection is frozen into campaign_policies
+        -- in priority order (rank) and fed into renewal_jobs a bounded number at a time.
+        CREATE TABLE IF NOT EXISTS campaigns (
+            campaign_id TEXT PRIMARY KEY,
+            name TEXT,
+            filters TEXT NOT NULL DEFAULT '{}',
+            max_concurrent INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'RUNNING',  -- RUNNING | PAUSED | CANCELLED | COMPLETED
+            total INTEGER NOT NULL DEFAULT 0,
+            created_by TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns(status);
+
+        CREATE TABLE IF NOT EXISTS campaign_policies (
+            campaign_id TEXT NOT NULL,
+            policy_id TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            job_id INTEGER,  -- NULL until fed to the queue
+            PRIMARY KEY (campaign_id, policy_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_campaign_policies_pending ON campaign_policies(campaign_id, job_id, rank);
+
+        ALTER TABLE renewal_jobs ADD COLUMN campaign_id TEXT;
+        ALTER TABLE renewal_jobs ADD COLUMN result TEXT;  -- last workflow node (COMPLETED, HUMAN_QUEUE, SKIPPED...)
+        CREATE INDEX IF NOT EXISTS idx_jobs_campaign ON renewal_jobs(campaign_id, status);
+    """),
+    (8, "per-policy single flight", """
+        -- Run lease (app.db.policy_lock): taken with a compare-and-set UPDATE before a
+        -- workflow starts, renewed as nodes finish, free again once expired.
+        ALTER TABLE policy_state ADD COLUMN run_owner TEXT;
+        ALTER TABLE policy_state ADD COLUMN run_job_id INTEGER;
+        ALTER TABLE policy_state ADD COLUMN run_lease_expires_at TIMESTAMP;
+
+        -- At most one active job per policy; enqueueing another coalesces onto it.
+        -- Existing duplicates are cancelled first, keeping a running job, else the oldest.
+        UPDATE renewal_jobs SET status='CANCELLED', last_error='duplicate of another active job',
+               lease_owner=NULL, lease_expires_at=NULL, updated_at=CURRENT_TIMESTAMP
+        WHERE status IN ('QUEUED', 'RUNNING', 'PAUSED') AND EXISTS (
+            SELECT 1 FROM renewal_jobs o
+            WHERE o.policy_id = renewal_jobs.policy_id AND o.id != renewal_jobs.id
+              AND o.status IN ('QUEUED', 'RUNNING', 'PAUSED')
+              AND ((o.status = 'RUNNING') > (renewal_jobs.status = 'RUNNING')
+                   OR ((o.status = 'RUNNING') = (renewal_jobs.status = 'RUNNING') AND o.id < renewal_jobs.id))
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_one_active ON renewal_jobs(policy_id)
+            WHERE status IN ('QUEUED', 'RUNNING', 'PAUSED');
+    """),
+    (9, "workflow checkpoints", """
+        -- LangGraph checkpoints (app.db.checkpoints), one thread per job; deleted when the run finishes
+        CREATE TABLE IF NOT EXISTS workflow_checkpoints (
+            thread_id TEXT NOT NULL,
+            checkpoint_ns TEXT NOT NULL DEFAULT '',
+            checkpoint_id TEXT NOT NULL,
+            parent_checkpoint_id TEXT,
+            type TEXT,
+            checkpoint BLOB,
+            metadata_type TEXT,
+            metadata BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+        );
+        CREATE TABLE IF NOT EXISTS workflow_checkpoint_writes (
+            thread_id TEXT NOT NULL,
+            checkpoint_ns TEXT NOT NULL DEFAULT '',
+            checkpoint_id TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            channel TEXT NOT NULL,
+            type TEXT,
+            value BLOB,
+            task_path TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+        );
+    """),
+    (10, "channel bandit", """
+        -- Thompson-sampling arms (app.agents.channel_bandit): outcomes per context bucket and channel
+        CREATE TABLE IF NOT EXISTS channel_bandit_arms (
+            context_key TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            successes REAL NOT NULL DEFAULT 0,
+            failures REAL NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (context_key, channel)
+        );
+        -- Last interactions.id folded into the arms
+        CREATE TABLE IF NOT EXISTS bandit_training (
+            name TEXT PRIMARY KEY,
+            last_interaction_id INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT OR IGNORE INTO bandit_training (name) VALUES ('channel');
+    """),
+    (11, "message templates", """
+        -- Greeting/closing variants written by the LLM for cohorts the built-in library lacks
+        CREATE TABLE IF NOT EXISTS message_templates (
+            language TEXT NOT NULL,
+            tone TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            greeting TEXT NOT NULL,
+            closing TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (language, tone, channel)
+        );
+    """),
+    (12, "payments ledger", """
+        -- Premium payments from the gateway webhook or bulk imports (app.db.payments);
+        -- payment_ref makes redelivered webhooks and re-run imports no-ops
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payment_ref TEXT NOT NULL UNIQUE,
+            policy_id TEXT NOT NULL,
+            amount REAL NOT NULL,
+            cycle_due_date TEXT,
+            paid_at TIMESTAMP NOT NULL,
+            source TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_payments_policy_cycle ON payments(policy_id, cycle_due_date);
+
+        -- Premium per policy status (paid vs outstanding on /dashboard/overview)
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_ins AFTER INSERT ON policies BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('premium_status', COALESCE(NEW.status, ''), IFNULL(NEW.annual_premium, 0))
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_del AFTER DELETE ON policies BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('premium_status', COALESCE(OLD.status, ''), -IFNULL(OLD.annual_premium, 0))
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_upd AFTER UPDATE OF status, annual_premium ON policies
+        WHEN OLD.status IS NOT NEW.status OR OLD.annual_premium IS NOT NEW.annual_premium BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('premium_status', COALESCE(OLD.status, ''), -IFNULL(OLD.annual_premium, 0))
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+            INSERT INTO dashboard_counters (counter, dim, value) VALUES ('premium_status', COALESCE(NEW.status, ''), IFNULL(NEW.annual_premium, 0))
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        INSERT OR REPLACE INTO dashboard_counters (counter, dim, value)
+        SELECT 'premium_status', COALESCE(status, ''), COALESCE(SUM(annual_premium), 0) FROM policies GROUP BY 2;
+    """),
+    (13, "contact counters and scheduled sends", """
+        -- reg_008 contact quota: outbound contacts per policy, channel and premium cycle
+        -- (the policy's premium_due_date when sent). Kept apart from interactions so the
+        -- count survives cold archival. Existing history counts towards the current cycle.
+        CREATE TABLE IF NOT EXISTS contact_counters (
+            policy_id TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            cycle_due_date TEXT NOT NULL,
+            contacts INTEGER NOT NULL DEFAULT 0,
+            last_contact_at TIMESTAMP,
+            PRIMARY KEY (policy_id, channel, cycle_due_date)
+        );
+        CREATE TRIGGER IF NOT EXISTS trg_contact_counters_ins AFTER INSERT ON interactions
+        WHEN NEW.message_direction = 'OUTBOUND' BEGIN
+            INSERT INTO contact_counters (policy_id, channel, cycle_due_date, contacts, last_contact_at)
+            SELECT NEW.policy_id, NEW.channel, COALESCE(premium_due_date, ''), 1, NEW.created_at
+            FROM policies WHERE policy_id = NEW.policy_id
+                ON CONFLICT(policy_id, channel, cycle_due_date)
+                DO UPDATE SET contacts = contacts + 1, last_contact_at = excluded.last_contact_at;
+        END;
+        INSERT OR REPLACE INTO contact_counters (policy_id, channel, cycle_due_date, contacts, last_contact_at)
+        SELECT i.policy_id, i.channel, COALESCE(p.premium_due_date, ''), COUNT(*), MAX(i.created_at)
+        FROM interactions i JOIN policies p ON p.policy_id = i.policy_id
+        WHERE i.message_direction = 'OUTBOUND' GROUP BY 1, 2, 3;
+
+        -- Approved messages held until the channel's next legal window (app.agents.send_scheduler)
+        CREATE TABLE IF NOT EXISTS scheduled_sends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            policy_id TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            content TEXT NOT NULL,
+            send_after TIMESTAMP NOT NULL,
+            status TEXT NOT NULL DEFAULT 'PENDING',  -- PENDING / SENDING / SENT / SUPERSEDED / CANCELLED
+            reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_scheduled_sends_due ON scheduled_sends(status, send_after);
+        CREATE INDEX IF NOT EXISTS idx_scheduled_sends_policy ON scheduled_sends(policy_id, status);
+    """),
+    (14, "cycle-paid premium", """
+        -- Payments against each policy's current cycle (its premium_due_date): cycle_paid once
+        -- they cover the instalment — annual_premium split by payment_mode, ₹1 slack for rounded
+        -- instalments. A new due date starts a new cycle, so the flag resets by itself.
+        CREATE VIEW IF NOT EXISTS policy_cycle AS
+        SELECT policy_id, status, premium_due_date, premium, instalment, paid_amount,
+               paid_amount > 0 AND paid_amount >= instalment - 1 AS cycle_paid
+        FROM (
+            SELECT p.policy_id, p.status, p.premium_due_date, IFNULL(p.annual_premium, 0) AS premium,
+                   IFNULL(p.annual_premium, 0) * 1.0 / CASE p.payment_mode
+                       WHEN 'Monthly' THEN 12 WHEN 'Quarterly' THEN 4
+                       WHEN 'Half-Yearly' THEN 2 WHEN 'Semi-Annual' THEN 2 ELSE 1 END AS instalment,
+                   (SELECT COALESCE(SUM(pay.amount), 0) FROM payments pay
+                    WHERE pay.policy_id = p.policy_id AND pay.cycle_due_date IS p.premium_due_date) AS paid_amount
+            FROM policies p
+        );
+
+        -- Annual premium per policy as paid (all of it once PAID/RENEWED, else what this cycle's
+        -- payments cover), outstanding (the rest) or lapsed
+        CREATE VIEW IF NOT EXISTS policy_premium AS
+        SELECT policy_id, 'paid' AS dim,
+               CASE WHEN status IN ('PAID', 'RENEWED') THEN premium WHEN status = 'LAPSED' THEN 0
+                    ELSE MIN(paid_amount, premium) END AS value
+        FROM policy_cycle
+        UNION ALL
+        SELECT policy_id, 'outstanding',
+               CASE WHEN status IN ('PAID', 'RENEWED', 'LAPSED') THEN 0 ELSE MAX(premium - paid_amount, 0) END
+        FROM policy_cycle
+        UNION ALL
+        SELECT policy_id, 'lapsed', CASE WHEN status = 'LAPSED' THEN premium ELSE 0 END FROM policy_cycle;
+
+        -- 'premium' replaces migration 12's per-status 'premium_status' counter. A policy's
+        -- share is taken out before it changes and added back after; a payment moves its
+        -- amount (up to the premium) from outstanding to paid.
+        DROP TRIGGER IF EXISTS trg_counters_premium_ins;
+        DROP TRIGGER IF EXISTS trg_counters_premium_del;
+        DROP TRIGGER IF EXISTS trg_counters_premium_upd;
+        DELETE FROM dashboard_counters WHERE counter = 'premium_status';
+
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_ins AFTER INSERT ON policies BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value)
+            SELECT 'premium', dim, value FROM policy_premium WHERE policy_id = NEW.policy_id
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_del BEFORE DELETE ON policies BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value)
+            SELECT 'premium', dim, -value FROM policy_premium WHERE policy_id = OLD.policy_id
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_upd_old BEFORE UPDATE OF status, annual_premium, premium_due_date ON policies
+        WHEN OLD.status IS NOT NEW.status OR OLD.annual_premium IS NOT NEW.annual_premium
+          OR OLD.premium_due_date IS NOT NEW.premium_due_date BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value)
+            SELECT 'premium', dim, -value FROM policy_premium WHERE policy_id = OLD.policy_id
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_upd_new AFTER UPDATE OF status, annual_premium, premium_due_date ON policies
+        WHEN OLD.status IS NOT NEW.status OR OLD.annual_premium IS NOT NEW.annual_premium
+          OR OLD.premium_due_date IS NOT NEW.premium_due_date BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value)
+            SELECT 'premium', dim, value FROM policy_premium WHERE policy_id = NEW.policy_id
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_counters_premium_pay AFTER INSERT ON payments BEGIN
+            INSERT INTO dashboard_counters (counter, dim, value)
+            SELECT 'premium', d.dim, d.sign * (MIN(pc.paid_amount, pc.premium) - MIN(pc.paid_amount - NEW.amount, pc.premium))
+            FROM policy_cycle pc, (SELECT 'paid' AS dim, 1 AS sign UNION ALL SELECT 'outstanding', -1) d
+            WHERE pc.policy_id = NEW.policy_id AND pc.premium_due_date IS NEW.cycle_due_date
+              AND COALESCE(pc.status, '') NOT IN ('PAID', 'RENEWED', 'LAPSED')
+                ON CONFLICT(counter, dim) DO UPDATE SET value = value + excluded.value;
+        END;
+
+        INSERT OR REPLACE INTO dashboard_counters (counter, dim, value)
+        SELECT 'premium', dim, COALESCE(SUM(value), 0) FROM policy_premium GROUP BY dim;
+    """),
+    (15, "scheduled send attempts", """
+        -- Claims count attempts; a send that keeps failing ends as status FAILED
+        -- (app.agents.send_scheduler.SEND_MAX_ATTEMPTS) instead of being retried forever
+        ALTER TABLE scheduled_sends ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+    """),
+]
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor = await db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return (await cursor.fetchone())[0]
+
+
+async def apply_migrations(db: aiosqlite.Connection) -> List[int]:
+    """Apply all pending migrations; returns the versions applied."""
+    current = await get_schema_version(db)
+    await db.commit()
+    applied = []
+    for version, name, sql in MIGRATIONS:
+        if version <= current:
+            continue
+        escaped_name = name.replace("'", "''")
+        try:
+            # executescript commits first, so wrap each migration in an explicit transaction
+            await db.executescript(
+                f"BEGIN;\n{sql}\n"
+                f"INSERT INTO schema_migrations (version, name) VALUES ({version}, '{escaped_name}');\n"
+                f"COMMIT;"
+            )
+        except Exception:
+            await db.rollback()
+            logger.error(f"[DB] Migration {version} ({name}) failed — rolled back")
+            raise
+        applied.append(version)
+        logger.info(f"[DB] Applied migration {version}: {name}")
+    return applied
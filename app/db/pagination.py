@@ -0,0 +1,182 @@
+"""
+Keyset (cursor) pagination + NDJSON streaming for list endpoints.
+A page is `ORDER BY <sort keys> LIMIT n+1`; the cursor is the sort-key tuple of the
+last row returned (opaque base64 JSON), so page N costs the same as page 1 and
+rows inserted mid-scan never shift or duplicate results. The last sort key must be
+unique (primary key) for the order to be stable.
+
+Usage:
+    page = Keyset([("p.premium_due_date", "premium_due_date", False), ("p.policy_id", "policy_id", False)])
+    rows, next_cursor = await fetch_page(sql, where, params, page, cursor, limit)
+    return StreamingResponse(stream_ndjson(sql, where, params, page), media_type=NDJSON_MEDIA_TYPE)
+"""
+import base64
+import json
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+from app.db.pool import read_db
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, width: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != width:
+        raise InvalidCursor("Cursor does not match this listing")
+    return values
+
+
+class Keyset:
+    """Sort keys as (sql_expr, row_key, descending). NULLs sort first, as in SQLite."""
+
+    def __init__(self, keys: List[Tuple[str, str, bool]]):
+        self.keys = keys
+
+    @property
+    def order_by(self) -> str:
+        return ", ".join(f"{expr} {'DESC' if desc else 'ASC'}" for expr, _, desc in self.keys)
+
+    def cursor_for(self, row) -> str:
+        return encode_cursor([row[key] for _, key, _ in self.keys])
+
+    def after(self, values: list) -> Tuple[str, list]:
+        """
+        WHERE clause selecting rows strictly after `values` in sort order.
+        Expanded form (a > ?) OR (a = ? AND b > ?) ... so mixed ASC/DESC keys work;
+        the leading bound on the first key lets SQLite seek the index.
+        """
+        clauses, params = [], []
+        for i, (expr, _, desc) in enumerate(self.keys):
+            parts, part_params = [], []
+            for j, (prev_expr, _, _) in enumerate(self.keys[:i]):
+                sql, p = _equals(prev_expr, values[j])
+                parts.append(sql)
+                part_params += p
+            sql, p = _beyond(expr, values[i], desc)
+            if sql is None:
+                continue
+            parts.append(sql)
+            part_params += p
+            clauses.append("(" + " AND ".join(parts) + ")")
+            params += part_params
+
+        if not clauses:
+            return "0", []
+        first_expr, _, first_desc = self.keys[0]
+        bound, bound_params = _at_or_beyond(first_expr, values[0], first_desc)
+        return f"{bound} AND ({' OR '.join(clauses)})", bound_params + params
+
+
+def _equals(expr: str, value) -> Tuple[str, list]:
+    if value is None:
+        return f"{expr} IS NULL", []
+    return f"{expr} = ?", [value]
+
+
+def _beyond(expr: str, value, desc: bool) -> Tuple[Optional[str], list]:
+    # NULL is the smallest value: nothing is below it, everything non-NULL is above it
+    if value is None:
+        return (None, []) if desc else (f"{expr} IS NOT NULL", [])
+    if desc:
+        return f"({expr} < ? OR {expr} IS NULL)", [value]
+    return f"{expr} > ?", [value]
+
+
+def _at_or_beyond(expr: str, value, desc: bool) -> Tuple[str, list]:
+    if value is None:
+        return (f"{expr} IS NULL", []) if desc else ("1", [])
+    if desc:
+        return f"({expr} <= ? OR {expr} IS NULL)", [value]
+    return f"{expr} >= ?", [value]
+
+
+def _paged_sql(sql: str, where: List[str], keyset: Keyset) -> str:
+    """`sql` is a SELECT ... FROM ... with no WHERE/ORDER BY/LIMIT; filters come in `where`."""
+    clause = f" WHERE {' AND '.join(f'({w})' for w in where)}" if where else ""
+    return f"{sql}{clause} ORDER BY {keyset.order_by} LIMIT ?"
+
+
+async def fetch_page(
+    sql: str,
+    where: List[str],
+    params: list,
+    keyset: Keyset,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of rows plus the cursor for the next page (None on the last page)."""
+    async with read_db() as db:
+        rows = await page_rows(db, sql, where, params, keyset, cursor, limit + 1)
+
+    next_cursor = keyset.cursor_for(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+async def page_rows(
+    db: aiosqlite.Connection,
+    sql: str,
+    where: List[str],
+    params: list,
+    keyset: Keyset,
+    cursor: Optional[str],
+    limit: int
+) -> List[dict]:
+    """Up to `limit` rows after `cursor` on any connection (hot DB or an archive segment)."""
+    where, params = list(where), list(params)
+    if cursor:
+        after_sql, after_params = keyset.after(decode_cursor(cursor, len(keyset.keys)))
+        where.append(after_sql)
+        params += after_params
+    rows = await db.execute_fetchall(_paged_sql(sql, where, keyset), params + [limit])
+    return [dict(r) for r in rows]
+
+
+async def stream_ndjson(
+    sql: str,
+    where: List[str],
+    params: list,
+    keyset: Keyset,
+    cursor: Optional[str] = None,
+    page_size: int = STREAM_PAGE_SIZE
+) -> AsyncIterator[str]:
+    """
+    Yield every matching row as one JSON line. Walks the keyset page by page and
+    iterates each page from an async cursor, so memory stays at one page and a
+    reader connection (and its WAL snapshot) is never pinned for a slow client.
+    """
+    while True:
+        page_where, page_params = list(where), list(params)
+        if cursor:
+            after_sql, after_params = keyset.after(decode_cursor(cursor, len(keyset.keys)))
+            page_where.append(after_sql)
+            page_params += after_params
+
+        last, lines = None, []
+        async with read_db() as db:
+            db_cursor = await db.execute(_paged_sql(sql, page_where, keyset), page_params + [page_size])
+            async for row in db_cursor:
+                lines.append(json.dumps(dict(row), default=str) + "\n")
+                last = row
+            await db_cursor.close()
+
+        for line in lines:
+            yield line
+        if last is None or len(lines) < page_size:
+            return
+        cursor = keyset.cursor_for(last)
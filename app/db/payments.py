@@ -0,0 +1,136 @@
+"""
+Payments ledger (payments, migration 12; policy_cycle view, migration 14).
+
+record_payments() takes gateway webhook events and bulk-import rows alike: each has a
+payment_ref (the gateway's id — a redelivered webhook or a re-run import is ignored),
+policy_id, amount and optionally paid_at. A payment counts towards the policy's current
+cycle (its premium_due_date when recorded). The cycle is paid once its payments cover
+the instalment — annual_premium split by payment_mode — which is derived from the
+ledger (policy_cycle.cycle_paid), so it resets when the due date moves on. Payments never
+change policies.status: a PAID status is per-policy and would close every later cycle too.
+Each payment moves its amount from outstanding to paid on the dashboard's premium counters,
+and a newly paid cycle credits the channel of the policy's last outbound message to the
+channel model.
+
+Policies in CLOSED_STATUSES, or whose current cycle is paid, get no renewal outreach
+(outreach_closed): /renewal/trigger refuses them, campaigns don't select them, and the
+runner skips them before any LLM work.
+
+Usage:
+    summary = await record_payments([{"payment_ref": "pay_123", "policy_id": "SLI-2298741",
+                                      "amount": 24000}], source="webhook")
+"""
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+from app.db.context_cache import invalidate_policy
+from app.db.pool import read_db, write_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+PAID_STATUSES = ("PAID", "RENEWED")
+CLOSED_STATUSES = PAID_STATUSES + ("LAPSED",)
+MAX_BATCH = 5000
+
+INSERT_SQL = """
+    INSERT OR IGNORE INTO payments (payment_ref, policy_id, amount, cycle_due_date, paid_at, source)
+    SELECT ?, policy_id, ?, premium_due_date, COALESCE(?, CURRENT_TIMESTAMP), ? FROM policies WHERE policy_id = ?
+    RETURNING policy_id
+"""
+
+CYCLE_SQL = """
+    SELECT policy_id, status, premium_due_date, premium, instalment, paid_amount, cycle_paid
+    FROM policy_cycle WHERE policy_id IN ({ids})
+"""
+
+# Campaign selection: no outreach once the current cycle is paid
+CYCLE_PAID_FILTER = "NOT EXISTS (SELECT 1 FROM policy_cycle pc WHERE pc.policy_id = p.policy_id AND pc.cycle_paid)"
+
+
+def outreach_closed(status: Optional[str], cycle_paid: bool) -> Optional[str]:
+    """Why a policy gets no renewal outreach, or None."""
+    if (status or "") in CLOSED_STATUSES:
+        return f"Policy is {status}"
+    if cycle_paid:
+        return "Premium for the current cycle is paid"
+    return None
+
+
+def _covered(paid_amount: float, due: float) -> bool:
+    # ₹1 slack for rounded instalments (same test as policy_cycle.cycle_paid)
+    return paid_amount > 0 and paid_amount >= due - 1
+
+
+async def record_payments(payments: List[dict], source: str) -> Dict[str, object]:
+    """
+    Record payments in one transaction; returns counts plus the refs for unknown
+    policies and the policies whose current cycle became paid.
+    """
+    recorded, amounts = 0, {}
+    async with write_db() as db:
+        for p in payments:
+            rows = await db.execute_fetchall(
+                INSERT_SQL, (p["payment_ref"], p["amount"], p.get("paid_at"), source, p["policy_id"])
+            )
+            if rows:
+                recorded += 1
+                amounts[p["policy_id"]] = amounts.get(p["policy_id"], 0) + p["amount"]
+        refs_by_policy = {p["policy_id"]: p["payment_ref"] for p in payments}
+        unknown = set(refs_by_policy)
+        ids = list(unknown)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            known = await db.execute_fetchall(
+                f"SELECT policy_id FROM policies WHERE policy_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            unknown -= {r[0] for r in known}
+
+        cycle_paid, audits = [], []
+        touched = list(amounts)
+        for i in range(0, len(touched), 500):
+            chunk = touched[i:i + 500]
+            for r in await db.execute_fetchall(CYCLE_SQL.format(ids=",".join("?" * len(chunk))), chunk):
+                before = r["paid_amount"] - amounts[r["policy_id"]]
+                if not r["cycle_paid"] or _covered(before, r["instalment"]):
+                    continue
+                cycle_paid.append(r["policy_id"])
+                if r["premium"] > 0 and _covered(r["paid_amount"], r["premium"]):
+                    audits.append((r["policy_id"], "PREMIUM_PAID",
+                                   f"Annual premium for cycle due {r['premium_due_date']} paid in full"))
+                else:
+                    audits.append((r["policy_id"], "INSTALMENT_PAID",
+                                   f"Instalment for cycle due {r['premium_due_date']} paid"))
+        await db.executemany(
+            "INSERT INTO audit_logs (policy_id, action_type, action_reason, triggered_by) VALUES (?, ?, ?, ?)",
+            [(pid, action, reason, f"Payments ({source})") for pid, action, reason in audits]
+        )
+    for policy_id in amounts:
+        invalidate_policy(policy_id)
+    if cycle_paid and settings.channel_bandit:
+        # Imported here: the bandit depends on the rules, which depend on this module
+        from app.agents.channel_bandit import record_payment_outcomes
+        try:
+            await record_payment_outcomes(cycle_paid)
+        except Exception as e:
+            logger.error(f"[PAYMENTS] Channel model not credited: {e}")
+    unknown_refs = [p["payment_ref"] for p in payments if p["policy_id"] in unknown]
+    if unknown_refs:
+        logger.warning(f"[PAYMENTS] {len(unknown_refs)} payments for unknown policies: {unknown_refs[:10]}")
+    logger.info(f"[PAYMENTS] {source}: {recorded}/{len(payments)} recorded, {len(cycle_paid)} cycles now paid")
+    return {
+        "received": len(payments),
+        "recorded": recorded,
+        "duplicates": len(payments) - recorded - len(unknown_refs),
+        "unknown_policy_refs": unknown_refs,
+        "cycle_paid_policies": cycle_paid,
+    }
+
+
+async def policy_payments(policy_id: str) -> List[dict]:
+    async with read_db() as db:
+        rows = await db.execute_fetchall(
+            "SELECT payment_ref, amount, cycle_due_date, paid_at, source FROM payments "
+            "WHERE policy_id=? ORDER BY paid_at DESC", (policy_id,)
+        )
+    return [dict(r) for r in rows]
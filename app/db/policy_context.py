@@ -0,0 +1,185 @@
+"""
+Policy context loader — RenewalState for one policy or thousands.
+Set-based: one policy/customer/state join and one windowed ROW_NUMBER() history query
+per page of policies, instead of two queries per policy. Multi-policy runs stream
+pages (iter_policy_states) so memory stays bounded by the page size.
+
+Usage:
+    state = await load_policy_state("SLI-2298741")
+    states = await load_policy_states(["SLI-2298741", "SLI-4456721"])
+    async for page in iter_policy_states(due_within_days=30, segment="Wealth Builder"):
+        ...
+"""
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.agents.state import RenewalState
+from app.db.context_cache import get_context_cache
+from app.db.pagination import Keyset, page_rows
+from app.db.pool import read_db
+
+HISTORY_LIMIT = 20
+PAGE_SIZE = 500
+
+CONTEXT_SQL = """
+    SELECT p.*, c.name, c.age, c.city, c.preferred_channel,
+           c.preferred_language, c.segment, c.customer_id as cust_id,
+           ps.current_node, ps.last_channel, ps.waiting_for,
+           ps.sentiment_score, ps.distress_flag, ps.objection_count, ps.mode,
+           (SELECT pc.cycle_paid FROM policy_cycle pc WHERE pc.policy_id = p.policy_id) AS cycle_paid
+    FROM policies p
+    JOIN customers c ON p.customer_id = c.customer_id
+    LEFT JOIN policy_state ps ON p.policy_id = ps.policy_id
+"""
+
+# Last N interactions per policy in one pass over idx_interactions_policy_created
+HISTORY_SQL = """
+    SELECT policy_id, channel, direction, content, sentiment_score, created_at FROM (
+        SELECT policy_id, channel, message_direction as direction, content, sentiment_score, created_at,
+               ROW_NUMBER() OVER (PARTITION BY policy_id ORDER BY created_at DESC) AS rn
+        FROM interactions WHERE policy_id IN ({ids})
+    ) WHERE rn <= ? ORDER BY policy_id, rn
+"""
+
+CONTEXT_ORDER = Keyset([
+    ("p.premium_due_date", "premium_due_date", False), ("p.policy_id", "policy_id", False)
+])
+
+
+def build_renewal_state(row, interactions: List[dict]) -> RenewalState:
+    """Initial workflow state from a CONTEXT_SQL row + its interaction history (newest first)."""
+    return RenewalState(
+        policy_id=row["policy_id"],
+        customer_id=row["cust_id"],
+        customer_name=row["name"],
+        customer_age=row["age"] or 0,
+        customer_city=row["city"] or "",
+        preferred_channel=row["preferred_channel"] or "Email",
+        preferred_language=row["preferred_language"] or "English",
+        segment=row["segment"] or "Standard",
+        policy_type=row["policy_type"] or "",
+        sum_assured=row["sum_assured"] or 0,
+        annual_premium=row["annual_premium"] or 0,
+        premium_due_date=str(row["premium_due_date"] or ""),
+        payment_mode=row["payment_mode"] or "",
+        fund_value=row["fund_value"],
+        policy_status=row["status"] or "ACTIVE",
+        cycle_paid=bool(row["cycle_paid"]),
+        graph_variant="full",
+        current_node=row["current_node"] or "ORCHESTRATOR",
+        selected_channel=None,
+        channel_justification=None,
+        critique_a_result=None,
+        execution_plan=None,
+        draft_message=None,
+        greeting=None,
+        closing=None,
+        final_message=None,
+        critique_b_result=None,
+        distress_flag=bool(row["distress_flag"]),
+        objection_count=row["objection_count"] or 0,
+        mode=row["mode"] or "AI",
+        escalate=False,
+        escalation_reason=None,
+        interaction_history=interactions,
+        rag_policy_docs=None,
+        rag_objections=None,
+        rag_regulations=None,
+        messages_sent=[],
+        audit_trail=[],
+        error=None
+    )
+
+
+async def _histories(db, policy_ids: List[str], history_limit: int) -> Dict[str, List[dict]]:
+    histories: Dict[str, List[dict]] = {pid: [] for pid in policy_ids}
+    if history_limit <= 0 or not policy_ids:
+        return histories
+    rows = await db.execute_fetchall(
+        HISTORY_SQL.format(ids=",".join("?" * len(policy_ids))), list(policy_ids) + [history_limit]
+    )
+    for r in rows:
+        record = dict(r)
+        histories[record.pop("policy_id")].append(record)
+    return histories
+
+
+async def load_policy_states(
+    policy_ids: List[str],
+    history_limit: int = HISTORY_LIMIT
+) -> Dict[str, RenewalState]:
+    """RenewalState per found policy_id (missing ids are absent), PAGE_SIZE ids per query pair."""
+    states: Dict[str, RenewalState] = {}
+    unique_ids = list(dict.fromkeys(policy_ids))
+    for i in range(0, len(unique_ids), PAGE_SIZE):
+        chunk = unique_ids[i:i + PAGE_SIZE]
+        async with read_db() as db:
+            rows = await db.execute_fetchall(
+                f"{CONTEXT_SQL} WHERE p.policy_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            histories = await _histories(db, [r["policy_id"] for r in rows], history_limit)
+        for row in rows:
+            states[row["policy_id"]] = build_renewal_state(row, histories[row["policy_id"]])
+    return states
+
+
+async def load_policy_state(policy_id: str, history_limit: int = HISTORY_LIMIT,
+                            fresh: bool = False) -> Optional[RenewalState]:
+    """
+    Load full policy + customer context (served from the context cache when warm).
+    fresh=True first applies every change other processes have logged, skipping the
+    sync rate limit — for callers that act on the context, e.g. under the run lease.
+    """
+    async def load():
+        return (await load_policy_states([policy_id], history_limit)).get(policy_id)
+
+    if history_limit != HISTORY_LIMIT:
+        return await load()
+    cache = get_context_cache()
+    if fresh and cache.enabled:
+        await cache.sync(force=True)
+    return await cache.get_or_load(policy_id, "context", load)
+
+
+async def iter_policy_states(
+    policy_ids: Optional[List[str]] = None,
+    due_within_days: Optional[int] = None,
+    status: Optional[str] = None,
+    segment: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+    history_limit: int = HISTORY_LIMIT
+) -> AsyncIterator[List[RenewalState]]:
+    """
+    Stream RenewalState pages for an explicit id list or a filter
+    (due within N days, policy status, customer segment), in due-date order.
+    """
+    if policy_ids is not None:
+        for i in range(0, len(policy_ids), page_size):
+            page = await load_policy_states(policy_ids[i:i + page_size], history_limit)
+            if page:
+                yield list(page.values())
+        return
+
+    where, params = [], []
+    if due_within_days is not None:
+        today = date.today()
+        where.append("p.premium_due_date BETWEEN ? AND ?")
+        params += [today.isoformat(), (today + timedelta(days=due_within_days)).isoformat()]
+    if status:
+        where.append("p.status = ?")
+        params.append(status)
+    if segment:
+        where.append("c.segment = ?")
+        params.append(segment)
+
+    cursor = None
+    while True:
+        async with read_db() as db:
+            rows = await page_rows(db, CONTEXT_SQL, where, params, CONTEXT_ORDER, cursor, page_size)
+            histories = await _histories(db, [r["policy_id"] for r in rows], history_limit)
+        if not rows:
+            return
+        yield [build_renewal_state(row, histories[row["policy_id"]]) for row in rows]
+        if len(rows) < page_size:
+            return
+        cursor = CONTEXT_ORDER.cursor_for(rows[-1])
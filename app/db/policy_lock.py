@@ -0,0 +1,92 @@
+"""
+Per-policy single flight — a run lease on policy_state (run_owner, run_job_id,
+run_lease_expires_at; migration 8).
+
+A workflow may only run while it holds its policy's lease. Taking it is a single
+compare-and-set UPDATE that succeeds only if the lease is free, expired, or already
+ours, so two workers (or a worker and a stray trigger) can never run the same policy
+at once. The runner renews the lease as each node finishes; a worker that crashes
+simply stops renewing and the lease is free again after POLICY_LEASE_S.
+
+Usage:
+    lease = await acquire_policy_lease("SLI-2298741", owner="host:1234/job-42", job_id=42)
+    if lease["acquired"]:
+        ...
+        await release_policy_lease("SLI-2298741", "host:1234/job-42")
+"""
+from typing import Optional
+
+from app.core.config import get_settings
+from app.db.pool import read_db, write_db
+
+settings = get_settings()
+
+ACQUIRE_SQL = """
+    UPDATE policy_state
+    SET run_owner=?, run_job_id=?, run_lease_expires_at=datetime('now', ?)
+    WHERE policy_id=?
+      AND (run_owner IS NULL OR run_owner=? OR run_lease_expires_at < datetime('now'))
+    RETURNING run_owner
+"""
+
+
+class PolicyLeaseLost(RuntimeError):
+    """The run's lease expired and may now belong to another run."""
+
+
+async def acquire_policy_lease(policy_id: str, owner: str, job_id: Optional[int] = None,
+                               lease_s: Optional[int] = None) -> dict:
+    """
+    Try to take the run lease. Returns {"acquired": True} or, when another run holds it,
+    {"acquired": False, "run_owner": ..., "run_job_id": ..., "run_lease_expires_at": ...}.
+    Unknown policies come back {"acquired": False, "run_owner": None}.
+    """
+    lease_s = lease_s or settings.policy_lease_s
+    async with write_db() as db:
+        # Policies created without a state row still need somewhere to keep the lease
+        await db.execute(
+            "INSERT OR IGNORE INTO policy_state (policy_id) SELECT policy_id FROM policies WHERE policy_id=?",
+            (policy_id,)
+        )
+        rows = await db.execute_fetchall(ACQUIRE_SQL, (owner, job_id, f"+{lease_s} seconds", policy_id, owner))
+        if rows:
+            return {"acquired": True}
+        holder = await db.execute_fetchall(
+            "SELECT run_owner, run_job_id, run_lease_expires_at FROM policy_state WHERE policy_id=?", (policy_id,)
+        )
+    if not holder:
+        return {"acquired": False, "run_owner": None, "run_job_id": None, "run_lease_expires_at": None}
+    return {"acquired": False, **dict(holder[0])}
+
+
+async def renew_policy_lease(policy_id: str, owner: str, lease_s: Optional[int] = None):
+    """Extend our lease; raises PolicyLeaseLost if it is no longer ours."""
+    lease_s = lease_s or settings.policy_lease_s
+    async with write_db() as db:
+        cursor = await db.execute(
+            "UPDATE policy_state SET run_lease_expires_at=datetime('now', ?) WHERE policy_id=? AND run_owner=?",
+            (f"+{lease_s} seconds", policy_id, owner)
+        )
+        if cursor.rowcount != 1:
+            raise PolicyLeaseLost(f"Run lease on {policy_id} lost by {owner}")
+
+
+async def release_policy_lease(policy_id: str, owner: str) -> bool:
+    async with write_db() as db:
+        cursor = await db.execute(
+            "UPDATE policy_state SET run_owner=NULL, run_job_id=NULL, run_lease_expires_at=NULL "
+            "WHERE policy_id=? AND run_owner=?",
+            (policy_id, owner)
+        )
+        return cursor.rowcount == 1
+
+
+async def current_run(policy_id: str) -> Optional[dict]:
+    """The live (unexpired) lease on a policy, if any."""
+    async with read_db() as db:
+        rows = await db.execute_fetchall(
+            "SELECT run_owner, run_job_id, run_lease_expires_at FROM policy_state "
+            "WHERE policy_id=? AND run_owner IS NOT NULL AND run_lease_expires_at >= datetime('now')",
+            (policy_id,)
+        )
+    return dict(rows[0]) if rows else None
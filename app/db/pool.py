@@ -0,0 +1,179 @@
+"""
+Process-wide async SQLite connection pool.
+One serialized writer connection + N reader connections, all in WAL mode,
+so concurrent readers never block behind the writer and no request pays
+connection setup. A background task runs PRAGMA optimize + WAL checkpoints.
+
+Usage:
+    async with read_db() as db:    # SELECTs
+        ...
+    async with write_db() as db:   # INSERT/UPDATE/DELETE — commits on exit, rolls back on error
+        ...
+"""
+import asyncio
+import os
+import zlib
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import aiosqlite
+
+from app.core.config import get_settings
+from app.utils.logger import logger
+
+settings = get_settings()
+
+
+def policy_shard(policy_id: str, shards: int) -> int:
+    """Stable shard of a policy (crc32, same in every process). Also SQL: policy_shard(policy_id, n)."""
+    return zlib.crc32(policy_id.encode("utf-8")) % shards
+
+
+class DBPool:
+    def __init__(self, db_path: str, readers: int = 4):
+        self.db_path = db_path
+        self.reader_count = max(1, readers)
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._all_readers = []
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
+        db = aiosqlite.connect(self.db_path)
+        # Daemon thread: a pool that is never closed must not block interpreter exit
+        db.daemon = True
+        await db
+        db.row_factory = aiosqlite.Row
+        await db.execute_fetchall(f"PRAGMA busy_timeout={settings.db_busy_timeout_ms}")
+        await db.execute_fetchall("PRAGMA synchronous=NORMAL")
+        await db.execute_fetchall(f"PRAGMA cache_size=-{settings.db_cache_size_kb}")
+        await db.execute_fetchall(f"PRAGMA mmap_size={settings.db_mmap_size}")
+        await db.execute_fetchall("PRAGMA temp_store=MEMORY")
+        await db.create_function("policy_shard", 2, policy_shard, deterministic=True)
+        if read_only:
+            await db.execute_fetchall("PRAGMA query_only=1")
+        return db
+
+    async def open(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        try:
+            self._writer = await self._connect()
+            # journal_mode is persistent in the DB file; set it once from the writer
+            await self._writer.execute_fetchall("PRAGMA journal_mode=WAL")
+            for _ in range(self.reader_count):
+                reader = await self._connect(read_only=True)
+                self._all_readers.append(reader)
+                self._readers.put_nowait(reader)
+        except Exception:
+            # aiosqlite connections are threads; close them or the process never exits
+            for db in [self._writer] + self._all_readers:
+                if db is not None:
+                    await db.close()
+            raise
+        if settings.db_maintenance_interval_s > 0:
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+        logger.info(f"[DB] Pool opened: 1 writer + {self.reader_count} readers (WAL) at {self.db_path}")
+
+    @asynccontextmanager
+    async def read(self):
+        db = await self._readers.get()
+        try:
+            yield db
+        finally:
+            self._readers.put_nowait(db)
+
+    @asynccontextmanager
+    async def write(self):
+        async with self._write_lock:
+            try:
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+    async def run_maintenance(self):
+        """PRAGMA optimize + passive WAL checkpoint (never blocks readers)."""
+        async with self._write_lock:
+            await self._writer.execute_fetchall("PRAGMA optimize")
+            await self._writer.execute_fetchall("PRAGMA wal_checkpoint(PASSIVE)")
+
+    async def _maintenance_loop(self):
+        while True:
+            await asyncio.sleep(settings.db_maintenance_interval_s)
+            try:
+                await self.run_maintenance()
+            except Exception as e:
+                logger.warning(f"[DB] Maintenance failed: {e}")
+
+    async def close(self):
+        task = self._maintenance_task
+        # A pool left by an earlier event loop: its task can only be cancelled while that loop is open
+        if task and not task.done() and not task.get_loop().is_closed():
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._maintenance_task = None
+        async with self._write_lock:
+            if self._writer:
+                await self._writer.execute_fetchall("PRAGMA optimize")
+                await self._writer.execute_fetchall("PRAGMA wal_checkpoint(TRUNCATE)")
+                await self._writer.close()
+                self._writer = None
+        for reader in self._all_readers:
+            await reader.close()
+        self._all_readers = []
+        logger.info("[DB] Pool closed")
+
+
+_pool: Optional[DBPool] = None
+_pool_opened: Optional[asyncio.Future] = None
+
+
+async def get_pool() -> DBPool:
+    """Return the process-wide pool, opening it lazily on first use (once per event loop)."""
+    global _pool, _pool_opened
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool.loop is not loop:
+        stale = _pool
+        _pool = DBPool(settings.sqlite_db_path, settings.db_pool_readers)
+        _pool.loop = loop
+        _pool_opened = asyncio.ensure_future(_replace(stale, _pool))
+    await _pool_opened
+    return _pool
+
+
+async def _replace(stale: Optional[DBPool], pool: DBPool):
+    # Close the previous loop's pool first, or its connection threads and maintenance task leak
+    if stale is not None:
+        try:
+            await stale.close()
+        except Exception as e:
+            logger.warning(f"[DB] Closing the previous event loop's pool failed: {e}")
+    await pool.open()
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+@asynccontextmanager
+async def read_db():
+    pool = await get_pool()
+    async with pool.read() as db:
+        yield db
+
+
+@asynccontextmanager
+async def write_db():
+    pool = await get_pool()
+    async with pool.write() as db:
+        yield db
@@ -0,0 +1,183 @@
+"""
+Write-behind queue for high-volume log writes (workflow_logs, audit_logs, interactions).
+Callers enqueue statements; a background flusher commits them in batched
+executemany transactions on the pool writer, flushed on size or time.
+
+Batching rules:
+- INSERTs are coalesced per statement into one executemany (row order preserved)
+- Everything else (UPDATEs) is replayed in submission order, consecutive
+  identical statements sharing one executemany
+
+Durability (WRITE_BEHIND_DURABILITY by default, or per call):
+- buffered      → enqueue and return; committed within WRITE_BEHIND_FLUSH_MS (lost on a hard crash)
+- group_commit  → caller waits until its batch commits (still one fsync per batch)
+- immediate     → bypass the queue, one transaction per call (pre-queue behaviour)
+
+Only workflow_logs are buffered (WORKFLOW_LOG_DURABILITY); the channel agents commit a
+send's interaction, audit row and policy_state together with enqueue_writes(...,
+"immediate"), so a crash can't lose a message that went out (and with it a reg_008 contact).
+
+The queue drains fully on shutdown (close_write_behind).
+"""
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.db.pool import write_db
+from app.utils.logger import logger
+
+settings = get_settings()
+
+DURABILITY_MODES = ("buffered", "group_commit", "immediate")
+
+
+class WriteBehindQueue:
+    def __init__(self, batch_size: int = 200, flush_interval_ms: int = 50, durability: str = "buffered"):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown write-behind durability '{durability}', expected one of {DURABILITY_MODES}")
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.durability = durability
+        self._buffer: List[Tuple[str, tuple, Optional[asyncio.Future]]] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"batches": 0, "rows": 0, "max_batch": 0}
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, sql: str, params: tuple = (), durability: Optional[str] = None):
+        await self.submit_many([(sql, params)], durability)
+
+    async def submit_many(self, statements: List[Tuple[str, tuple]], durability: Optional[str] = None):
+        """Queue statements in order; "immediate" runs them all in one transaction."""
+        durability = durability or self.durability
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown write-behind durability '{durability}', expected one of {DURABILITY_MODES}")
+        if self._closed or durability == "immediate":
+            async with write_db() as db:
+                for sql, params in statements:
+                    await db.execute(sql, params)
+            return
+
+        futures = []
+        for sql, params in statements:
+            future = self.loop.create_future() if durability == "group_commit" else None
+            self._buffer.append((sql, params, future))
+            if future is not None:
+                futures.append(future)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        if futures:
+            await asyncio.gather(*futures)
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Commit everything buffered so far (in batch_size chunks)."""
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch):
+        started = time.perf_counter()
+        try:
+            async with write_db() as db:
+                for sql, rows in _plan_batch(batch):
+                    await db.executemany(sql, rows)
+        except Exception as e:
+            logger.error(f"[WRITE_BEHIND] Batch of {len(batch)} failed ({e}); replaying row by row")
+            await self._replay_individually(batch)
+            return
+
+        for _, _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        logger.debug(f"[WRITE_BEHIND] Committed {len(batch)} rows in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    async def _replay_individually(self, batch):
+        # One bad row must not drop the rest of the batch
+        for sql, params, future in batch:
+            try:
+                async with write_db() as db:
+                    await db.execute(sql, params)
+            except Exception as e:
+                logger.error(f"[WRITE_BEHIND] Dropped write: {sql.split('(')[0].strip()} | {e}")
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                continue
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    async def close(self):
+        """Stop the flusher and drain every buffered write."""
+        self._closed = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+        await self.flush()
+        logger.info(f"[WRITE_BEHIND] Drained | batches={self.stats['batches']} rows={self.stats['rows']} "
+                    f"max_batch={self.stats['max_batch']}")
+
+
+def _plan_batch(batch) -> List[Tuple[str, List[tuple]]]:
+    """Turn queued (sql, params) into executemany groups — see module docstring for ordering rules."""
+    ordered: List[Tuple[str, List[tuple]]] = []
+    inserts = {}
+    for sql, params, _ in batch:
+        if sql.lstrip()[:6].upper() == "INSERT":
+            inserts.setdefault(sql, []).append(params)
+        elif ordered and ordered[-1][0] == sql:
+            ordered[-1][1].append(params)
+        else:
+            ordered.append((sql, [params]))
+    return ordered + list(inserts.items())
+
+
+_queue: Optional[WriteBehindQueue] = None
+
+
+def get_write_behind() -> WriteBehindQueue:
+    """Return the process-wide queue, starting its flusher lazily (once per event loop)."""
+    global _queue
+    loop = asyncio.get_running_loop()
+    if _queue is None or _queue.loop is not loop:
+        _queue = WriteBehindQueue(
+            settings.write_behind_batch_size,
+            settings.write_behind_flush_ms,
+            settings.write_behind_durability
+        )
+        _queue.start()
+    return _queue
+
+
+async def enqueue_write(sql: str, params: tuple = (), durability: Optional[str] = None):
+    await get_write_behind().submit(sql, params, durability)
+
+
+async def enqueue_writes(statements: List[Tuple[str, tuple]], durability: Optional[str] = None):
+    await get_write_behind().submit_many(statements, durability)
+
+
+async def close_write_behind():
+    global _queue
+    if _queue is not None:
+        queue, _queue = _queue, None
+        await queue.close()
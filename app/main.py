@@ -6,14 +6,25 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.db.database import init_db
+from app.db.pool import close_pool
+from app.db.write_behind import close_write_behind
+from app.db.counters import reconcile_loop
+from app.db.archive import retention_loop
+from app.worker import Worker
 from app.rag.chroma_store import init_chroma
 from app.api.auth import router as auth_router
 from app.api.renewal import router as renewal_router
 from app.api.dashboard import router as dashboard_router
+from app.api.campaigns import router as campaigns_router
+from app.api.payments import router as payments_router
 from fastapi.staticfiles import StaticFiles
 from app.utils.logger import logger
+from app.core.config import get_settings
+import asyncio
 import os
 
+settings = get_settings()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -23,10 +34,26 @@ async def lifespan(app: FastAPI):
     os.makedirs("static", exist_ok=True)
     await init_db()
     init_chroma()
+    background = []
+    if settings.counters_reconcile_interval_s > 0:
+        background.append(asyncio.create_task(reconcile_loop()))
+    if settings.retention_interval_s > 0:
+        background.append(asyncio.create_task(retention_loop()))
+    worker = worker_task = None
+    if settings.api_embedded_workers > 0:
+        worker = Worker(settings.api_embedded_workers)
+        worker_task = asyncio.create_task(worker.run())
     logger.info("✅ RenewAI ready — http://localhost:8000/docs")
     yield
     # Shutdown
     logger.info("🛑 RenewAI shutting down")
+    if worker:
+        worker.abort()  # running jobs go back to the queue for the next worker
+        await asyncio.gather(worker_task, return_exceptions=True)
+    for task in background:
+        task.cancel()
+    await close_write_behind()  # drain buffered log writes before the pool goes away
+    await close_pool()
 
 
 app = FastAPI(
@@ -67,6 +94,8 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(renewal_router)
 app.include_router(dashboard_router)
+app.include_router(campaigns_router)
+app.include_router(payments_router)
 
 # Mount Static Files
 os.makedirs("static", exist_ok=True)
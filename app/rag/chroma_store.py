@@ -1,9 +1,13 @@
 """
 Chroma vector store with hybrid search + reranking.
 Collections: objection_library, policy_documents, regulatory_guidelines
-Embedding: models/text-embedding-004 via Google Generative AI
+Embedding: models/text-embedding-004 via Google Generative AI,
+           or a local hashing embedder (EMBEDDING_PROVIDER=local) for offline runs
 """
 import os
+import re
+import hashlib
+import math
 import chromadb
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional
@@ -51,7 +55,43 @@ class GeminiEmbeddingFunction(chromadb.EmbeddingFunction):
         return embeddings
 
 
+class LocalHashEmbeddingFunction(chromadb.EmbeddingFunction):
+    """
+    Offline embedding: feature-hashed word unigrams + character trigrams, L2-normalised.
+    Deterministic and dependency-free — used for benchmarks and air-gapped runs.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim or settings.local_embedding_dim
+
+    def embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        words = re.findall(r"\w+", text.lower())
+        features = list(words)
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for feature in features:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vec[index] += sign
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def __call__(self, input: chromadb.Documents) -> chromadb.Embeddings:
+        return [self.embed(text) for text in input]
+
+
+def get_embedding_function() -> chromadb.EmbeddingFunction:
+    if settings.embedding_provider == "local":
+        return LocalHashEmbeddingFunction()
+    return GeminiEmbeddingFunction()
+
+
 def get_query_embedding(text: str) -> List[float]:
+    if settings.embedding_provider == "local":
+        return LocalHashEmbeddingFunction().embed(text)
     try:
         result = genai.embed_content(
             model=settings.embedding_model,
@@ -72,25 +112,17 @@ def get_collection(name: str) -> chromadb.Collection:
     client = get_chroma_client()
     return client.get_or_create_collection(
         name=name,
-        embedding_function=GeminiEmbeddingFunction()
+        embedding_function=get_embedding_function()
     )
 
 
-def hybrid_search_and_rerank(
-    collection_name: str,
-    query: str,
+def vector_query(
+    collection: chromadb.Collection,
+    query_embedding: List[float],
     n_results: int = 5,
-    metadata_filter: Optional[Dict] = None,
-    rerank_top_k: int = 3
+    metadata_filter: Optional[Dict] = None
 ) -> List[Dict[str, Any]]:
-    """
-    Hybrid search: vector similarity + keyword matching.
-    Reranking: score fusion of semantic similarity + BM25-style keyword overlap.
-    """
-    collection = get_collection(collection_name)
-
-    # Vector search
-    query_embedding = get_query_embedding(query)
+    """Stage 2 of hybrid search: nearest-neighbour lookup in a Chroma collection."""
     search_kwargs = {
         "query_embeddings": [query_embedding],
         "n_results": min(n_results, collection.count() or 1),
@@ -104,22 +136,35 @@ def hybrid_search_and_rerank(
     if not results["documents"] or not results["documents"][0]:
         return []
 
-    documents = results["documents"][0]
-    metadatas = results["metadatas"][0]
-    distances = results["distances"][0]
+    return [
+        {"id": doc_id, "document": doc, "metadata": meta, "distance": dist}
+        for doc_id, doc, meta, dist in zip(
+            results["ids"][0], results["documents"][0],
+            results["metadatas"][0], results["distances"][0]
+        )
+    ]
+
 
+def rerank_results(
+    query: str,
+    candidates: List[Dict[str, Any]],
+    rerank_top_k: int = 3,
+    semantic_weight: float = 0.7
+) -> List[Dict[str, Any]]:
+    """Stage 3 of hybrid search: fuse semantic similarity with keyword overlap and keep the top-k."""
     # Keyword overlap scoring (BM25-style approximation)
     query_tokens = set(query.lower().split())
     scored = []
-    for doc, meta, dist in zip(documents, metadatas, distances):
-        doc_tokens = set(doc.lower().split())
+    for candidate in candidates:
+        doc_tokens = set(candidate["document"].lower().split())
         keyword_score = len(query_tokens & doc_tokens) / max(len(query_tokens), 1)
-        semantic_score = 1 - dist  # cosine distance -> similarity
-        # Fused score: 70% semantic + 30% keyword
-        fused_score = 0.7 * semantic_score + 0.3 * keyword_score
+        semantic_score = 1 - candidate["distance"]  # cosine distance -> similarity
+        # Fused score: 70% semantic + 30% keyword by default
+        fused_score = semantic_weight * semantic_score + (1 - semantic_weight) * keyword_score
         scored.append({
-            "document": doc,
-            "metadata": meta,
+            "id": candidate["id"],
+            "document": candidate["document"],
+            "metadata": candidate["metadata"],
             "semantic_score": round(semantic_score, 4),
             "keyword_score": round(keyword_score, 4),
             "fused_score": round(fused_score, 4)
@@ -130,6 +175,26 @@ def hybrid_search_and_rerank(
     return scored[:rerank_top_k]
 
 
+def hybrid_search_and_rerank(
+    collection_name: str,
+    query: str,
+    n_results: int = 5,
+    metadata_filter: Optional[Dict] = None,
+    rerank_top_k: int = 3,
+    semantic_weight: float = 0.7
+) -> List[Dict[str, Any]]:
+    """
+    Hybrid search: vector similarity + keyword matching.
+    Reranking: score fusion of semantic similarity + BM25-style keyword overlap.
+    Stages (embed → vector query → rerank) are separate functions so
+    scripts/benchmark_rag.py can time each one.
+    """
+    collection = get_collection(collection_name)
+    query_embedding = get_query_embedding(query)
+    candidates = vector_query(collection, query_embedding, n_results, metadata_filter)
+    return rerank_results(query, candidates, rerank_top_k, semantic_weight)
+
+
 def add_documents(
     collection_name: str,
     documents: List[str],
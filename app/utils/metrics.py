@@ -0,0 +1,108 @@
+"""
+In-process counters and timings, cheap enough for the workflow hot path.
+Each worker process keeps its own `metrics`; sharded runs ship snapshot()s to the
+parent, which combines them with merge_snapshots().
+
+Usage:
+    metrics.incr("jobs.completed")
+    metrics.observe("node.planner", 0.82)
+    with metrics.timer("job"):
+        ...
+
+LLM usage (calls, tokens) is counted globally as llm.<name> and, inside a
+`with run_usage() as usage:` block, also per run — asyncio tasks and threads
+started in the block share its counter.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional
+
+_run_usage: ContextVar[Optional[Counter]] = ContextVar("run_usage", default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.timings: Dict[str, list] = {}  # name → [count, total_s, max_s]
+        self.started = time.time()
+
+    def incr(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def observe(self, name: str, seconds: float):
+        timing = self.timings.get(name)
+        if timing is None:
+            self.timings[name] = [1, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        """Picklable copy: {"counters", "timings": {name: {count, total_s, max_s}}, "uptime_s"}."""
+        return {
+            "counters": dict(self.counters),
+            "timings": {name: {"count": c, "total_s": round(t, 4), "max_s": round(m, 4)}
+                        for name, (c, t, m) in self.timings.items()},
+            "uptime_s": round(time.time() - self.started, 1)
+        }
+
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+        self.started = time.time()
+
+
+def track_usage(**counts: int):
+    """Count LLM usage, e.g. track_usage(calls=1, tokens_in=812, tokens_out=240)."""
+    for name, value in counts.items():
+        metrics.incr(f"llm.{name}", value)
+    usage = _run_usage.get()
+    if usage is not None:
+        usage.update(counts)
+
+
+@contextmanager
+def run_usage():
+    usage = Counter()
+    token = _run_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _run_usage.reset(token)
+
+
+def hit_rate(counters: Dict[str, int], name: str) -> Optional[float]:
+    """<name>.hit / (<name>.hit + <name>.miss), or None before either was counted."""
+    hits, misses = counters.get(f"{name}.hit", 0), counters.get(f"{name}.miss", 0)
+    return hits / (hits + misses) if hits + misses else None
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    """Sum counters and timings across processes (max of max, longest uptime)."""
+    merged = {"counters": Counter(), "timings": {}, "uptime_s": 0.0}
+    for snap in snapshots:
+        merged["counters"].update(snap["counters"])
+        merged["uptime_s"] = max(merged["uptime_s"], snap["uptime_s"])
+        for name, t in snap["timings"].items():
+            into = merged["timings"].setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            into["count"] += t["count"]
+            into["total_s"] = round(into["total_s"] + t["total_s"], 4)
+            into["max_s"] = max(into["max_s"], t["max_s"])
+    merged["counters"] = dict(merged["counters"])
+    for t in merged["timings"].values():
+        t["avg_s"] = round(t["total_s"] / t["count"], 4) if t["count"] else 0.0
+    return merged
+
+
+metrics = Metrics()
@@ -0,0 +1,346 @@
+"""
+RenewAI Worker — runs queued renewal workflows outside the web process.
+
+Each process leases jobs from renewal_jobs (app.db.job_queue) and runs up to
+WORKER_CONCURRENCY workflows at once, heartbeating its leases every JOB_LEASE_S / 3.
+Scale out by starting more processes — claims are atomic across processes.
+Workers on the default queue also top up running campaigns (app.db.campaigns) and
+release messages held for their reg_008 window (app.agents.send_scheduler).
+
+Sharded mode (--processes N / WORKER_PROCESSES) gets past the GIL on one box: the
+parent spawns N processes, each with its own event loop, DB pool and LLM client, and
+process i only claims policies with policy_shard(policy_id, N) == i. Children send
+metric snapshots (app.utils.metrics) to the parent every WORKER_METRICS_INTERVAL_S,
+which logs the combined throughput and restarts any child that dies.
+
+Shutdown: the first SIGINT/SIGTERM stops claiming and lets running workflows
+finish; a second one cancels them and hands their jobs back to the queue.
+
+Run: python -m app.worker
+     python -m app.worker --concurrency 8 --worker-id worker-a
+     python -m app.worker --processes 32 --concurrency 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue as queue_module
+import signal
+import socket
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+from app.agents.channel_bandit import train_bandit
+from app.agents.send_scheduler import send_scheduler
+from app.db.campaigns import feed_campaigns
+from app.db.checkpoints import prune_checkpoints
+from app.db.job_queue import (
+    DEFAULT_QUEUE, claim_jobs, complete_job, fail_job, heartbeat, prune_jobs, release_job
+)
+from app.utils.logger import logger
+from app.utils.metrics import hit_rate, merge_snapshots, metrics
+
+settings = get_settings()
+
+PRUNE_INTERVAL_S = 3600
+
+
+async def run_job(job: dict) -> str:
+    """Default handler: one renewal workflow per job; the last node is stored as the job result."""
+    from app.agents.runner import run_renewal
+    return await run_renewal(
+        job["policy_id"], job["payload"].get("override_channel"),
+        job_id=job["id"], owner=f"{job['lease_owner']}/job-{job['id']}",
+        variant=job["payload"].get("variant", "auto")
+    )
+
+
+class Worker:
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        queue: str = DEFAULT_QUEUE,
+        worker_id: Optional[str] = None,
+        handler: Callable[[dict], Awaitable] = run_job,
+        lease_s: Optional[int] = None,
+        poll_ms: Optional[int] = None,
+        shard: Optional[Tuple[int, int]] = None
+    ):
+        self.concurrency = max(1, concurrency or settings.worker_concurrency)
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.handler = handler
+        self.lease_s = lease_s or settings.job_lease_s
+        self.poll_interval = (poll_ms or settings.worker_poll_ms) / 1000
+        self.shard = shard  # (index, count)
+        self.running: Dict[int, asyncio.Task] = {}
+        self.stats = {"claimed": 0, "completed": 0, "retried": 0, "dead": 0, "lost": 0}
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    def stop(self):
+        """Stop claiming; run() returns once running jobs finish."""
+        self._stopping.set()
+        self._wakeup.set()
+
+    def _count(self, name: str):
+        self.stats[name] += 1
+        metrics.incr(f"jobs.{name}")
+
+    def abort(self):
+        """Cancel running jobs; their leases are released back to the queue."""
+        self.stop()
+        for task in self.running.values():
+            task.cancel()
+
+    async def _execute(self, job: dict):
+        job_id = job["id"]
+        started = time.perf_counter()
+        try:
+            result = await self.handler(job)
+        except asyncio.CancelledError:
+            await release_job(job_id, self.worker_id)
+            raise
+        except Exception as e:
+            metrics.observe("job", time.perf_counter() - started)
+            status = await fail_job(job_id, self.worker_id, f"{type(e).__name__}: {e}")
+            if status == "DEAD":
+                self._count("dead")
+                logger.error(f"[WORKER] Job {job_id} ({job['policy_id']}) dead-lettered after {job['attempts']} attempts: {e}")
+            elif status == "QUEUED":
+                self._count("retried")
+                logger.warning(f"[WORKER] Job {job_id} ({job['policy_id']}) failed attempt {job['attempts']}, will retry: {e}")
+        else:
+            metrics.observe("job", time.perf_counter() - started)
+            if await complete_job(job_id, self.worker_id, result if isinstance(result, str) else None):
+                self._count("completed")
+            else:
+                logger.warning(f"[WORKER] Job {job_id} finished after its lease was lost")
+        finally:
+            self.running.pop(job_id, None)
+            self._wakeup.set()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            try:
+                held = await heartbeat(self.worker_id, list(self.running), self.lease_s)
+            except Exception as e:
+                logger.warning(f"[WORKER] Heartbeat failed: {e}")
+                continue
+            for job_id in set(self.running) - held:
+                # Another worker may already have reclaimed it; don't run it twice
+                self._count("lost")
+                logger.warning(f"[WORKER] Lost lease on job {job_id} — cancelling")
+                self.running[job_id].cancel()
+
+    async def run(self):
+        shard = f" (shard {self.shard[0] + 1}/{self.shard[1]})" if self.shard else ""
+        logger.info(f"[WORKER] {self.worker_id} polling '{self.queue}' with {self.concurrency} slots{shard}")
+        heartbeats = asyncio.create_task(self._heartbeat_loop())
+        last_prune = last_feed = last_train = 0.0
+        try:
+            while not self._stopping.is_set():
+                claimed = []
+                try:
+                    if self.queue == DEFAULT_QUEUE and time.monotonic() - last_feed >= self.poll_interval:
+                        last_feed = time.monotonic()
+                        await feed_campaigns()
+                        if settings.contact_eligibility:
+                            await send_scheduler.tick()
+                    free = self.concurrency - len(self.running)
+                    claimed = await claim_jobs(self.worker_id, free, self.queue, self.lease_s, self.shard) if free else []
+                    if time.monotonic() - last_prune > PRUNE_INTERVAL_S:
+                        last_prune = time.monotonic()
+                        await prune_jobs(settings.job_retention_days)
+                        await prune_checkpoints(settings.job_retention_days)
+                    if settings.channel_bandit and time.monotonic() - last_train > settings.bandit_train_interval_s:
+                        last_train = time.monotonic()
+                        await train_bandit()
+                except Exception as e:
+                    logger.error(f"[WORKER] Claim failed: {e}")
+
+                for job in claimed:
+                    self._count("claimed")
+                    self.running[job["id"]] = asyncio.create_task(self._execute(job))
+
+                if not claimed or len(self.running) >= self.concurrency:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+
+            if self.running:
+                logger.info(f"[WORKER] Draining {len(self.running)} running jobs")
+                await asyncio.gather(*self.running.values(), return_exceptions=True)
+        finally:
+            heartbeats.cancel()
+        logger.info(
+            f"[WORKER] {self.worker_id} stopped — {self.stats}{format_rates(metrics.counters)}"
+            f"{format_variants(metrics.counters, metrics.snapshot()['timings'])}"
+        )
+
+
+def format_rates(counters: Dict[str, int]) -> str:
+    """LLM calls avoided: rule fast-path share and speculation hit rate, once either has happened."""
+    rates = [(label, hit_rate(counters, name)) for label, name in
+             (("rules fast path", "rules"), ("channel model confident", "bandit"),
+              ("speculation hit rate", "speculation"), ("greeting templates reused", "templates"),
+              ("compliant first draft", "compliance"))]
+    return "".join(f" | {label} {rate:.0%}" for label, rate in rates if rate is not None)
+
+
+def format_variants(counters: Dict[str, int], timings: Dict[str, dict]) -> str:
+    """Per graph variant: runs, average wall time and LLM calls/tokens per run."""
+    parts = []
+    for name, timing in sorted(timings.items()):
+        if not name.startswith("workflow.") or name.count(".") != 1 or not timing["count"]:
+            continue
+        runs = timing["count"]
+        calls = counters.get(f"{name}.calls", 0) / runs
+        tokens = (counters.get(f"{name}.tokens_in", 0) + counters.get(f"{name}.tokens_out", 0)) / runs
+        parts.append(f" | {name[len('workflow.'):]}: {runs} runs, {timing['total_s'] / runs:.1f}s, "
+                     f"{calls:.1f} LLM calls, {tokens:.0f} tokens per run")
+    return "".join(parts)
+
+
+async def serve(args, shard: Optional[Tuple[int, int]] = None, reports=None):
+    from app.db.database import init_db
+    from app.db.pool import close_pool
+    from app.db.write_behind import close_write_behind
+    from app.rag.chroma_store import init_chroma
+
+    await init_db()
+    init_chroma()
+    worker_id = f"{args.worker_id}-{shard[0]}" if args.worker_id and shard else args.worker_id
+    worker = Worker(args.concurrency, args.queue, worker_id, shard=shard)
+
+    def on_signal():
+        if worker._stopping.is_set():
+            logger.warning("[WORKER] Second signal — cancelling running jobs")
+            worker.abort()
+        else:
+            logger.info("[WORKER] Shutting down after running jobs finish (signal again to abort)")
+            worker.stop()
+
+    async def report_metrics():
+        while True:
+            await asyncio.sleep(settings.worker_metrics_interval_s)
+            reports.put((shard[0], metrics.snapshot()))
+
+    loop = asyncio.get_running_loop()
+    # Shards only listen to the parent (SIGTERM); Ctrl-C reaches the whole process group
+    for sig in (signal.SIGTERM,) if shard else (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, on_signal)
+    reporter = asyncio.create_task(report_metrics()) if reports is not None else None
+    try:
+        await worker.run()
+    finally:
+        if reporter:
+            reporter.cancel()
+            reports.put((shard[0], metrics.snapshot()))
+        await close_write_behind()
+        await close_pool()
+
+
+def run_shard(index: int, count: int, args, reports):
+    """Child process entry point: a fresh interpreter with its own loop, pool and LLM client."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(serve(args, (index, count), reports))
+
+
+def log_summary(latest: Dict[int, dict], count: int):
+    merged = merge_snapshots(latest.values())
+    counters, job = merged["counters"], merged["timings"].get("job", {})
+    completed = counters.get("jobs.completed", 0)
+    rate = completed / merged["uptime_s"] if merged["uptime_s"] else 0.0
+    per_shard = [latest[i]["counters"].get("jobs.completed", 0) if i in latest else 0 for i in range(count)]
+    logger.info(
+        f"[WORKER] {count} shards: {completed} completed ({rate:.2f}/s), "
+        f"{counters.get('jobs.retried', 0)} retried, {counters.get('jobs.dead', 0)} dead, "
+        f"avg job {job.get('avg_s', 0):.2f}s | per shard {per_shard}{format_rates(counters)}"
+        f"{format_variants(counters, merged['timings'])}"
+    )
+
+
+def supervise(args, processes: int):
+    """Parent of a sharded run: spawn, watch and restart shard processes, aggregate metrics."""
+    from app.db.database import init_db
+    from app.db.pool import close_pool
+
+    async def migrate():
+        await init_db()  # once here, so the shards don't race to apply migrations
+        await close_pool()
+    asyncio.run(migrate())
+
+    ctx = multiprocessing.get_context("spawn")
+    reports = ctx.Queue()
+    children: Dict[int, multiprocessing.Process] = {}
+    latest: Dict[int, dict] = {}
+    stopping = False
+
+    def start(index: int):
+        child = ctx.Process(target=run_shard, args=(index, processes, args, reports),
+                            name=f"renewai-worker-{index}", daemon=False)
+        child.start()
+        children[index] = child
+
+    def on_signal(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for child in children.values():
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)  # first: drain, second: abort
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    for index in range(processes):
+        start(index)
+    logger.info(f"[WORKER] Started {processes} shard processes")
+
+    last_summary = time.monotonic()
+    while children:
+        try:
+            index, snapshot = reports.get(timeout=1)
+            latest[index] = snapshot
+        except queue_module.Empty:
+            pass
+        for index, child in list(children.items()):
+            if child.is_alive():
+                continue
+            child.join()
+            del children[index]
+            if not stopping and child.exitcode != 0:
+                logger.error(f"[WORKER] Shard {index} exited with {child.exitcode} — restarting")
+                start(index)
+        if time.monotonic() - last_summary >= settings.worker_metrics_interval_s:
+            last_summary = time.monotonic()
+            log_summary(latest, processes)
+
+    while True:  # final snapshots sent on the way out
+        try:
+            index, snapshot = reports.get_nowait()
+            latest[index] = snapshot
+        except queue_module.Empty:
+            break
+    log_summary(latest, processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued renewal workflows")
+    parser.add_argument("--concurrency", type=int, default=None, help="Concurrent workflows per process (WORKER_CONCURRENCY)")
+    parser.add_argument("--processes", type=int, default=None, help="Shard across N processes (WORKER_PROCESSES)")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE, help="Queue to consume")
+    parser.add_argument("--worker-id", default=None, help="Lease owner name (default host:pid)")
+    args = parser.parse_args()
+    processes = args.processes or settings.worker_processes
+    if processes > 1:
+        supervise(args, processes)
+    else:
+        asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
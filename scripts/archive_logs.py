@@ -0,0 +1,56 @@
+"""
+Cold Archival — move interactions, audit_logs and workflow_logs rows older than the hot
+window into monthly compressed segments (ARCHIVE_DIR/renewai_YYYY-MM.db).
+Same job the server runs every RETENTION_INTERVAL_S; safe to re-run after a crash.
+
+Run: python scripts/archive_logs.py                  # RETENTION_HOT_DAYS
+     python scripts/archive_logs.py --hot-days 90 --vacuum
+     python scripts/archive_logs.py --list
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import get_settings
+from app.db.archive import list_segments, run_retention
+from app.db.pool import close_pool
+
+settings = get_settings()
+
+
+async def run(args):
+    try:
+        moved = await run_retention(args.hot_days, args.batch_size, vacuum=args.vacuum)
+    finally:
+        await close_pool()
+    for table, count in moved.items():
+        print(f"  ↳ {table}: {count} rows archived")
+    print(f"✅ Hot DB keeps the last {args.hot_days or settings.retention_hot_days} days")
+
+
+def show_segments():
+    segments = list_segments()
+    if not segments:
+        print(f"No archive segments in {settings.archive_dir}")
+    for month, path in segments:
+        print(f"  {month}  {os.path.getsize(path) / 1024:>10.1f} KB  {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive aged log rows into monthly cold segments")
+    parser.add_argument("--hot-days", type=int, default=None, help="Keep this many days hot (RETENTION_HOT_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per copy/delete batch")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the hot DB afterwards (blocks writers)")
+    parser.add_argument("--list", action="store_true", help="List archive segments and exit")
+    args = parser.parse_args()
+    if args.list:
+        show_segments()
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
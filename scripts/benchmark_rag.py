@@ -0,0 +1,213 @@
+"""
+RAG Retrieval Benchmark — recall@k, MRR and per-stage latency for hybrid_search_and_rerank.
+Indexes the populate_rag corpora into an isolated in-memory Chroma, runs the labeled
+query set in scripts/rag_benchmark_queries.json and compares retrieval backends head to head.
+
+Runs fully offline by default (local hashing embedder). Use --provider gemini to
+benchmark against the production embedding model instead.
+
+Run: python scripts/benchmark_rag.py
+     python scripts/benchmark_rag.py --n-results 8 --rerank-top-k 3 --semantic-weight 0.6
+     python scripts/benchmark_rag.py --backends hybrid,keyword --repeat 5 --json bench.json
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rag_benchmark_queries.json")
+STAGES = ["embed", "vector_query", "rerank"]
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+# Each backend returns (ranked ids, {stage: seconds}).
+
+class HybridBackend:
+    """Production path: Chroma vector query + fused semantic/keyword rerank."""
+    name = "hybrid"
+
+    def __init__(self, client: chromadb.Client, semantic_weight: float):
+        self.client = client
+        self.semantic_weight = semantic_weight
+
+    def search(self, collection_name: str, query: str, n_results: int, top_k: int) -> Tuple[List[str], Dict[str, float]]:
+        from app.rag.chroma_store import get_query_embedding, vector_query, rerank_results
+        collection = self.client.get_collection(collection_name)
+        timings = {}
+
+        t0 = time.perf_counter()
+        embedding = get_query_embedding(query)
+        t1 = time.perf_counter()
+        candidates = vector_query(collection, embedding, n_results)
+        t2 = time.perf_counter()
+        ranked = rerank_results(query, candidates, top_k, self.semantic_weight)
+        t3 = time.perf_counter()
+
+        timings["embed"], timings["vector_query"], timings["rerank"] = t1 - t0, t2 - t1, t3 - t2
+        return [r["id"] for r in ranked], timings
+
+
+class VectorOnlyBackend(HybridBackend):
+    """Chroma vector query ranked purely by semantic similarity (no keyword fusion)."""
+    name = "vector"
+
+    def __init__(self, client: chromadb.Client, semantic_weight: float):
+        super().__init__(client, 1.0)
+
+
+class KeywordBackend:
+    """Brute-force keyword overlap over the whole collection — no embeddings at all."""
+    name = "keyword"
+
+    def __init__(self, client: chromadb.Client, semantic_weight: float):
+        self.corpus = {}
+        for collection in client.list_collections():
+            name = collection if isinstance(collection, str) else collection.name
+            data = client.get_collection(name).get(include=["documents"])
+            self.corpus[name] = [
+                (doc_id, set(doc.lower().split())) for doc_id, doc in zip(data["ids"], data["documents"])
+            ]
+
+    def search(self, collection_name: str, query: str, n_results: int, top_k: int) -> Tuple[List[str], Dict[str, float]]:
+        t0 = time.perf_counter()
+        query_tokens = set(query.lower().split())
+        scored = [
+            (len(query_tokens & tokens) / max(len(query_tokens), 1), doc_id)
+            for doc_id, tokens in self.corpus[collection_name]
+        ]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        t1 = time.perf_counter()
+        return [doc_id for _, doc_id in scored[:top_k]], {"embed": 0.0, "vector_query": 0.0, "rerank": t1 - t0}
+
+
+BACKENDS = {b.name: b for b in (HybridBackend, VectorOnlyBackend, KeywordBackend)}
+
+
+# ── Index + metrics ───────────────────────────────────────────────────────────
+
+def build_index() -> chromadb.Client:
+    """Index the populate_rag corpora into a throwaway in-memory Chroma."""
+    from app.rag.chroma_store import get_embedding_function
+    from scripts.populate_rag import POLICY_DOCUMENTS, OBJECTIONS, REGULATIONS
+
+    client = chromadb.EphemeralClient(settings=chromadb.config.Settings(anonymized_telemetry=False))
+    for name, docs in (
+        ("policy_documents", POLICY_DOCUMENTS),
+        ("objection_library", OBJECTIONS),
+        ("regulatory_guidelines", REGULATIONS),
+    ):
+        collection = client.get_or_create_collection(name=name, embedding_function=get_embedding_function())
+        collection.upsert(
+            documents=[d["text"] for d in docs],
+            metadatas=[d["metadata"] for d in docs],
+            ids=[d["id"] for d in docs]
+        )
+    return client
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def run_backend(backend, queries: List[dict], n_results: int, top_k: int, repeat: int) -> dict:
+    recalls, reciprocal_ranks = [], []
+    latencies = {stage: [] for stage in STAGES + ["total"]}
+    per_collection: Dict[str, List[float]] = {}
+
+    for q in queries:
+        relevant = set(q["relevant"])
+        for i in range(repeat):
+            ids, timings = backend.search(q["collection"], q["query"], n_results, top_k)
+            for stage in STAGES:
+                latencies[stage].append(timings.get(stage, 0.0))
+            latencies["total"].append(sum(timings.values()))
+        # Ranking is deterministic, so score the last repetition only
+        hits = relevant & set(ids[:top_k])
+        recall = len(hits) / len(relevant)
+        recalls.append(recall)
+        per_collection.setdefault(q["collection"], []).append(recall)
+        rank = next((i + 1 for i, doc_id in enumerate(ids) if doc_id in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    return {
+        "backend": backend.name,
+        f"recall@{top_k}": round(statistics.mean(recalls), 4),
+        "mrr": round(statistics.mean(reciprocal_ranks), 4),
+        "recall_by_collection": {c: round(statistics.mean(v), 4) for c, v in per_collection.items()},
+        "latency_ms": {
+            stage: {
+                "p50": round(percentile(values, 50) * 1000, 3),
+                "p99": round(percentile(values, 99) * 1000, 3)
+            }
+            for stage, values in latencies.items()
+        }
+    }
+
+
+def print_report(results: List[dict], top_k: int):
+    print(f"\n{'backend':<10} {'recall@' + str(top_k):>10} {'MRR':>7} " +
+          " ".join(f"{s + ' p50/p99 ms':>24}" for s in STAGES + ["total"]))
+    print("-" * 135)
+    for r in results:
+        lat = " ".join(
+            f"{r['latency_ms'][s]['p50']:>11.3f}/{r['latency_ms'][s]['p99']:<12.3f}" for s in STAGES + ["total"]
+        )
+        print(f"{r['backend']:<10} {r[f'recall@{top_k}']:>10.4f} {r['mrr']:>7.4f} {lat}")
+    print()
+    for r in results:
+        print(f"[{r['backend']}] recall by collection: {r['recall_by_collection']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG retrieval quality and latency")
+    parser.add_argument("--provider", choices=["local", "gemini"], default="local",
+                        help="Embedding provider (default: local, fully offline)")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated: " + ",".join(BACKENDS))
+    parser.add_argument("--n-results", type=int, default=5, help="Vector query candidates (n_results)")
+    parser.add_argument("--rerank-top-k", type=int, default=3, help="Results kept after rerank (k for recall@k)")
+    parser.add_argument("--semantic-weight", type=float, default=0.7, help="Fusion weight for semantic score")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per query")
+    parser.add_argument("--queries", default=QUERIES_PATH, help="Labeled query set (JSON)")
+    parser.add_argument("--json", dest="json_out", help="Write full results to this JSON file")
+    args = parser.parse_args()
+
+    settings.embedding_provider = args.provider
+    with open(args.queries) as f:
+        queries = json.load(f)
+
+    print(f"[BENCH] Indexing corpora with '{args.provider}' embeddings...")
+    client = build_index()
+    print(f"[BENCH] {len(queries)} labeled queries | n_results={args.n_results} "
+          f"rerank_top_k={args.rerank_top_k} semantic_weight={args.semantic_weight}")
+
+    results = []
+    for name in args.backends.split(","):
+        backend = BACKENDS[name.strip()](client, args.semantic_weight)
+        results.append(run_backend(backend, queries, args.n_results, args.rerank_top_k, args.repeat))
+
+    print_report(results, args.rerank_top_k)
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\n[BENCH] Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
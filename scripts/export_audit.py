@@ -0,0 +1,148 @@
+"""
+IRDAI Audit Export — stream audit_logs, interactions and workflow_logs for a date range
+to gzip NDJSON, CSV or Parquet, grouped by policy, in constant memory.
+
+Resumable: after every chunk the output is fsynced and <output>.checkpoint.json records
+the last exported policy_id and the byte offset (NDJSON/CSV) or finished part files
+(Parquet). --resume truncates any partially written chunk and carries on from there.
+
+Run: python scripts/export_audit.py --from 2025-04-01 --to 2026-03-31 --output exports/audit_fy26.ndjson.gz
+     python scripts/export_audit.py --from 2025-04-01 --to 2026-03-31 --format csv --output exports/audit_fy26.csv
+     python scripts/export_audit.py --from 2025-04-01 --to 2026-03-31 --format parquet --output exports/audit_fy26/
+     python scripts/export_audit.py ... --resume
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.audit_export import EXPORT_FORMATS, encode_csv, encode_ndjson_gzip, iter_export_chunks, parquet_writer
+from app.db.pool import close_pool
+
+
+def checkpoint_path(output: str) -> str:
+    return output.rstrip("/\\") + ".checkpoint.json"
+
+
+def load_checkpoint(args) -> dict:
+    fresh = {"date_from": args.date_from, "date_to": args.date_to, "format": args.format,
+             "after_policy_id": "", "records": 0, "bytes": 0, "parts": 0, "complete": False}
+    if not args.resume or not os.path.exists(checkpoint_path(args.output)):
+        return fresh
+    with open(checkpoint_path(args.output)) as f:
+        checkpoint = json.load(f)
+    for key in ("date_from", "date_to", "format"):
+        if checkpoint[key] != fresh[key]:
+            sys.exit(f"❌ Checkpoint was written for {key}={checkpoint[key]}, not {fresh[key]}")
+    return checkpoint
+
+
+def save_checkpoint(output: str, checkpoint: dict):
+    tmp = checkpoint_path(output) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, checkpoint_path(output))
+
+
+async def export_stream_file(args, checkpoint: dict):
+    """NDJSON (gzip members) / CSV: append chunk, fsync, then advance the checkpoint."""
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    mode = "r+b" if checkpoint["bytes"] and os.path.exists(args.output) else "wb"
+    with open(args.output, mode) as f:
+        f.seek(checkpoint["bytes"])
+        f.truncate()
+        async for last_policy, records in iter_export_chunks(
+            args.date_from, args.date_to, checkpoint["after_policy_id"], args.chunk_policies, args.pause_ms
+        ):
+            if args.format == "csv":
+                f.write(encode_csv(records, header=checkpoint["bytes"] == 0))
+            elif records:
+                f.write(encode_ndjson_gzip(records))
+            f.flush()
+            os.fsync(f.fileno())
+            checkpoint.update(after_policy_id=last_policy, records=checkpoint["records"] + len(records), bytes=f.tell())
+            save_checkpoint(args.output, checkpoint)
+            print(f"  ↳ through {last_policy} | {checkpoint['records']} records")
+
+
+async def export_parquet(args, checkpoint: dict):
+    """Parquet: a directory of part files; a part only counts once it is closed."""
+    os.makedirs(args.output, exist_ok=True)
+    for stale in sorted(glob.glob(os.path.join(args.output, "part-*.parquet")))[checkpoint["parts"]:]:
+        os.remove(stale)
+
+    writer, chunks_in_part, pending = None, 0, None
+    async for last_policy, records in iter_export_chunks(
+        args.date_from, args.date_to, checkpoint["after_policy_id"], args.chunk_policies, args.pause_ms
+    ):
+        if writer is None:
+            writer = parquet_writer(os.path.join(args.output, f"part-{checkpoint['parts']:05d}.parquet"))
+            pending = {"records": 0}
+        writer.write(records)
+        pending.update(after_policy_id=last_policy, records=pending["records"] + len(records))
+        chunks_in_part += 1
+        if chunks_in_part >= args.chunks_per_part:
+            writer.close()
+            checkpoint.update(after_policy_id=pending["after_policy_id"], parts=checkpoint["parts"] + 1,
+                              records=checkpoint["records"] + pending["records"])
+            save_checkpoint(args.output, checkpoint)
+            print(f"  ↳ part {checkpoint['parts']} through {last_policy} | {checkpoint['records']} records")
+            writer, chunks_in_part = None, 0
+
+    if writer is not None:
+        writer.close()
+        checkpoint.update(after_policy_id=pending["after_policy_id"], parts=checkpoint["parts"] + 1,
+                          records=checkpoint["records"] + pending["records"])
+
+
+async def run(args):
+    checkpoint = load_checkpoint(args)
+    if checkpoint["complete"]:
+        print(f"✅ Export already complete ({checkpoint['records']} records) — {args.output}")
+        return
+    if checkpoint["after_policy_id"]:
+        print(f"⏩ Resuming after {checkpoint['after_policy_id']} ({checkpoint['records']} records so far)")
+
+    started = time.perf_counter()
+    try:
+        if args.format == "parquet":
+            await export_parquet(args, checkpoint)
+        else:
+            await export_stream_file(args, checkpoint)
+    finally:
+        await close_pool()
+
+    checkpoint["complete"] = True
+    save_checkpoint(args.output, checkpoint)
+    print(f"✅ Exported {checkpoint['records']} records {args.date_from}..{args.date_to} "
+          f"({args.format}) to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export IRDAI audit trail for a date range")
+    parser.add_argument("--from", dest="date_from", required=True, help="Start date YYYY-MM-DD (inclusive)")
+    parser.add_argument("--to", dest="date_to", required=True, help="End date YYYY-MM-DD (inclusive)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--output", required=True, help="Output file (NDJSON/CSV) or directory (Parquet)")
+    parser.add_argument("--resume", action="store_true", help="Continue from <output>.checkpoint.json")
+    parser.add_argument("--chunk-policies", type=int, default=None, help="Policies per chunk (AUDIT_EXPORT_CHUNK_POLICIES)")
+    parser.add_argument("--pause-ms", type=int, default=None, help="Pause between chunks (AUDIT_EXPORT_PAUSE_MS)")
+    parser.add_argument("--chunks-per-part", type=int, default=50, help="Parquet: chunks per part file")
+    args = parser.parse_args()
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("❌ Parquet export needs pyarrow: pip install pyarrow")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Payments Import — load a reconciled payments file (CSV) into the payments ledger.
+Columns: payment_ref, policy_id, amount[, paid_at]. Re-running the same file is safe:
+payment_refs already recorded are skipped. Policies whose current cycle is covered are
+marked PAID and leave renewal outreach.
+
+Run: python scripts/import_payments.py payments.csv
+     python scripts/import_payments.py payments.csv --batch-size 1000
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.payments import MAX_BATCH, record_payments
+from app.db.pool import close_pool
+
+
+def read_rows(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                amount = float(row["amount"])
+            except (KeyError, TypeError, ValueError):
+                amount = 0
+            if not row.get("payment_ref") or not row.get("policy_id") or amount <= 0:
+                print(f"  ⚠️  line {line} skipped: needs payment_ref, policy_id and a positive amount")
+                continue
+            yield {"payment_ref": row["payment_ref"].strip(), "policy_id": row["policy_id"].strip(),
+                   "amount": amount, "paid_at": (row.get("paid_at") or "").strip() or None}
+
+
+async def run(args):
+    rows = list(read_rows(args.file))
+    totals = {"recorded": 0, "duplicates": 0, "unknown": 0, "cycles": 0}
+    try:
+        for i in range(0, len(rows), args.batch_size):
+            summary = await record_payments(rows[i:i + args.batch_size], source=f"file:{os.path.basename(args.file)}")
+            totals["recorded"] += summary["recorded"]
+            totals["duplicates"] += summary["duplicates"]
+            totals["unknown"] += len(summary["unknown_policy_refs"])
+            totals["cycles"] += len(summary["cycle_paid_policies"])
+    finally:
+        await close_pool()
+    print(f"  ↳ {totals['duplicates']} already recorded, {totals['unknown']} for unknown policies")
+    print(f"✅ {totals['recorded']}/{len(rows)} payments recorded, {totals['cycles']} cycles now paid")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a payments CSV into the payments ledger")
+    parser.add_argument("file", help="CSV with payment_ref, policy_id, amount[, paid_at]")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH, help="Payments per transaction")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
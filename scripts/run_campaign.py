@@ -0,0 +1,102 @@
+"""
+Renewal Campaigns — start, watch and control bulk renewal runs.
+Workflows are executed by the workers (python -m app.worker); this only manages campaigns.
+
+Run: python scripts/run_campaign.py start --from 2026-11-01 --to 2026-11-30 --max-concurrent 150 --watch
+     python scripts/run_campaign.py start --from 2026-11-01 --to 2026-11-30 --segment "Wealth Builder" --status ACTIVE
+     python scripts/run_campaign.py status CMP-1A2B3C4D5E [--watch]
+     python scripts/run_campaign.py pause|resume|cancel CMP-1A2B3C4D5E
+     python scripts/run_campaign.py list
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.campaigns import create_campaign, get_campaign, list_campaigns, set_campaign_state
+from app.db.database import init_db
+from app.db.pool import close_pool
+
+FINAL_STATUSES = ("COMPLETED", "CANCELLED")
+
+
+def show(campaign: dict):
+    p = campaign["progress"]
+    print(f"{campaign['campaign_id']} [{campaign['status']}] {campaign['total']} policies | "
+          f"pending {p['pending']} · queued {p['queued']} · running {p['running']} · sent {p['sent']} · "
+          f"scheduled {p['scheduled']} · escalated {p['escalated']} · skipped {p['skipped']} · failed {p['failed']}"
+          + (f" · paused {p['paused']}" if p["paused"] else "")
+          + (f" · cancelled {p['cancelled']}" if p["cancelled"] else ""))
+
+
+async def watch(campaign_id: str, interval: float):
+    while True:
+        campaign = await get_campaign(campaign_id)
+        show(campaign)
+        if campaign["status"] in FINAL_STATUSES:
+            return
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    await init_db()
+    try:
+        if args.command == "start":
+            campaign = await create_campaign(args.date_from, args.date_to, args.segment, args.status,
+                                             args.max_concurrent, args.name, "cli")
+            print(f"✅ Campaign {campaign['campaign_id']} started with {campaign['total']} policies "
+                  f"({campaign['max_concurrent']} in flight)")
+            if args.watch:
+                await watch(campaign["campaign_id"], args.interval)
+        elif args.command == "list":
+            for campaign in await list_campaigns():
+                print(f"  {campaign['campaign_id']}  {campaign['status']:<10} {campaign['total']:>7} policies  "
+                      f"{campaign['created_at']}  {campaign['filters']}")
+        elif args.command == "status":
+            if not await get_campaign(args.campaign_id):
+                sys.exit(f"❌ Campaign {args.campaign_id} not found")
+            if args.watch:
+                await watch(args.campaign_id, args.interval)
+            else:
+                show(await get_campaign(args.campaign_id))
+        else:
+            try:
+                campaign = await set_campaign_state(args.campaign_id, args.command)
+            except ValueError as e:
+                sys.exit(f"❌ {e}")
+            if not campaign:
+                sys.exit(f"❌ Campaign {args.campaign_id} not found")
+            show(campaign)
+    finally:
+        await close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage bulk renewal campaigns")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start = commands.add_parser("start", help="Select matching policies and start a campaign")
+    start.add_argument("--from", dest="date_from", help="Premium due on or after YYYY-MM-DD")
+    start.add_argument("--to", dest="date_to", help="Premium due on or before YYYY-MM-DD")
+    start.add_argument("--segment", help="Customer segment")
+    start.add_argument("--status", help="Policy status (e.g. ACTIVE)")
+    start.add_argument("--max-concurrent", type=int, default=None, help="Jobs in flight (CAMPAIGN_MAX_CONCURRENT)")
+    start.add_argument("--name", help="Label shown in listings")
+
+    for action in ("status", "pause", "resume", "cancel"):
+        command = commands.add_parser(action, help=f"{action.capitalize()} a campaign")
+        command.add_argument("campaign_id")
+    commands.add_parser("list", help="List recent campaigns")
+
+    for name in ("start", "status"):
+        command = commands.choices[name]
+        command.add_argument("--watch", action="store_true", help="Print progress until the campaign ends")
+        command.add_argument("--interval", type=float, default=10, help="Seconds between progress lines")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -88,13 +88,20 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    async function fetchPolicies() {
-        const response = await fetchWithAuth('/dashboard/policies');
+    // /dashboard/policies is paged: next_cursor fetches the following page, null on the last one
+    const policiesMoreBtn = document.getElementById('policies-more-btn');
+    let policiesCursor = null;
+
+    async function fetchPolicies(append = false) {
+        const url = append && policiesCursor
+            ? `/dashboard/policies?cursor=${encodeURIComponent(policiesCursor)}`
+            : '/dashboard/policies';
+        const response = await fetchWithAuth(url);
         if (response && response.ok) {
             const data = await response.json();
             const tbody = document.querySelector('#policies-table tbody');
             if (!tbody) return;
-            tbody.innerHTML = '';
+            if (!append) tbody.innerHTML = '';
 
             data.policies.forEach(policy => {
                 const tr = document.createElement('tr');
@@ -110,9 +117,14 @@ document.addEventListener('DOMContentLoaded', () => {
                 `;
                 tbody.appendChild(tr);
             });
+
+            policiesCursor = data.next_cursor;
+            if (policiesMoreBtn) policiesMoreBtn.classList.toggle('hidden', !policiesCursor);
         }
     }
 
+    if (policiesMoreBtn) policiesMoreBtn.addEventListener('click', () => fetchPolicies(true));
+
     // Workflow Monitor Logic
     const modal = document.getElementById('workflow-modal');
     const closeModalBtn = document.getElementById('close-modal-btn');
@@ -131,6 +143,8 @@ document.addEventListener('DOMContentLoaded', () => {
         { id: 'CRITIQUE_B', label: 'Critique B' },
         { id: 'CHANNEL_SEND', label: 'Delivery' }
     ];
+    // Nodes a run ends on: sent, escalated (handed to the human queue) or held for its contact window
+    const terminalNodes = ['COMPLETED', 'ESCALATION', 'HUMAN_QUEUE', 'SCHEDULED'];
 
     window.triggerWorkflow = async (policyId) => {
         const response = await fetchWithAuth('/renewal/trigger', {
@@ -140,16 +154,18 @@ document.addEventListener('DOMContentLoaded', () => {
         });
 
         if (response && response.ok) {
-            startMonitor(policyId);
+            // The trigger only queues a job (or joins the policy's active one); a worker process runs it
+            const job = await response.json();
+            startMonitor(policyId, job.job_id);
         } else {
             alert('Could not trigger workflow. Check policy status.');
         }
     };
 
-    function startMonitor(policyId) {
+    function startMonitor(policyId, jobId) {
         modal.classList.remove('hidden');
         monitorPolicyId.textContent = policyId;
-        monitorStatus.textContent = 'RUNNING';
+        monitorStatus.textContent = 'QUEUED';
 
         timeline.innerHTML = workflowSteps.map((step, idx) => `
             <div class="step" id="step-${step.id}">
@@ -161,11 +177,25 @@ document.addEventListener('DOMContentLoaded', () => {
         logsContainer.innerHTML = '<p class="empty-msg">Agents connecting...</p>';
 
         if (monitorInterval) clearInterval(monitorInterval);
-        monitorInterval = setInterval(() => updateMonitor(policyId), 2000);
-        updateMonitor(policyId);
+        monitorInterval = setInterval(() => updateMonitor(policyId, jobId), 2000);
+        updateMonitor(policyId, jobId);
     }
 
-    async function updateMonitor(policyId) {
+    async function updateMonitor(policyId, jobId) {
+        // Until a worker claims the job, policy_state still shows the previous run
+        let job = null;
+        if (jobId) {
+            const jobRes = await fetchWithAuth(`/renewal/jobs/${jobId}`);
+            if (jobRes && jobRes.ok) job = await jobRes.json();
+        }
+        if (job && (job.status === 'QUEUED' || job.status === 'PAUSED')) {
+            monitorStatus.textContent = job.status === 'PAUSED'
+                ? `QUEUED (job ${job.id}, paused with its campaign)`
+                : `QUEUED (job ${job.id}${job.attempts ? `, retry ${job.attempts + 1}` : ''}) — waiting for a worker`;
+            return;
+        }
+        if (job && job.status === 'RUNNING') monitorStatus.textContent = 'RUNNING';
+
         const statusRes = await fetchWithAuth(`/renewal/status/${policyId}`);
         if (!statusRes || !statusRes.ok) return;
         const statusData = await statusRes.json();
@@ -204,11 +234,30 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         }
 
-        if (currentNode === 'COMPLETED' || currentNode === 'ESCALATION') {
-            monitorStatus.textContent = currentNode;
+        // With a job, its end decides: a run can also stop without moving current_node (e.g. SKIPPED)
+        if (job && (job.status === 'DEAD' || job.status === 'CANCELLED')) {
+            monitorStatus.textContent = job.status === 'DEAD' ? `FAILED (${job.last_error || 'dead-lettered'})` : 'CANCELLED';
+            clearInterval(monitorInterval);
+            return;
+        }
+        if (job && job.status === 'DONE' && !terminalNodes.includes(job.result)) {
+            monitorStatus.textContent = job.result || 'DONE';
+            clearInterval(monitorInterval);
+            return;
+        }
+        const endNode = job ? (job.status === 'DONE' ? job.result : null) : currentNode;
+        if (terminalNodes.includes(endNode)) {
+            monitorStatus.textContent = endNode === 'SCHEDULED' ? 'SCHEDULED (held for contact window)' : endNode;
             clearInterval(monitorInterval);
-            if (currentNode === 'COMPLETED') {
+            if (endNode === 'COMPLETED') {
                 document.querySelectorAll('.step').forEach(s => s.classList.add('completed'));
+            } else if (endNode === 'SCHEDULED') {
+                // Approved, but delivery waits for the window
+                const delivery = document.getElementById('step-CHANNEL_SEND');
+                if (delivery) {
+                    delivery.classList.remove('completed');
+                    delivery.classList.add('active');
+                }
             }
         }
     }
@@ -7,6 +7,18 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Before any test module imports app.core.config (settings are cached on first use)
+TEST_DB = "./data/renewai_test.db"
+os.environ["SQLITE_DB_PATH"] = TEST_DB
+os.environ["CHROMA_DB_PATH"] = "./data/chroma_test"
+
+
+def remove_test_db():
+    # The -wal/-shm files too: left behind, SQLite replays stale rows into a fresh DB
+    for path in (TEST_DB, TEST_DB + "-wal", TEST_DB + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -17,17 +29,16 @@ def event_loop():
 
 
 @pytest.fixture(autouse=True, scope="session")
-async def setup_test_db():
-    """Initialize test database before all tests."""
-    os.environ["SQLITE_DB_PATH"] = "./data/renewai_test.db"
-    os.environ["CHROMA_DB_PATH"] = "./data/chroma_test"
+def setup_test_db(event_loop):
+    """Initialize test database before all tests (on the tests' loop, which owns the DB pool)."""
     os.makedirs("data", exist_ok=True)
-    
+    remove_test_db()
+
     from app.db.database import init_db
-    await init_db()
+    from app.db.pool import close_pool
+    event_loop.run_until_complete(init_db())
     yield
-    
+
     # Cleanup test DB
-    test_db = "./data/renewai_test.db"
-    if os.path.exists(test_db):
-        os.remove(test_db)
+    event_loop.run_until_complete(close_pool())
+    remove_test_db()
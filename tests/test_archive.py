@@ -0,0 +1,82 @@
+"""
+Test Agent: Cold archival
+Tests that aged log rows move into compressed monthly segments and stay readable
+through the paginated audit trail and the bulk export.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import read_db, write_db
+from app.db import archive
+from app.db.archive import archive_table, fetch_page_with_archive, list_segments, open_segment
+from app.db.audit_export import iter_export_chunks
+from app.api.dashboard import AUDIT_ORDER
+
+# Before anything other tests write, so archiving here never touches their rows
+CUTOFF = "2000-12-31 00:00:00"
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_rows_and_reads_fall_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive.settings, "archive_dir", str(tmp_path))
+    policy_id = f"SLI-TEST-ARC-{uuid.uuid4().hex[:8]}"
+    async with write_db() as db:
+        await db.executemany(
+            "INSERT INTO audit_logs (policy_id, action_type, action_reason, created_at) VALUES (?, ?, ?, ?)",
+            [
+                (policy_id, "EMAIL_SENT", "may reason", "2000-05-01 10:00:00"),
+                (policy_id, "WHATSAPP_SENT", "june reason", "2000-06-02 10:00:00"),
+                (policy_id, "VOICE_CALL", "recent reason", "2026-01-01 10:00:00"),
+            ]
+        )
+
+    assert await archive_table("audit_logs", CUTOFF, batch_size=1) >= 2
+    assert [m for m, _ in list_segments()] == ["2000-05", "2000-06"]
+
+    async with read_db() as db:
+        hot = await db.execute_fetchall("SELECT action_type FROM audit_logs WHERE policy_id=?", (policy_id,))
+    assert [r[0] for r in hot] == ["VOICE_CALL"]
+
+    async with open_segment(list_segments()[0][1]) as segment:
+        raw = await segment.execute_fetchall("SELECT action_reason FROM audit_logs WHERE policy_id=?", (policy_id,))
+    assert isinstance(raw[0][0], bytes)
+
+    # Newest first across hot → 2000-06 → 2000-05, two rows per page
+    where, params = ["policy_id = ?"], [policy_id]
+    page, cursor = await fetch_page_with_archive("audit_logs", "SELECT * FROM audit_logs", where, params, AUDIT_ORDER, None, 2)
+    assert [r["action_type"] for r in page] == ["VOICE_CALL", "WHATSAPP_SENT"]
+    page, cursor = await fetch_page_with_archive("audit_logs", "SELECT * FROM audit_logs", where, params, AUDIT_ORDER, cursor, 2)
+    assert [(r["action_type"], r["action_reason"]) for r in page] == [("EMAIL_SENT", "may reason")]
+    assert cursor is None
+
+    records = []
+    async for _, chunk in iter_export_chunks("2000-01-01", "2000-12-31", pause_ms=0):
+        records += [r for r in chunk if r["policy_id"] == policy_id]
+    assert [r["action_reason"] for r in records] == ["may reason", "june reason"]
+
+
+@pytest.mark.asyncio
+async def test_archive_is_idempotent_after_partial_run(tmp_path, monkeypatch):
+    """A crash after the segment commit but before the hot delete must not duplicate rows."""
+    monkeypatch.setattr(archive.settings, "archive_dir", str(tmp_path))
+    policy_id = f"SLI-TEST-ARC-{uuid.uuid4().hex[:8]}"
+    async with write_db() as db:
+        cursor = await db.execute(
+            "INSERT INTO workflow_logs (policy_id, node_name, content, created_at) VALUES (?, 'planner', 'plan', ?)",
+            (policy_id, "2000-03-03 03:03:03")
+        )
+        row_id = cursor.lastrowid
+    async with open_segment(archive.segment_path("2000-03"), create=True) as segment:
+        await segment.execute(
+            "INSERT INTO workflow_logs (id, policy_id, node_name, content, created_at) VALUES (?, ?, 'planner', ?, ?)",
+            (row_id, policy_id, archive.compress_value("plan"), "2000-03-03 03:03:03")
+        )
+        await segment.commit()
+
+    await archive_table("workflow_logs", CUTOFF, batch_size=50)
+    rows = await archive.archived_rows(
+        "workflow_logs", "SELECT node_name, content FROM workflow_logs WHERE policy_id=?", (policy_id,)
+    )
+    assert rows == [{"node_name": "planner", "content": "plan"}]
@@ -0,0 +1,76 @@
+"""
+Test Agent: Audit export
+Tests that the bulk export groups all three log tables by policy, honours the
+date range, resumes after a checkpoint and encodes concatenable gzip chunks.
+"""
+import pytest
+import gzip
+import json
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import write_db
+from app.db.audit_export import iter_export_chunks, encode_ndjson_gzip, encode_csv, date_bounds
+
+# Far in the past so rows from other tests never fall inside the range
+DAY = "2001-02-03"
+
+
+async def seed(prefix):
+    policies = [f"{prefix}-A", f"{prefix}-B"]
+    async with write_db() as db:
+        for pid in policies:
+            await db.execute(
+                "INSERT INTO audit_logs (policy_id, action_type, triggered_by, created_at) VALUES (?, 'EMAIL_SENT', 'AI', ?)",
+                (pid, f"{DAY} 10:00:00"))
+            await db.execute(
+                "INSERT INTO interactions (policy_id, channel, message_direction, content, created_at) "
+                "VALUES (?, 'Email', 'OUTBOUND', 'hello', ?)", (pid, f"{DAY} 09:00:00"))
+            await db.execute(
+                "INSERT INTO workflow_logs (policy_id, node_name, content, created_at) VALUES (?, 'planner', 'plan', ?)",
+                (pid, f"{DAY} 11:00:00"))
+            # Outside the range
+            await db.execute(
+                "INSERT INTO audit_logs (policy_id, action_type, created_at) VALUES (?, 'OLD', '2001-02-01 10:00:00')",
+                (pid,))
+    return policies
+
+
+async def collect(after=""):
+    records, checkpoints = [], []
+    async for last_policy, chunk in iter_export_chunks(DAY, DAY, after, chunk_policies=7, pause_ms=0):
+        records += chunk
+        checkpoints.append(last_policy)
+    return records, checkpoints
+
+
+@pytest.mark.asyncio
+async def test_export_groups_by_policy_within_range():
+    prefix = f"SLI-TEST-EXP-{uuid.uuid4().hex[:8]}"
+    policies = await seed(prefix)
+    records, checkpoints = await collect()
+    ours = [r for r in records if r["policy_id"].startswith(prefix)]
+
+    assert [r["policy_id"] for r in ours] == [policies[0]] * 3 + [policies[1]] * 3
+    assert [r["record_type"] for r in ours[:3]] == ["interaction", "audit", "workflow"]
+    assert all(r["action_type"] != "OLD" for r in ours)
+    assert checkpoints == sorted(checkpoints)
+
+    resumed, _ = await collect(after=policies[0])
+    assert [r["policy_id"] for r in resumed if r["policy_id"].startswith(prefix)] == [policies[1]] * 3
+
+
+def test_encoders_and_bounds():
+    chunk_a = [{"policy_id": "P1", "content": "नमस्ते"}]
+    chunk_b = [{"policy_id": "P2", "content": "hi"}]
+    lines = gzip.decompress(encode_ndjson_gzip(chunk_a) + encode_ndjson_gzip(chunk_b)).decode().splitlines()
+    assert [json.loads(l)["policy_id"] for l in lines] == ["P1", "P2"]
+
+    csv_text = (encode_csv(chunk_a, header=True) + encode_csv(chunk_b)).decode()
+    assert csv_text.splitlines()[0].startswith("policy_id,created_at,record_type")
+    assert len(csv_text.splitlines()) == 3
+
+    assert date_bounds("2026-01-01", "2026-01-31") == ("2026-01-01", "2026-02-01")
+    with pytest.raises(ValueError):
+        date_bounds("2026-02-01", "2026-01-01")
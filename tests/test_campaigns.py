@@ -0,0 +1,113 @@
+"""
+Test Agent: Renewal campaigns
+Tests policy selection and ranking, bounded feeding into the job queue (past policies
+held by another campaign), pause/resume/cancel, progress counters and completion.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import read_db, write_db
+from app.db.campaigns import create_campaign, feed_campaign, get_campaign, set_campaign_state
+
+
+async def seed_policies():
+    """Five policies in a fresh segment: (suffix, due date, premium, mode)."""
+    tag = uuid.uuid4().hex[:8]
+    segment = f"SEG-{tag}"
+    rows = [
+        ("A", "2030-01-10", 10000, "AI"),
+        ("B", "2030-01-05", 20000, "AI"),
+        ("C", "2030-01-10", 50000, "AI"),
+        ("D", "2030-01-07", 90000, "HUMAN_CONTROL"),  # excluded
+        ("E", "2030-03-01", 99000, "AI"),             # outside the window
+    ]
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name, segment) VALUES (?, ?, ?)",
+                         (f"C-{tag}", "Campaign Test", segment))
+        for suffix, due, premium, mode in rows:
+            pid = f"SLI-TEST-CMP-{tag}-{suffix}"
+            await db.execute(
+                "INSERT INTO policies (policy_id, customer_id, premium_due_date, annual_premium, status) "
+                "VALUES (?, ?, ?, ?, 'ACTIVE')", (pid, f"C-{tag}", due, premium))
+            await db.execute("INSERT INTO policy_state (policy_id, mode) VALUES (?, ?)", (pid, mode))
+    return tag, segment
+
+
+async def finish_jobs(campaign_id, result):
+    async with write_db() as db:
+        await db.execute(
+            "UPDATE renewal_jobs SET status='DONE', result=? WHERE campaign_id=? AND status='QUEUED'",
+            (result, campaign_id))
+
+
+@pytest.mark.asyncio
+async def test_selection_ranking_and_bounded_feed():
+    tag, segment = await seed_policies()
+    campaign = await create_campaign("2030-01-01", "2030-01-31", segment, "ACTIVE", max_concurrent=2)
+    cid = campaign["campaign_id"]
+    assert campaign["total"] == 3 and campaign["status"] == "RUNNING"
+
+    async with read_db() as db:
+        ranked = await db.execute_fetchall(
+            "SELECT policy_id FROM campaign_policies WHERE campaign_id=? ORDER BY rank", (cid,))
+    # due date first, then larger premium
+    assert [r[0][-1] for r in ranked] == ["B", "C", "A"]
+
+    assert await feed_campaign(cid, 2) == 2
+    assert await feed_campaign(cid, 2) == 0  # already at the cap
+    assert (await get_campaign(cid))["progress"]["queued"] == 2
+
+    await finish_jobs(cid, "COMPLETED")
+    assert await feed_campaign(cid, 2) == 1
+    await finish_jobs(cid, "SCHEDULED")
+    assert await feed_campaign(cid, 2) == 0
+
+    done = await get_campaign(cid)
+    assert done["status"] == "COMPLETED"
+    assert {k: v for k, v in done["progress"].items() if v} == {"sent": 2, "scheduled": 1}
+
+
+@pytest.mark.asyncio
+async def test_pause_resume_cancel():
+    tag, segment = await seed_policies()
+    cid = (await create_campaign("2030-01-01", "2030-01-31", segment, max_concurrent=1))["campaign_id"]
+    await feed_campaign(cid, 1)
+
+    paused = await set_campaign_state(cid, "pause")
+    assert paused["status"] == "PAUSED"
+    assert paused["progress"]["paused"] == 1 and paused["progress"]["queued"] == 0
+    with pytest.raises(ValueError):
+        await set_campaign_state(cid, "pause")
+
+    resumed = await set_campaign_state(cid, "resume")
+    assert resumed["status"] == "RUNNING" and resumed["progress"]["queued"] == 1
+
+    cancelled = await set_campaign_state(cid, "cancel")
+    assert cancelled["status"] == "CANCELLED" and cancelled["finished_at"]
+    assert cancelled["progress"]["cancelled"] == 1 and cancelled["progress"]["pending"] == 2
+    assert await set_campaign_state("CMP-MISSING", "cancel") is None
+
+
+@pytest.mark.asyncio
+async def test_feed_passes_over_policies_held_by_another_campaign():
+    tag, segment = await seed_policies()
+    held = (await create_campaign("2030-01-01", "2030-01-05", segment, max_concurrent=1))["campaign_id"]
+    assert await feed_campaign(held, 1) == 1
+    await set_campaign_state(held, "pause")  # B's job is PAUSED in the other campaign
+
+    cid = (await create_campaign("2030-01-01", "2030-01-31", segment, max_concurrent=1))["campaign_id"]
+    assert await feed_campaign(cid, 1) == 1
+    async with read_db() as db:
+        fed = await db.execute_fetchall(
+            "SELECT policy_id FROM campaign_policies WHERE campaign_id=? AND job_id IS NOT NULL", (cid,))
+    assert [r[0][-1] for r in fed] == ["C"]  # B ranks first but is skipped, not retried forever
+
+    # Once the other campaign's job is gone, B is fed and the campaign can complete
+    await set_campaign_state(held, "cancel")
+    await finish_jobs(cid, "COMPLETED")
+    assert await feed_campaign(cid, 2) == 2
+    await finish_jobs(cid, "COMPLETED")
+    assert await feed_campaign(cid, 2) == 0
+    assert (await get_campaign(cid))["status"] == "COMPLETED"
@@ -0,0 +1,118 @@
+"""
+Test Agent: Channel bandit
+Tests incremental training from settled interactions (watermark, reply window),
+Thompson-sampling proposals with confidence, the orchestrator skipping the
+LLM when the model is confident, and payments crediting the last channel used.
+"""
+import random
+import uuid
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.orchestrator as orchestrator
+from app.agents.channel_bandit import ChannelBandit, context_keys, state_context, train_bandit
+from app.db.payments import record_payments
+from app.db.pool import read_db, write_db
+
+
+async def seed_history(segment, n=30):
+    """n customers in a fresh segment: WhatsApp reminders get replies, Email ones don't."""
+    async with write_db() as db:
+        for i in range(n):
+            cid, pid = f"C-{segment}-{i}", f"SLI-TEST-BANDIT-{segment}-{i}"
+            await db.execute("INSERT INTO customers (customer_id, name, age, segment, preferred_language) "
+                             "VALUES (?, 'Bandit Test', 35, ?, 'English')", (cid, segment))
+            await db.execute("INSERT INTO policies (policy_id, customer_id, premium_due_date) "
+                             "VALUES (?, ?, date('now', '-5 days'))", (pid, cid))
+            rows = [
+                ("Email", "OUTBOUND", "-20 days", 0.0),      # reply comes 11 days later: no credit
+                ("WhatsApp", "OUTBOUND", "-9 days", 0.0),
+                ("WhatsApp", "INBOUND", "-8 days", 0.4),     # inside the reply window
+            ]
+            if i == n - 1:
+                rows.append(("Voice", "OUTBOUND", "-1 hours", 0.0))  # not settled yet
+            for channel, direction, age, sentiment in rows:
+                await db.execute(
+                    "INSERT INTO interactions (policy_id, channel, message_direction, content, sentiment_score, created_at) "
+                    "VALUES (?, ?, ?, 'msg', ?, datetime('now', ?))",
+                    (pid, channel, direction, sentiment, age))
+
+
+def state(segment, **overrides):
+    return {"policy_id": "SLI-TEST-BANDIT", "segment": segment, "customer_age": 35, "preferred_language": "English",
+            "premium_due_date": "2020-01-01", "preferred_channel": "Email", "policy_status": "ACTIVE",
+            "distress_flag": False, "objection_count": 0, "customer_name": "Bandit Test", "customer_city": "Pune",
+            "policy_type": "Term", "annual_premium": 1, **overrides}
+
+
+@pytest.mark.asyncio
+async def test_training_and_confident_proposal():
+    segment = f"SEG-{uuid.uuid4().hex[:8]}"
+    await seed_history(segment)
+    await train_bandit(batch=50)
+
+    fine, coarse = context_keys(segment, 35, "English", -1, None)
+    async with read_db() as db:
+        arms = {r[0]: (r[1], r[2]) for r in await db.execute_fetchall(
+            "SELECT channel, successes, failures FROM channel_bandit_arms WHERE context_key=?", (coarse,))}
+        pending = await db.execute_fetchall(
+            "SELECT COUNT(*) FROM interactions i, bandit_training t "
+            "WHERE i.id > t.last_interaction_id AND i.message_direction='OUTBOUND' AND i.policy_id LIKE ?", (f"%{segment}-29",))
+    assert arms["WhatsApp"] == (30, 0) and arms["Email"] == (0, 30)
+    assert "Voice" not in arms and pending[0][0] == 1  # the fresh Voice message waits for its window
+
+    await train_bandit()  # nothing new settled: no double counting
+    async with read_db() as db:
+        again = await db.execute_fetchall(
+            "SELECT successes FROM channel_bandit_arms WHERE context_key=? AND channel='WhatsApp'", (coarse,))
+    assert again[0][0] == 30
+
+
+@pytest.mark.asyncio
+async def test_proposal_confidence_and_orchestrator_skip(monkeypatch):
+    segment = f"SEG-{uuid.uuid4().hex[:8]}"
+    bandit = ChannelBandit(rng=random.Random(7))
+    await bandit.refresh()
+    history = [{"channel": "Email", "direction": "INBOUND", "content": "ok"}]
+    fine, coarse = state_context(state(segment, interaction_history=history))
+    bandit.arms[(fine, "WhatsApp")] = (40, 2)
+    bandit.arms[(fine, "Email")] = (5, 30)
+    bandit.arms[(fine, "Voice")] = (3, 20)
+
+    channel, confidence = await bandit.propose(state(segment, interaction_history=history))
+    assert channel == "WhatsApp" and confidence > 0.95
+    assert (await bandit.propose(state(segment), exclude=["WhatsApp", "Email", "Voice"])) is None
+    unsure = await ChannelBandit(rng=random.Random(7)).propose(state(f"SEG-{uuid.uuid4().hex[:8]}"))
+    assert unsure[1] < 0.8  # no data: every channel equally likely
+
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+    monkeypatch.setattr(orchestrator, "call_llm_json", no_llm)
+    monkeypatch.setattr(orchestrator, "channel_bandit", bandit)
+    result = await orchestrator.orchestrator_node(state(segment, interaction_history=history))
+    assert result["selected_channel"] == "WhatsApp" and result["current_node"] == "CRITIQUE_A"
+    assert "Channel model" in result["audit_trail"][0]
+
+
+@pytest.mark.asyncio
+async def test_payment_credits_last_outbound_channel():
+    segment = f"SEG-PAY-{uuid.uuid4().hex[:8]}"
+    pid = f"SLI-TEST-BANDIT-{segment}"
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name, age, segment, preferred_language) "
+                         "VALUES (?, 'Bandit Test', 35, ?, 'English')", (f"C-{segment}", segment))
+        await db.execute("INSERT INTO policies (policy_id, customer_id, annual_premium, payment_mode, premium_due_date) "
+                         "VALUES (?, ?, 12000, 'Monthly', date('now', '+10 days'))", (pid, f"C-{segment}"))
+        await db.executemany(
+            "INSERT INTO interactions (policy_id, channel, message_direction, content, created_at) "
+            "VALUES (?, ?, 'OUTBOUND', 'msg', datetime('now', ?))",
+            [(pid, "Email", "-3 days"), (pid, "Voice", "-1 days")])
+
+    await record_payments([{"payment_ref": f"pay-{segment}", "policy_id": pid, "amount": 1000}], "webhook")
+    async with read_db() as db:
+        arms = await db.execute_fetchall(
+            "SELECT context_key, channel, successes, failures FROM channel_bandit_arms WHERE context_key IN (?, ?)",
+            context_keys(segment, 35, "English", 11, None))
+    assert sorted(tuple(r) for r in arms) == [
+        (f"{segment}|30-44|English|8-30d|none", "Voice", 1, 0), (f"segment|{segment}", "Voice", 1, 0)]
@@ -0,0 +1,99 @@
+"""
+Test Agent: Workflow checkpoints
+Tests that a queued run which dies mid-graph resumes after the last finished node
+on its next attempt, and that checkpoints are deleted once the run completes.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.graph import StateGraph, END
+
+import app.agents.runner as runner
+from app.agents.state import RenewalState
+from app.db.checkpoints import checkpointer, prune_checkpoints
+from app.db.pool import read_db, write_db
+
+
+def stub_graph(calls, fail_once):
+    """orchestrator → planner → send, recording calls; planner fails on its first call."""
+    def node(name, next_node):
+        async def run(state):
+            calls.append(name)
+            if name == "planner" and fail_once:
+                fail_once.pop()
+                raise RuntimeError("worker killed")
+            return {"current_node": next_node, "audit_trail": [name]}
+        return run
+
+    graph = StateGraph(RenewalState)
+    graph.add_node("orchestrator", node("orchestrator", "PLANNER"))
+    graph.add_node("planner", node("planner", "SEND"))
+    graph.add_node("send", node("send", "COMPLETED"))
+    graph.set_entry_point("orchestrator")
+    graph.add_edge("orchestrator", "planner")
+    graph.add_edge("planner", "send")
+    graph.add_edge("send", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+async def seed_policy():
+    tag = uuid.uuid4().hex[:8]
+    pid = f"SLI-TEST-CKPT-{tag}"
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name) VALUES (?, 'Checkpoint Test')", (f"C-{tag}",))
+        await db.execute("INSERT INTO policies (policy_id, customer_id) VALUES (?, ?)", (pid, f"C-{tag}"))
+        await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+    return pid
+
+
+async def checkpoint_count(thread_id):
+    async with read_db() as db:
+        rows = await db.execute_fetchall("SELECT COUNT(*) FROM workflow_checkpoints WHERE thread_id=?", (thread_id,))
+    return rows[0][0]
+
+
+@pytest.mark.asyncio
+async def test_retry_resumes_after_last_finished_node(monkeypatch):
+    calls = []
+    graph = stub_graph(calls, fail_once=[True])
+    monkeypatch.setattr(runner, "get_workflow", lambda checkpointed=False, variant="full": graph)
+    pid = await seed_policy()
+    job_id = int(uuid.uuid4().int % 10**9)
+    thread = runner.run_thread_id(job_id)
+
+    with pytest.raises(RuntimeError):
+        await runner.run_renewal(pid, job_id=job_id, owner="w1")
+    assert calls == ["orchestrator", "planner"]
+    assert await checkpoint_count(thread) > 0
+
+    # Next attempt (another worker): orchestrator is not run again
+    assert await runner.run_renewal(pid, job_id=job_id, owner="w2") == "COMPLETED"
+    assert calls == ["orchestrator", "planner", "planner", "send"]
+    assert await checkpoint_count(thread) == 0
+
+
+@pytest.mark.asyncio
+async def test_finished_thread_is_not_rerun_and_stale_threads_are_pruned(monkeypatch):
+    calls = []
+    graph = stub_graph(calls, fail_once=[])
+    monkeypatch.setattr(runner, "get_workflow", lambda checkpointed=False, variant="full": graph)
+    pid = await seed_policy()
+    job_id = int(uuid.uuid4().int % 10**9)
+    config = {"configurable": {"thread_id": runner.run_thread_id(job_id)}}
+
+    # Completed, but the worker died before marking the job done
+    async for _ in graph.astream(await runner.load_policy_state(pid), config, stream_mode="updates"):
+        pass
+    assert await runner.run_renewal(pid, job_id=job_id, owner="w1") == "COMPLETED"
+    assert calls == ["orchestrator", "planner", "send"]
+    assert await checkpoint_count(config["configurable"]["thread_id"]) == 0
+
+    async for _ in graph.astream(await runner.load_policy_state(pid), config, stream_mode="updates"):
+        pass
+    async with write_db() as db:
+        await db.execute("UPDATE workflow_checkpoints SET created_at=datetime('now', '-30 days') WHERE thread_id=?",
+                         (config["configurable"]["thread_id"],))
+    assert await prune_checkpoints(14) >= 1
+    assert await checkpoint_count(config["configurable"]["thread_id"]) == 0
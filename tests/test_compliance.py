@@ -0,0 +1,88 @@
+"""
+Test Agent: Compliance pre-check + Critique B revisions
+Tests the mechanical checks (disclosure, figures, dates, length, reg_009 phrases),
+that the Critique B LLM only sees messages that pass them, and that the targeted
+revision loop is bounded by count and time before escalating.
+"""
+import asyncio
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.critique_b as critique_b
+import app.agents.draft_agent as draft_agent
+from app.agents.compliance import assemble_message, check_message
+from app.agents.templates import DISCLOSURE
+
+
+def state(draft, **overrides):
+    base = {"policy_id": "SLI-TEST-COMPLIANCE", "customer_name": "Vikram Desai", "selected_channel": "Email",
+            "policy_type": "ULIP Growth Advantage", "annual_premium": 75000, "sum_assured": 5000000,
+            "fund_value": 892000, "payment_mode": "Annual", "premium_due_date": "2026-03-20",
+            "greeting": "Dear Vikram,", "draft_message": draft, "closing": f"Regards\n\n{DISCLOSURE}"}
+    return {**base, **overrides}
+
+
+def checks(s):
+    return sorted((i["check"], i["part"]) for i in check_message(s))
+
+
+def test_mechanical_checks():
+    clean = ("[GREETING]\nYour premium of ₹75,000 is due on 20 March 2026. Your fund value is Rs. 8.92 lakh. "
+             "[PAYMENT_LINK]\n[CLOSING]")
+    assert checks(state(clean)) == []
+    assert "[GREETING]" not in assemble_message(state(clean))
+
+    assert checks(state(clean, closing="Regards")) == [("disclosure", "closing")]
+    assert checks(state("Premium ₹7,500 due 2026-03-21.")) == [("amount", "draft"), ("date", "draft")]
+    assert checks(state("Guaranteed returns, market-beating!")) == [
+        ("banned_phrase", "draft"), ("banned_phrase", "draft"), ("disclaimer", "draft")]
+    assert checks(state("Your NAV grew 12%. Past performance is not indicative of future returns.")) == []
+    # Monthly instalment is a valid figure; guaranteed returns only matter on a ULIP
+    assert checks(state("₹6,250 a month, guaranteed returns.", payment_mode="Monthly",
+                        policy_type="Endowment", fund_value=None)) == []
+    assert checks(state("x" * 201, selected_channel="WhatsApp")) == [("length", "draft")]
+
+
+@pytest.mark.asyncio
+async def test_precheck_failure_revises_draft_before_llm_review(monkeypatch):
+    reviewed, revisions = [], []
+
+    async def review(s, message):
+        reviewed.append(message)
+        return {"verdict": "APPROVED", "compliance_score": 0.95, "issues": []}
+
+    async def revise(s, instructions):
+        revisions.append(instructions)
+        return "Your premium of ₹75,000 is due on 20 March 2026."
+    monkeypatch.setattr(critique_b, "llm_review", review)
+    monkeypatch.setattr(draft_agent, "revise_draft", revise)
+
+    result = await critique_b.critique_b_node(state("Premium ₹7,500 due soon.", closing="Regards"))
+    assert result["critique_b_result"] == "APPROVED" and result["current_node"] == "CHANNEL_SEND"
+    assert len(revisions) == 1 and "₹7,500" in revisions[0]
+    # Only the fixed message reached the LLM; the closing got the disclosure without a rewrite
+    assert len(reviewed) == 1 and "₹7,500" not in reviewed[0]
+    assert result["final_message"].endswith(DISCLOSURE) and result["closing"].startswith("Regards")
+
+
+@pytest.mark.asyncio
+async def test_revisions_are_bounded(monkeypatch):
+    async def review(s, message):
+        return {"verdict": "REVISION_NEEDED", "issues": ["tone"], "fix_instructions": "warmer"}
+
+    async def revise(s, instructions):
+        return s["draft_message"]
+    monkeypatch.setattr(critique_b, "llm_review", review)
+    monkeypatch.setattr(draft_agent, "revise_draft", revise)
+
+    result = await critique_b.critique_b_node(state("Your premium of ₹75,000 is due."))
+    assert result["critique_b_result"] == "REVISIONS_EXHAUSTED" and result["current_node"] == "ESCALATION"
+    assert "final_message" not in result
+
+    async def slow_revise(s, instructions):
+        await asyncio.sleep(1)
+    monkeypatch.setattr(draft_agent, "revise_draft", slow_revise)
+    monkeypatch.setattr(critique_b.settings, "compliance_revision_budget_s", 0.05)
+    result = await critique_b.critique_b_node(state("Premium ₹1 due."))
+    assert result["critique_b_result"] == "REVISION_TIMEOUT" and result["escalate"] is True
@@ -0,0 +1,104 @@
+"""
+Test Agent: Policy context cache
+Tests LRU hits/eviction, write-through invalidation, discarding fills that race a
+write, cross-worker coherence through the context_changes log, and that a forced sync
+(what a workflow run loads with) waits for one in flight instead of skipping.
+"""
+import asyncio
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import write_db
+from app.db.context_cache import PolicyContextCache
+from app.db.policy_context import load_policy_states
+
+
+@pytest.mark.asyncio
+async def test_lru_hits_eviction_and_copies():
+    cache = PolicyContextCache(max_entries=2, sync_interval_ms=60_000)
+    cache._last_seq = 0  # no change-log polling for this unit test
+    calls = []
+
+    async def loader(pid):
+        calls.append(pid)
+        return {"policy_id": pid, "history": []}
+
+    first = await cache.get_or_load("P1", "context", lambda: loader("P1"))
+    first["history"].append("mutated by caller")
+    assert (await cache.get_or_load("P1", "context", lambda: loader("P1")))["history"] == []
+    await cache.get_or_load("P2", "context", lambda: loader("P2"))
+    await cache.get_or_load("P3", "context", lambda: loader("P3"))  # evicts P1
+    await cache.get_or_load("P1", "context", lambda: loader("P1"))
+    assert calls == ["P1", "P2", "P3", "P1"]
+    assert cache.stats["hits"] == 1 and cache.stats["evictions"] == 2
+
+    cache.invalidate("P1")
+    await cache.get_or_load("P1", "context", lambda: loader("P1"))
+    assert calls[-1] == "P1" and len(calls) == 5
+
+
+@pytest.mark.asyncio
+async def test_fill_racing_an_invalidation_is_discarded():
+    cache = PolicyContextCache(max_entries=10, sync_interval_ms=60_000)
+    cache._last_seq = 0
+
+    async def stale_loader():
+        cache.invalidate("P1")  # a write lands while we are reading
+        return {"value": "stale"}
+
+    await cache.get_or_load("P1", "status", stale_loader)
+    assert "P1" not in cache._entries
+
+
+@pytest.mark.asyncio
+async def test_other_worker_writes_invalidate_via_change_log():
+    tag = uuid.uuid4().hex[:8]
+    pid, cid = f"SLI-TEST-CACHE-{tag}", f"CUST-TEST-CACHE-{tag}"
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name) VALUES (?, 'Cache Test')", (cid,))
+        await db.execute("INSERT INTO policies (policy_id, customer_id) VALUES (?, ?)", (pid, cid))
+        await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+
+    worker_a = PolicyContextCache(max_entries=100, sync_interval_ms=0)
+    load = lambda: load_policy_states([pid])  # noqa: E731
+    assert (await worker_a.get_or_load(pid, "context", load))[pid]["objection_count"] == 0
+    assert (await worker_a.get_or_load(pid, "context", load))[pid]["objection_count"] == 0
+    assert worker_a.stats["hits"] == 1
+
+    # "Worker B" writes without touching worker A's cache
+    async with write_db() as db:
+        await db.execute("UPDATE policy_state SET objection_count=3 WHERE policy_id=?", (pid,))
+        await db.execute("UPDATE customers SET name='Renamed' WHERE customer_id=?", (cid,))
+
+    state = (await worker_a.get_or_load(pid, "context", load))[pid]
+    assert state["objection_count"] == 3 and state["customer_name"] == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_forced_sync_waits_for_one_in_flight():
+    tag = uuid.uuid4().hex[:8]
+    pid, cid = f"SLI-TEST-CACHE-{tag}", f"CUST-TEST-CACHE-{tag}"
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name) VALUES (?, 'Cache Test')", (cid,))
+        await db.execute("INSERT INTO policies (policy_id, customer_id) VALUES (?, ?)", (pid, cid))
+        await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+
+    cache = PolicyContextCache(max_entries=100, sync_interval_ms=60_000)
+    load = lambda: load_policy_states([pid])  # noqa: E731
+    assert (await cache.get_or_load(pid, "context", load))[pid]["mode"] == "AI"
+
+    # Another process hands the policy to a human; the rate limit still serves the cached AI mode
+    async with write_db() as db:
+        await db.execute("UPDATE policy_state SET mode='HUMAN_CONTROL' WHERE policy_id=?", (pid,))
+    assert (await cache.get_or_load(pid, "context", load))[pid]["mode"] == "AI"
+
+    async def sync_in_flight():
+        async with cache._sync_lock:
+            await asyncio.sleep(0.05)
+    other = asyncio.create_task(sync_in_flight())
+    await asyncio.sleep(0)
+    await cache.sync(force=True)
+    await other
+    assert (await cache.get_or_load(pid, "context", load))[pid]["mode"] == "HUMAN_CONTROL"
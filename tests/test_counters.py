@@ -0,0 +1,88 @@
+"""
+Test Agent: Dashboard counters
+Tests that trigger-maintained counters match the base tables and that reconciliation fixes drift.
+"""
+import pytest
+import aiosqlite
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.migrations import apply_migrations
+from app.db.counters import read_overview_counters, reconcile_counters
+
+
+async def seeded_db(path):
+    db = await aiosqlite.connect(path)
+    db.row_factory = aiosqlite.Row
+    await apply_migrations(db)
+    await db.executemany(
+        "INSERT INTO policies (policy_id, customer_id, status) VALUES (?, ?, ?)",
+        [("P1", "C1", "ACTIVE"), ("P2", "C2", "ACTIVE"), ("P3", "C3", "LAPSED")]
+    )
+    await db.executemany(
+        "INSERT INTO policy_state (policy_id, mode, distress_flag) VALUES (?, ?, ?)",
+        [("P1", "AI", 0), ("P2", "AI", 0), ("P3", "HUMAN_CONTROL", 1)]
+    )
+    await db.execute("INSERT INTO escalation_cases (policy_id, status) VALUES ('P3', 'OPEN')")
+    await db.executemany(
+        "INSERT INTO audit_logs (policy_id, action_type) VALUES (?, ?)",
+        [("P1", "EMAIL_SENT"), ("P2", "EMAIL_SENT"), ("P3", "ESCALATION_CREATED")]
+    )
+    await db.commit()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_triggers_track_inserts(tmp_path):
+    db = await seeded_db(str(tmp_path / "c.db"))
+    try:
+        overview = await read_overview_counters(db)
+        assert overview["total_policies"] == 3
+        assert overview["active_policies"] == 2
+        assert overview["ai_managed"] == 2
+        assert overview["human_managed"] == 1
+        assert overview["distress_cases"] == 1
+        assert overview["open_escalations"] == 1
+        actions = {a["action_type"]: a["count"] for a in overview["last_24h_actions"]}
+        assert actions == {"EMAIL_SENT": 2, "ESCALATION_CREATED": 1}
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_triggers_track_updates_like_the_write_paths(tmp_path):
+    db = await seeded_db(str(tmp_path / "c.db"))
+    try:
+        # channel agent send
+        await db.execute("UPDATE policy_state SET current_node='AWAITING_RESPONSE', last_channel='Email' WHERE policy_id='P1'")
+        # resolve_escalation
+        await db.execute("UPDATE escalation_cases SET status='RESOLVED' WHERE policy_id='P3'")
+        await db.execute("UPDATE policy_state SET mode='AI', distress_flag=0 WHERE policy_id='P3'")
+        await db.commit()
+
+        overview = await read_overview_counters(db)
+        assert overview["ai_managed"] == 3
+        assert overview["human_managed"] == 0
+        assert overview["distress_cases"] == 0
+        assert overview["open_escalations"] == 0
+        assert overview["channel_distribution"] == [{"last_channel": "Email", "count": 1}]
+        assert await reconcile_counters(db) == []
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_corrects_drift(tmp_path):
+    db = await seeded_db(str(tmp_path / "c.db"))
+    try:
+        await db.execute("UPDATE dashboard_counters SET value = 99 WHERE counter='policies'")
+        await db.execute("DELETE FROM dashboard_counters WHERE counter='mode' AND dim='AI'")
+        await db.commit()
+
+        drift = await reconcile_counters(db)
+        assert {(d["counter"], d["dim"]) for d in drift} == {("policies", ""), ("mode", "AI")}
+        overview = await read_overview_counters(db)
+        assert overview["total_policies"] == 3
+        assert overview["ai_managed"] == 2
+    finally:
+        await db.close()
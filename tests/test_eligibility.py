@@ -0,0 +1,165 @@
+"""
+Test Agent: Contact eligibility + deferred sends
+Tests the reg_008 windows, that the per-cycle contact counters restrict the channels
+Step 1 may pick (and skip a policy with none left), and that messages held outside a
+window are released later, in rate-limited batches, unless the policy changed meanwhile —
+under the policy's run lease, with failed sends retried a bounded number of times.
+"""
+import pytest
+import uuid
+from datetime import datetime, timezone
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.runner as runner
+import app.agents.send_scheduler as send_scheduler
+from app.agents.eligibility import eligible_channels, next_window
+from app.agents.rules import evaluate_rules, restrict_channel
+from app.db.policy_lock import acquire_policy_lease, release_policy_lease
+from app.db.pool import read_db, write_db
+from app.db.write_behind import get_write_behind
+
+
+def utc(text):
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc)
+
+
+async def seed(tag, status="ACTIVE", contacts=()):
+    pid = f"SLI-TEST-ELIG-{tag}"
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name, preferred_channel) VALUES (?, 'Eligibility Test', 'WhatsApp')",
+                         (f"C-{tag}",))
+        await db.execute("INSERT INTO policies (policy_id, customer_id, policy_type, annual_premium, premium_due_date, status) "
+                         "VALUES (?, ?, 'Term Shield Plus', 12000, '2030-02-01', ?)", (pid, f"C-{tag}", status))
+        await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+        await db.executemany(
+            "INSERT INTO interactions (policy_id, channel, message_direction, content) VALUES (?, ?, 'OUTBOUND', 'reminder')",
+            [(pid, channel) for channel in contacts])
+    return pid
+
+
+async def statuses(pid):
+    async with read_db() as db:
+        rows = await db.execute_fetchall("SELECT status FROM scheduled_sends WHERE policy_id=? ORDER BY id", (pid,))
+    return [r[0] for r in rows]
+
+
+def test_contact_windows():
+    # 07:00 IST is 01:30 UTC
+    assert next_window("WhatsApp", utc("2030-01-10T01:30")) == utc("2030-01-10T02:30")
+    assert next_window("WhatsApp", utc("2030-01-10T06:30")) is None
+    assert next_window("WhatsApp", utc("2030-01-10T14:30")) == utc("2030-01-11T02:30")  # 20:00, window closed
+    assert next_window("Voice", utc("2030-01-10T13:29")) is None
+    assert next_window("Voice", utc("2030-01-10T13:30")) == utc("2030-01-11T03:30")
+    assert next_window("Email", utc("2030-01-10T20:00")) is None
+
+
+@pytest.mark.asyncio
+async def test_contact_quota_restricts_channels(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    pid = await seed(tag, contacts=["WhatsApp"] * 3 + ["Voice"])
+    state = {"policy_id": pid, "premium_due_date": "2030-02-01", "policy_status": "ACTIVE",
+             "preferred_channel": "WhatsApp", "distress_flag": False, "objection_count": 0, "interaction_history": []}
+    allowed = await eligible_channels(state)
+    assert allowed == ["Email", "Voice"]
+
+    # Preferred channel out of quota: least-tried allowed fallback, and nothing outside the list
+    state["allowed_channels"] = allowed
+    rule, decision = evaluate_rules(state)
+    assert rule["id"] == "R6-PREFERRED-EXHAUSTED" and decision["channel"] == "Email"
+    assert restrict_channel(state, "WhatsApp") == "Email" and restrict_channel(state, "Voice") == "Voice"
+
+    def no_graph(*args, **kwargs):
+        raise AssertionError("graph built with no channel left")
+    monkeypatch.setattr(runner, "get_workflow", no_graph)
+    exhausted = await seed(uuid.uuid4().hex[:8], contacts=["WhatsApp", "Email", "Voice"] * 3)
+    assert await runner.run_renewal(exhausted) == "SKIPPED"
+
+
+@pytest.mark.asyncio
+async def test_held_messages_released_in_batches(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    pids = [await seed(f"{tag}-{i}") for i in range(3)]
+    paid = await seed(f"{tag}-paid")
+
+    monkeypatch.setattr(send_scheduler, "next_window", lambda channel, now=None: utc("2030-01-11T02:30"))
+    for pid in pids + [paid]:
+        state = {"policy_id": pid, "selected_channel": "WhatsApp", "final_message": f"Renewal reminder {pid}"}
+        result = await send_scheduler.send_window_node(state)
+        assert result["current_node"] == "SCHEDULED"
+    # A newer message replaces the one still held
+    await send_scheduler.send_window_node({"policy_id": pids[0], "selected_channel": "Voice", "final_message": "v2"})
+    assert await statuses(pids[0]) == ["SUPERSEDED", "PENDING"]
+    assert await eligible_channels({"policy_id": pids[0], "premium_due_date": "2030-02-01"}) == ["WhatsApp", "Email", "Voice"]
+
+    # The window opens; the paid policy's message is dropped, the rest go out two at a time
+    async with write_db() as db:
+        await db.execute("UPDATE scheduled_sends SET send_after='2000-01-01 00:00:00' "
+                         "WHERE status='PENDING' AND policy_id LIKE ?", (f"SLI-TEST-ELIG-{tag}%",))
+        await db.execute("UPDATE policies SET status='PAID' WHERE policy_id=?", (paid,))
+    monkeypatch.setattr(send_scheduler, "next_window", lambda channel, now=None: None)
+    scheduler = send_scheduler.SendScheduler(rate=0.001, batch=2)
+    assert await scheduler.tick() == 2
+    assert await scheduler.tick() == 0  # bucket empty
+    scheduler.tokens = 2
+    assert await scheduler.tick() == 1
+
+    assert await statuses(paid) == ["CANCELLED"]
+    await get_write_behind().flush()
+    async with read_db() as db:
+        sent = await db.execute_fetchall(
+            "SELECT channel, content FROM interactions WHERE policy_id=? AND message_direction='OUTBOUND'", (pids[0],))
+        counted = await db.execute_fetchall(
+            "SELECT contacts FROM contact_counters WHERE policy_id=? AND channel='Voice'", (pids[0],))
+    assert [tuple(r) for r in sent] == [("Voice", "v2")] and counted[0][0] == 1
+
+
+async def held(pid, status="PENDING", attempts=0, updated_at="2000-01-01 00:00:00"):
+    async with write_db() as db:
+        await db.execute("INSERT INTO scheduled_sends (policy_id, channel, content, send_after, status, attempts, updated_at) "
+                         "VALUES (?, 'Email', 'held reminder', '2000-01-01 00:00:00', ?, ?, ?)",
+                         (pid, status, attempts, updated_at))
+
+
+async def send_row(pid):
+    async with read_db() as db:
+        rows = await db.execute_fetchall("SELECT status, attempts, reason FROM scheduled_sends WHERE policy_id=?", (pid,))
+    return tuple(rows[0])
+
+
+@pytest.mark.asyncio
+async def test_release_retries_are_capped_and_leased(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    failing, running, crashed = [await seed(f"{tag}-{suffix}") for suffix in ("fail", "run", "crash")]
+    sent = []
+
+    async def flaky(state):
+        if state["policy_id"] == failing:
+            raise RuntimeError("gateway down")
+        sent.append(state["policy_id"])
+    monkeypatch.setitem(send_scheduler.SEND_NODES, "Email", flaky)
+    monkeypatch.setattr(send_scheduler, "backoff_seconds", lambda attempts: -60)  # due again at once
+
+    # A failing send is retried, then FAILED for good
+    await held(failing)
+    for attempt in range(1, send_scheduler.SEND_MAX_ATTEMPTS):
+        assert (await send_scheduler.release_due_sends(10))["failed"] == 1
+        assert await send_row(failing) == ("PENDING", attempt, "gateway down")
+    await send_scheduler.release_due_sends(10)
+    assert await send_row(failing) == ("FAILED", send_scheduler.SEND_MAX_ATTEMPTS, "gateway down")
+
+    # A policy with a live workflow run waits for it, without using an attempt
+    await held(running)
+    lease = await acquire_policy_lease(running, "test-run")
+    assert lease["acquired"]
+    await send_scheduler.release_due_sends(10)
+    assert (await send_row(running))[:2] == ("PENDING", 0) and sent == []
+    await release_policy_lease(running, "test-run")
+
+    # A claim whose worker died after the channel agent recorded the message is not sent again
+    await held(crashed, status="SENDING", attempts=1)
+    async with write_db() as db:
+        await db.execute("INSERT INTO interactions (policy_id, channel, message_direction, content) "
+                         "VALUES (?, 'Email', 'OUTBOUND', 'held reminder')", (crashed,))
+    await send_scheduler.release_due_sends(10)
+    assert (await send_row(crashed))[0] == "SENT" and sent == []
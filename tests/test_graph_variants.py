@@ -0,0 +1,69 @@
+"""
+Test Agent: Graph variants
+Tests that express/reply runs skip the orchestrator and Critique A with the channel
+fixed (operator override, or the customer's last reply channel), and that payment
+and escalation rules still apply.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.runner as runner
+import app.agents.send_scheduler as send_scheduler
+import app.agents.workflow as workflow
+from app.agents.orchestrator import fixed_channel_node
+from app.db.pool import write_db
+
+
+def state(**overrides):
+    base = {"policy_id": "SLI-TEST-VARIANT", "policy_status": "ACTIVE", "preferred_channel": "Email",
+            "selected_channel": None, "distress_flag": False, "objection_count": 0, "interaction_history": []}
+    return {**base, **overrides}
+
+
+@pytest.mark.asyncio
+async def test_fixed_channel_node():
+    assert (await fixed_channel_node(state(selected_channel="Voice")))["selected_channel"] == "Voice"
+    # History is newest first
+    history = [{"channel": "WhatsApp", "direction": "INBOUND", "content": "ok"},
+               {"channel": "Email", "direction": "OUTBOUND", "content": "reminder"},
+               {"channel": "Voice", "direction": "INBOUND", "content": "later"}]
+    reply = await fixed_channel_node(state(interaction_history=history))
+    assert reply["selected_channel"] == "WhatsApp" and reply["current_node"] == "PLANNER"
+    assert (await fixed_channel_node(state()))["selected_channel"] == "Email"
+
+    assert (await fixed_channel_node(state(selected_channel="Voice", distress_flag=True)))["current_node"] == "ESCALATION"
+    assert (await fixed_channel_node(state(policy_status="PAID")))["current_node"] == "COMPLETED"
+
+
+@pytest.mark.asyncio
+async def test_express_run_skips_orchestrator_and_critique_a(monkeypatch):
+    calls = []
+
+    def stub(name, updates):
+        async def run(s):
+            calls.append((name, s.get("selected_channel")))
+            return {**updates, "audit_trail": [name]}
+        return run
+
+    monkeypatch.setattr(workflow, "orchestrator_node", stub("orchestrator", {"current_node": "CRITIQUE_A"}))
+    monkeypatch.setattr(workflow, "planner_node", stub("planner", {"current_node": "DRAFT_AND_GREETING"}))
+    monkeypatch.setattr(workflow, "parallel_draft_and_greeting", stub("draft", {"current_node": "CRITIQUE_B"}))
+    monkeypatch.setattr(workflow, "critique_b_node", stub("critique_b", {"current_node": "CHANNEL_SEND"}))
+    monkeypatch.setattr(workflow, "voice_send_node", stub("voice_send", {"current_node": "COMPLETED"}))
+    monkeypatch.setattr(send_scheduler, "next_window", lambda channel, now=None: None)  # inside the Voice window
+    graphs = {v: workflow.build_workflow(variant=v) for v in workflow.GRAPH_VARIANTS}
+    monkeypatch.setattr(runner, "get_workflow", lambda checkpointed=False, variant="full": graphs[variant])
+
+    tag = uuid.uuid4().hex[:8]
+    pid = f"SLI-TEST-VARIANT-{tag}"
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name) VALUES (?, 'Variant Test')", (f"C-{tag}",))
+        await db.execute("INSERT INTO policies (policy_id, customer_id) VALUES (?, ?)", (pid, f"C-{tag}"))
+        await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+
+    assert await runner.run_renewal(pid, "Voice", variant="express") == "COMPLETED"
+    assert calls == [("planner", "Voice"), ("draft", "Voice"), ("critique_b", "Voice"), ("voice_send", "Voice")]
+    with pytest.raises(ValueError):
+        workflow.build_workflow(variant="turbo")
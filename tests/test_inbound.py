@@ -0,0 +1,62 @@
+"""
+Test Agent: Inbound event pipeline
+Tests per-event validation, batch classification and the single-transaction
+writes behind the batch webhook.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import read_db, write_db
+from app.api.inbound import parse_events, process_inbound_events
+
+
+async def seed(n):
+    tag = uuid.uuid4().hex[:8]
+    policies = [f"SLI-TEST-IN-{tag}-{i}" for i in range(n)]
+    async with write_db() as db:
+        for pid in policies:
+            await db.execute("INSERT INTO policies (policy_id, customer_id) VALUES (?, ?)", (pid, f"C-{pid}"))
+            await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+    return policies
+
+
+@pytest.mark.asyncio
+async def test_batch_classifies_and_writes_per_event_results():
+    distress_pid, objection_pid, receipt_pid = await seed(3)
+    raw = [
+        {"policy_id": distress_pid, "channel": "WhatsApp", "content": "I lost job last month", "event_id": "m1"},
+        {"policy_id": distress_pid, "channel": "WhatsApp", "content": "in HOSPITAL now, cancel it"},
+        {"policy_id": objection_pid, "channel": "Email", "content": "Too expensive, maybe later"},
+        {"policy_id": objection_pid, "channel": "Email", "content": "not interested"},
+        {"policy_id": receipt_pid, "channel": "WhatsApp", "event_type": "read", "event_id": "wamid.9"},
+        {"policy_id": receipt_pid, "channel": "Email"},                      # reply without content
+        {"policy_id": "SLI-NO-SUCH-POLICY", "channel": "Email", "content": "hello"},
+        "not an object",
+    ]
+    valid, rejected = parse_events(raw)
+    results = sorted(await process_inbound_events(valid) + rejected, key=lambda r: r["index"])
+
+    assert [r["status"] for r in results] == ["accepted"] * 5 + ["rejected"] * 3
+    assert results[0]["event_id"] == "m1" and results[0]["distress_detected"]
+    assert results[1]["distress_detected"] and results[1]["objection_detected"]  # reported, but not counted
+    assert results[2]["objection_detected"] and not results[2]["distress_detected"]
+    assert results[6]["error"] == "unknown policy_id"
+
+    async with read_db() as db:
+        state = {r["policy_id"]: r for r in await db.execute_fetchall(
+            "SELECT policy_id, mode, distress_flag, objection_count FROM policy_state WHERE policy_id IN (?, ?)",
+            (distress_pid, objection_pid))}
+        escalations = await db.execute_fetchall("SELECT COUNT(*) FROM escalation_cases WHERE policy_id=?", (distress_pid,))
+        inbound = await db.execute_fetchall(
+            "SELECT COUNT(*) FROM interactions WHERE policy_id IN (?, ?) AND message_direction='INBOUND'",
+            (distress_pid, objection_pid))
+        receipts = await db.execute_fetchall("SELECT action_type, action_reason FROM audit_logs WHERE policy_id=?", (receipt_pid,))
+
+    assert state[distress_pid]["mode"] == "HUMAN_CONTROL" and state[distress_pid]["distress_flag"] == 1
+    assert state[distress_pid]["objection_count"] == 0
+    assert state[objection_pid]["objection_count"] == 2
+    assert escalations[0][0] == 1
+    assert inbound[0][0] == 4
+    assert [tuple(r) for r in receipts] == [("MESSAGE_READ", "WhatsApp message wamid.9")]
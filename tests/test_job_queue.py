@@ -0,0 +1,190 @@
+"""
+Test Agent: Renewal job queue + worker
+Tests priority claims, lease expiry and heartbeats, retries with backoff,
+dead-lettering, sharded claims, a worker running jobs concurrently, and
+per-policy single flight (coalesced submits, run lease CAS and reclaim).
+"""
+import asyncio
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import policy_shard, write_db
+from app.db.job_queue import (
+    backoff_seconds, claim_jobs, complete_job, enqueue_job, fail_job, get_job,
+    heartbeat, job_counts, retry_job, submit_job
+)
+from app.db.policy_lock import (
+    PolicyLeaseLost, acquire_policy_lease, current_run, release_policy_lease, renew_policy_lease
+)
+from app.utils.metrics import Metrics, merge_snapshots
+from app.worker import Worker
+
+
+def new_queue():
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+# A policy can only have one active job, so every run uses fresh policy ids
+RUN = uuid.uuid4().hex[:8]
+
+
+@pytest.mark.asyncio
+async def test_claims_by_priority_and_never_twice():
+    queue = new_queue()
+    low = await enqueue_job(f"SLI-TEST-JQ-{RUN}-1", queue=queue)
+    high = await enqueue_job(f"SLI-TEST-JQ-{RUN}-2", {"override_channel": "Voice"}, priority=5, queue=queue)
+    later = await enqueue_job(f"SLI-TEST-JQ-{RUN}-3", queue=queue, delay_s=3600)
+
+    first = await claim_jobs("w1", 1, queue)
+    second, rest = await asyncio.gather(claim_jobs("w2", 5, queue), claim_jobs("w3", 5, queue))
+    assert [j["id"] for j in first] == [high]
+    assert first[0]["payload"] == {"override_channel": "Voice"} and first[0]["attempts"] == 1
+    assert [j["id"] for j in second + rest] == [low]  # delayed job not ready, nothing claimed twice
+
+    assert await complete_job(high, "w1")
+    assert not await complete_job(low, "w1")  # not w1's lease
+    counts = await job_counts(queue)
+    assert (counts["QUEUED"], counts["RUNNING"], counts["DONE"], counts["DEAD"]) == (1, 1, 1, 0)
+    assert (await get_job(later))["status"] == "QUEUED"
+
+
+@pytest.mark.asyncio
+async def test_retry_backoff_then_dead_letter():
+    queue = new_queue()
+    job_id = await enqueue_job(f"SLI-TEST-JQ-{RUN}-4", queue=queue, max_attempts=2)
+
+    await claim_jobs("w1", 1, queue)
+    assert await fail_job(job_id, "w1", "RuntimeError: boom") == "QUEUED"
+    job = await get_job(job_id)
+    assert job["last_error"] == "RuntimeError: boom" and job["available_at"] > job["updated_at"]
+    assert await claim_jobs("w1", 1, queue) == []  # backing off
+
+    async with write_db() as db:
+        await db.execute("UPDATE renewal_jobs SET available_at=datetime('now', '-1 seconds') WHERE id=?", (job_id,))
+    await claim_jobs("w1", 1, queue)
+    assert await fail_job(job_id, "w1", "RuntimeError: again") == "DEAD"
+    assert (await get_job(job_id))["finished_at"] is not None
+
+    assert await retry_job(job_id)
+    assert [j["id"] for j in await claim_jobs("w1", 1, queue)] == [job_id]
+    assert backoff_seconds(1) < backoff_seconds(2) <= backoff_seconds(50)
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed_and_heartbeat_reports_loss():
+    queue = new_queue()
+    job_id = await enqueue_job(f"SLI-TEST-JQ-{RUN}-5", queue=queue)
+    await claim_jobs("crashed", 1, queue)
+    assert await heartbeat("crashed", [job_id]) == {job_id}
+
+    async with write_db() as db:
+        await db.execute("UPDATE renewal_jobs SET lease_expires_at=datetime('now', '-1 seconds') WHERE id=?", (job_id,))
+    reclaimed = await claim_jobs("w2", 1, queue)
+    assert [j["id"] for j in reclaimed] == [job_id] and reclaimed[0]["attempts"] == 2
+    assert await heartbeat("crashed", [job_id]) == set()
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_jobs_concurrently_and_retries_failures():
+    queue = new_queue()
+    ids = [await enqueue_job(f"SLI-TEST-JQ-{RUN}-W{i}", queue=queue) for i in range(6)]
+    flaky = await enqueue_job(f"SLI-TEST-JQ-{RUN}-FLAKY", queue=queue, max_attempts=1)
+    active, peak = 0, 0
+
+    async def handler(job):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        if job["id"] == flaky:
+            raise RuntimeError("provider down")
+
+    worker = Worker(concurrency=3, queue=queue, worker_id="w-test", handler=handler, poll_ms=20)
+    task = asyncio.create_task(worker.run())
+    for _ in range(100):
+        counts = await job_counts(queue)
+        if counts["DONE"] + counts["DEAD"] == len(ids) + 1:
+            break
+        await asyncio.sleep(0.05)
+    worker.stop()
+    await task
+
+    assert (counts["QUEUED"], counts["RUNNING"], counts["DONE"], counts["DEAD"]) == (0, 0, 6, 1)
+    assert peak == 3
+    assert worker.stats["completed"] == 6 and worker.stats["dead"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sharded_claims_partition_policies():
+    queue = new_queue()
+    policies = [f"SLI-TEST-JQ-{RUN}-S{i}" for i in range(40)]
+    for pid in policies:
+        await enqueue_job(pid, queue=queue)
+
+    claimed = {}
+    for index in range(3):
+        jobs = await claim_jobs(f"shard-{index}", 100, queue, shard=(index, 3))
+        claimed[index] = {j["policy_id"] for j in jobs}
+        assert all(policy_shard(pid, 3) == index for pid in claimed[index])
+    assert set().union(*claimed.values()) == set(policies)
+    assert all(claimed.values())  # crc32 spreads 40 ids over every shard
+
+
+def test_metrics_merge_across_processes():
+    a, b = Metrics(), Metrics()
+    a.incr("jobs.completed", 3)
+    b.incr("jobs.completed", 2)
+    b.incr("jobs.dead")
+    a.observe("job", 1.0)
+    b.observe("job", 3.0)
+    merged = merge_snapshots([a.snapshot(), b.snapshot()])
+    assert merged["counters"] == {"jobs.completed": 5, "jobs.dead": 1}
+    assert merged["timings"]["job"] == {"count": 2, "total_s": 4.0, "max_s": 3.0, "avg_s": 2.0}
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submit_coalesces_onto_active_job():
+    queue = new_queue()
+    pid = f"SLI-TEST-JQ-{RUN}-DUP"
+    first, created = await submit_job(pid, queue=queue)
+    again, created_again = await submit_job(pid, priority=9, queue=queue)
+    assert created and not created_again and again == first
+
+    await claim_jobs("w1", 1, queue)
+    assert await submit_job(pid, queue=queue) == (first, False)  # still running
+    await complete_job(first, "w1")
+    second, created = await submit_job(pid, queue=queue)
+    assert created and second != first
+
+
+@pytest.mark.asyncio
+async def test_policy_lease_cas_expiry_and_loss():
+    pid = f"SLI-TEST-JQ-{RUN}-LEASE"
+    async with write_db() as db:
+        await db.execute("INSERT INTO policies (policy_id, customer_id) VALUES (?, 'CUST-TEST')", (pid,))
+
+    results = await asyncio.gather(*[acquire_policy_lease(pid, f"w{i}", job_id=i) for i in range(5)])
+    winners = [i for i, r in enumerate(results) if r["acquired"]]
+    assert len(winners) == 1
+    owner = f"w{winners[0]}"
+    loser = next(r for r in results if not r["acquired"])
+    assert loser["run_owner"] == owner and loser["run_job_id"] == winners[0]
+    assert (await current_run(pid))["run_owner"] == owner
+
+    # Owner crashes: once the lease runs out someone else takes over, and the old owner finds out
+    async with write_db() as db:
+        await db.execute(
+            "UPDATE policy_state SET run_lease_expires_at=datetime('now', '-1 seconds') WHERE policy_id=?", (pid,))
+    assert await current_run(pid) is None
+    assert (await acquire_policy_lease(pid, "rescuer"))["acquired"]
+    with pytest.raises(PolicyLeaseLost):
+        await renew_policy_lease(pid, owner)
+    assert not await release_policy_lease(pid, owner)
+
+    await renew_policy_lease(pid, "rescuer")
+    assert await release_policy_lease(pid, "rescuer")
+    assert (await acquire_policy_lease(pid, owner))["acquired"]
+    assert (await acquire_policy_lease("SLI-TEST-JQ-MISSING", "w1"))["run_owner"] is None
@@ -0,0 +1,93 @@
+"""
+Test Agent: Lite pipeline
+Tests lite eligibility, the fused channel + plan node, and that "auto" runs of
+low-risk first reminders take the lite graph with per-variant latency and LLM usage
+recorded in metrics.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.lite as lite
+import app.agents.runner as runner
+import app.agents.workflow as workflow
+from app.db.pool import write_db
+from app.utils.metrics import metrics, track_usage
+
+
+def state(**overrides):
+    base = {"policy_id": "SLI-TEST-LITE", "customer_name": "Asha Rao", "customer_age": 34, "customer_city": "Pune",
+            "segment": "Young Professional", "preferred_channel": "WhatsApp", "preferred_language": "English",
+            "policy_type": "Term Shield Plus", "annual_premium": 12000, "premium_due_date": "2026-12-01",
+            "fund_value": None, "policy_status": "ACTIVE", "distress_flag": False, "objection_count": 0,
+            "interaction_history": []}
+    return {**base, **overrides}
+
+
+def test_lite_eligibility():
+    assert lite.lite_eligible(state())
+    assert not lite.lite_eligible(state(annual_premium=90000))
+    assert not lite.lite_eligible(state(objection_count=1))
+    assert not lite.lite_eligible(state(distress_flag=True))
+    assert not lite.lite_eligible(state(policy_type="ULIP Growth Advantage"))
+    assert not lite.lite_eligible(state(interaction_history=[{"channel": "Email", "direction": "OUTBOUND"}]))
+
+
+@pytest.mark.asyncio
+async def test_lite_plan_node_one_call(monkeypatch):
+    calls = []
+
+    async def fused(system, user):
+        calls.append(user)
+        return {"channel": "Fax", "verdict": "APPROVED", "plan": {"tone": "friendly", "language": "English"}}
+    monkeypatch.setattr(lite, "call_llm_json", fused)
+    monkeypatch.setattr(lite, "_policy_docs", lambda s: "Term Shield Plus: level cover")
+
+    result = await lite.lite_plan_node(state(preferred_channel=None))
+    assert len(calls) == 1
+    assert result["selected_channel"] == "Email" and result["current_node"] == "DRAFT_AND_GREETING"
+    assert result["execution_plan"]["tone"] == "friendly" and result["rag_policy_docs"].startswith("Term")
+
+    # A rule-decided channel is kept whatever the LLM says
+    ruled = await lite.lite_plan_node(state())
+    assert ruled["selected_channel"] == "WhatsApp" and ruled["decision_rule"] == "R4-FIRST-CONTACT"
+    assert (await lite.lite_plan_node(state(policy_status="PAID")))["current_node"] == "COMPLETED"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_auto_run_takes_lite_graph_and_records_usage(monkeypatch):
+    path = []
+
+    def stub(name, updates, llm_calls=0):
+        async def run(s):
+            path.append(name)
+            if llm_calls:
+                track_usage(calls=llm_calls, tokens_in=500, tokens_out=100)
+            return {**updates, "audit_trail": [name]}
+        return run
+
+    monkeypatch.setattr(workflow, "lite_plan_node", stub(
+        "lite_plan", {"current_node": "DRAFT_AND_GREETING", "selected_channel": "Email"}, llm_calls=1))
+    monkeypatch.setattr(workflow, "parallel_draft_and_greeting", stub("draft", {"current_node": "CRITIQUE_B"}, 1))
+    monkeypatch.setattr(workflow, "critique_b_node", stub("critique_b", {"current_node": "CHANNEL_SEND"}, 1))
+    monkeypatch.setattr(workflow, "email_send_node", stub("email_send", {"current_node": "COMPLETED"}))
+    graphs = {"lite": workflow.build_workflow(variant="lite")}
+    monkeypatch.setattr(runner, "get_workflow", lambda checkpointed=False, variant="full": graphs[variant])
+
+    tag = uuid.uuid4().hex[:8]
+    pid = f"SLI-TEST-LITE-{tag}"
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name, preferred_channel) VALUES (?, 'Lite Test', 'Email')",
+                         (f"C-{tag}",))
+        await db.execute("INSERT INTO policies (policy_id, customer_id, policy_type, annual_premium, premium_due_date) "
+                         "VALUES (?, ?, 'Term Shield Plus', 12000, '2026-12-01')", (pid, f"C-{tag}"))
+        await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+
+    runs_before = metrics.snapshot()["timings"].get("workflow.lite", {}).get("count", 0)
+    calls_before = metrics.counters["workflow.lite.calls"]
+    assert await runner.run_renewal(pid) == "COMPLETED"
+    assert path == ["lite_plan", "draft", "critique_b", "email_send"]
+    assert metrics.snapshot()["timings"]["workflow.lite"]["count"] == runs_before + 1
+    assert metrics.counters["workflow.lite.calls"] == calls_before + 3
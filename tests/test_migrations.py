@@ -0,0 +1,104 @@
+"""
+Test Agent: Schema migrations
+Tests versioned migration bookkeeping and that hot queries use their indexes.
+"""
+import pytest
+import aiosqlite
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.migrations import MIGRATIONS, apply_migrations, get_schema_version
+
+# Hot query → index its EXPLAIN QUERY PLAN must use
+HOT_QUERIES = [
+    (
+        "SELECT node_name, content, created_at FROM workflow_logs WHERE policy_id=? ORDER BY created_at ASC",
+        ("P1",), "idx_workflow_logs_policy_created"
+    ),
+    (
+        "SELECT * FROM escalation_cases WHERE policy_id=? AND status='OPEN' ORDER BY created_at DESC LIMIT 1",
+        ("P1",), "idx_escalation_policy_status"
+    ),
+    (
+        "SELECT channel, message_direction, content, created_at FROM interactions "
+        "WHERE policy_id=? ORDER BY created_at DESC LIMIT 20",
+        ("P1",), "idx_interactions_policy_created"
+    ),
+    (
+        "SELECT action_type, COUNT(*) as count FROM audit_logs "
+        "WHERE created_at >= datetime('now', '-24 hours') GROUP BY action_type",
+        (), "COVERING INDEX idx_audit_created_action"
+    ),
+    (
+        "SELECT * FROM audit_logs WHERE policy_id=? ORDER BY created_at DESC",
+        ("P1",), "idx_audit_policy_created"
+    ),
+    (
+        "SELECT p.*, c.name FROM policies p JOIN customers c ON p.customer_id = c.customer_id "
+        "WHERE p.premium_due_date >= ? AND ((p.premium_due_date > ?) OR (p.premium_due_date = ? AND p.policy_id > ?)) "
+        "ORDER BY p.premium_due_date ASC, p.policy_id ASC LIMIT 101",
+        ("2026-01-01", "2026-01-01", "2026-01-01", "P1"), "idx_policies_due_date_id"
+    ),
+    (
+        "SELECT c.* FROM customers c WHERE c.segment = ? AND c.customer_id > ? ORDER BY c.customer_id ASC LIMIT 101",
+        ("HNI", "C1"), "idx_customers_segment_id"
+    ),
+    (
+        "SELECT id FROM renewal_jobs WHERE queue=? AND status='QUEUED' AND available_at <= datetime('now') "
+        "ORDER BY priority DESC, available_at, id LIMIT 4",
+        ("renewal",), "idx_jobs_claim"
+    ),
+    (
+        "SELECT policy_id FROM campaign_policies WHERE campaign_id = ? AND job_id IS NULL ORDER BY rank LIMIT 100",
+        ("CMP-1",), "idx_campaign_policies_pending"
+    ),
+]
+
+
+async def migrated_db(path):
+    db = await aiosqlite.connect(path)
+    await apply_migrations(db)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_migrations_apply_in_order_and_are_idempotent(tmp_path):
+    db = await migrated_db(str(tmp_path / "m.db"))
+    try:
+        assert await get_schema_version(db) == MIGRATIONS[-1][0]
+        assert await apply_migrations(db) == []
+        cursor = await db.execute("SELECT version FROM schema_migrations ORDER BY version")
+        assert [r[0] for r in await cursor.fetchall()] == [m[0] for m in MIGRATIONS]
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_upgrade_from_legacy_init_db_schema(tmp_path):
+    """A DB created by the old single-script init_db has no schema_migrations table."""
+    path = str(tmp_path / "legacy.db")
+    db = await aiosqlite.connect(path)
+    await db.executescript(MIGRATIONS[0][2])
+    await db.execute("INSERT INTO audit_logs (policy_id, action_type) VALUES ('P1', 'EMAIL_SENT')")
+    await db.commit()
+
+    applied = await apply_migrations(db)
+    try:
+        assert applied == [m[0] for m in MIGRATIONS]
+        cursor = await db.execute("SELECT COUNT(*) FROM audit_logs")
+        assert (await cursor.fetchone())[0] == 1
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sql,params,index", HOT_QUERIES)
+async def test_hot_queries_use_indexes(tmp_path, sql, params, index):
+    db = await migrated_db(str(tmp_path / "plan.db"))
+    try:
+        cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = " | ".join(row[3] for row in await cursor.fetchall())
+        assert index in plan, plan
+        assert "TEMP B-TREE FOR ORDER BY" not in plan, plan
+    finally:
+        await db.close()
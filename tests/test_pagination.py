@@ -0,0 +1,65 @@
+"""
+Test Agent: Keyset pagination
+Tests that walking pages by cursor returns every row exactly once, in order,
+for mixed ASC/DESC sort keys and NULL sort values.
+"""
+import pytest
+import sqlite3
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pagination import Keyset, InvalidCursor, decode_cursor, encode_cursor, _paged_sql
+
+ORDER = Keyset([("score", "score", True), ("created_at", "created_at", False), ("id", "id", False)])
+
+
+def make_db():
+    db = sqlite3.connect(":memory:")
+    db.row_factory = sqlite3.Row
+    db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, score REAL, created_at TEXT, kind TEXT)")
+    rows = []
+    for i in range(1, 58):
+        score = None if i % 9 == 0 else float(i % 4)
+        created = None if i % 11 == 0 else f"2026-01-{(i % 5) + 1:02d}"
+        rows.append((i, score, created, "a" if i % 2 else "b"))
+    db.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", rows)
+    return db
+
+
+def walk(db, keyset, where, params, limit):
+    seen, cursor = [], None
+    while True:
+        page_where, page_params = list(where), list(params)
+        if cursor:
+            after_sql, after_params = keyset.after(decode_cursor(cursor, len(keyset.keys)))
+            page_where.append(after_sql)
+            page_params += after_params
+        rows = db.execute(_paged_sql("SELECT * FROM t", page_where, keyset), page_params + [limit]).fetchall()
+        seen += [r["id"] for r in rows]
+        if len(rows) < limit:
+            return seen
+        cursor = keyset.cursor_for(rows[-1])
+
+
+@pytest.mark.parametrize("limit", [1, 5, 7, 100])
+def test_walk_matches_full_order_with_nulls_and_mixed_directions(limit):
+    db = make_db()
+    expected = [r["id"] for r in db.execute(f"SELECT id FROM t ORDER BY {ORDER.order_by}")]
+    assert walk(db, ORDER, [], [], limit) == expected
+
+
+def test_walk_respects_filters_with_or():
+    db = make_db()
+    where, params = ["kind = ? OR id < ?"], ["a", 10]
+    expected = [r["id"] for r in db.execute(
+        f"SELECT id FROM t WHERE kind = 'a' OR id < 10 ORDER BY {ORDER.order_by}"
+    )]
+    assert walk(db, ORDER, where, params, 4) == expected
+
+
+def test_cursor_validation():
+    assert decode_cursor(encode_cursor(["2026-01-01", "P1"]), 2) == ["2026-01-01", "P1"]
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor!!", 2)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(["P1"]), 2)
@@ -0,0 +1,150 @@
+"""
+Test Agent: Payments ledger
+Tests that payments are idempotent per payment_ref, that an instalment pays the current
+cycle (moving only its amount on the paid/outstanding premium counters) without touching
+the policy's status, so a policy paid last cycle is eligible again once its due date moves
+on, and that paid or lapsed policies are skipped by the runner and left out of campaigns.
+The webhook refuses calls without the secret.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.runner as runner
+import app.api.payments as payments_api
+from fastapi import HTTPException
+from app.db.campaigns import create_campaign
+from app.db.context_cache import invalidate_policy
+from app.db.counters import read_overview_counters, reconcile_counters
+from app.db.payments import policy_payments, record_payments
+from app.db.policy_context import load_policy_state
+from app.db.pool import read_db, write_db
+
+
+async def seed(tag, policies):
+    """policies: (suffix, premium, payment_mode, status)"""
+    async with write_db() as db:
+        await db.execute("INSERT INTO customers (customer_id, name, segment) VALUES (?, 'Payment Test', ?)",
+                         (f"C-{tag}", f"SEG-{tag}"))
+        for suffix, premium, mode, status in policies:
+            pid = f"SLI-TEST-PAY-{tag}-{suffix}"
+            await db.execute(
+                "INSERT INTO policies (policy_id, customer_id, annual_premium, payment_mode, premium_due_date, status) "
+                "VALUES (?, ?, ?, ?, '2030-02-01', ?)", (pid, f"C-{tag}", premium, mode, status))
+            await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+
+
+async def premium():
+    async with read_db() as db:
+        return (await read_overview_counters(db))["premium"]
+
+
+@pytest.mark.asyncio
+async def test_instalments_pay_the_cycle_and_move_their_amount(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    pid = f"SLI-TEST-PAY-{tag}-Q"
+    await seed(tag, [("Q", 40000, "Quarterly", "ACTIVE")])
+    before = await premium()
+
+    first = await record_payments([{"payment_ref": f"pay-{tag}-1", "policy_id": pid, "amount": 6000}], "webhook")
+    assert first["recorded"] == 1 and first["cycle_paid_policies"] == []
+
+    # Redelivered webhook + the rest of the instalment + a payment for a policy we don't hold
+    batch = [{"payment_ref": f"pay-{tag}-1", "policy_id": pid, "amount": 6000},
+             {"payment_ref": f"pay-{tag}-2", "policy_id": pid, "amount": 4000},
+             {"payment_ref": f"pay-{tag}-3", "policy_id": f"SLI-NOPE-{tag}", "amount": 100}]
+    summary = await record_payments(batch, "import")
+    assert summary["recorded"] == 1 and summary["duplicates"] == 1
+    assert summary["unknown_policy_refs"] == [f"pay-{tag}-3"]
+    assert summary["cycle_paid_policies"] == [pid]
+
+    # One quarter paid: the policy stays ACTIVE and only the ₹10k paid moves
+    async with read_db() as db:
+        status = await db.execute_fetchall("SELECT status FROM policies WHERE policy_id=?", (pid,))
+        audit = await db.execute_fetchall(
+            "SELECT action_type FROM audit_logs WHERE policy_id=? AND action_type IN ('PREMIUM_PAID', 'INSTALMENT_PAID')", (pid,))
+    assert status[0][0] == "ACTIVE" and [r[0] for r in audit] == ["INSTALMENT_PAID"]
+    after = await premium()
+    assert after["paid"] - before["paid"] == 10000 and before["outstanding"] - after["outstanding"] == 10000
+    monkeypatch.setattr(runner, "get_workflow", lambda *a, **kw: pytest.fail("graph built for a paid cycle"))
+    assert await runner.run_renewal(pid) == "SKIPPED"
+
+    # Next quarter's due date: a new cycle, nothing paid towards it yet
+    async with write_db() as db:
+        await db.execute("UPDATE policies SET premium_due_date='2030-05-01' WHERE policy_id=?", (pid,))
+    invalidate_policy(pid)
+    assert (await load_policy_state(pid))["cycle_paid"] is False
+    assert (await premium())["outstanding"] == before["outstanding"]
+    async with write_db() as db:
+        drift = [d for d in await reconcile_counters(db) if d["counter"] == "premium"]
+    assert drift == []
+
+
+@pytest.mark.asyncio
+async def test_paid_policy_is_eligible_again_next_cycle(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    pid = f"SLI-TEST-PAY-{tag}-A"
+    await seed(tag, [("A", 24000, "Annual", "ACTIVE")])
+    before = await premium()
+
+    summary = await record_payments([{"payment_ref": f"pay-{tag}", "policy_id": pid, "amount": 24000}], "webhook")
+    assert summary["cycle_paid_policies"] == [pid]
+    async with read_db() as db:
+        status = await db.execute_fetchall("SELECT status FROM policies WHERE policy_id=?", (pid,))
+        audit = await db.execute_fetchall(
+            "SELECT COUNT(*) FROM audit_logs WHERE policy_id=? AND action_type='PREMIUM_PAID'", (pid,))
+    assert status[0][0] == "ACTIVE" and audit[0][0] == 1
+    after = await premium()
+    assert after["paid"] - before["paid"] == 24000 and before["outstanding"] - after["outstanding"] == 24000
+    assert (await create_campaign("2030-01-01", "2030-03-01", f"SEG-{tag}", max_concurrent=1))["total"] == 0
+
+    # A year on: the paid cycle is history, the policy gets outreach again
+    async with write_db() as db:
+        await db.execute("UPDATE policies SET premium_due_date='2031-02-01' WHERE policy_id=?", (pid,))
+    invalidate_policy(pid)
+    state = await load_policy_state(pid)
+    assert state["policy_status"] == "ACTIVE" and state["cycle_paid"] is False
+    assert (await premium())["paid"] == before["paid"]
+    assert (await create_campaign("2031-01-01", "2031-03-01", f"SEG-{tag}", max_concurrent=1))["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_paid_and_lapsed_policies_skip_llm_work(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    await seed(tag, [("A", 12000, "Annual", "ACTIVE"), ("P", 12000, "Annual", "PAID"),
+                     ("L", 12000, "Annual", "LAPSED"), ("M", 12000, "Monthly", "ACTIVE")])
+    await record_payments([{"payment_ref": f"pay-{tag}-M", "policy_id": f"SLI-TEST-PAY-{tag}-M",
+                            "amount": 1000}], "webhook")
+
+    def no_graph(*args, **kwargs):
+        raise AssertionError("graph built for a closed policy")
+    monkeypatch.setattr(runner, "get_workflow", no_graph)
+    assert await runner.run_renewal(f"SLI-TEST-PAY-{tag}-P") == "SKIPPED"
+    assert await runner.run_renewal(f"SLI-TEST-PAY-{tag}-L") == "SKIPPED"
+    assert await runner.run_renewal(f"SLI-TEST-PAY-{tag}-M") == "SKIPPED"
+
+    campaign = await create_campaign("2030-01-01", "2030-03-01", f"SEG-{tag}", max_concurrent=1)
+    assert campaign["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_webhook_requires_secret(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    await seed(tag, [("W", 12000, "Annual", "ACTIVE")])
+    event = payments_api.PaymentEvent(payment_ref=f"pay-{tag}", policy_id=f"SLI-TEST-PAY-{tag}-W", amount=12000)
+
+    monkeypatch.setattr(payments_api.settings, "payment_webhook_secret", "")
+    with pytest.raises(HTTPException) as refused:
+        await payments_api.payment_webhook(event, x_webhook_secret="")
+    assert refused.value.status_code == 503
+
+    monkeypatch.setattr(payments_api.settings, "payment_webhook_secret", "s3cret")
+    for wrong in ("", "guess"):
+        with pytest.raises(HTTPException) as refused:
+            await payments_api.payment_webhook(event, x_webhook_secret=wrong)
+        assert refused.value.status_code == 401
+    assert await policy_payments(event.policy_id) == []
+
+    accepted = await payments_api.payment_webhook(event, x_webhook_secret="s3cret")
+    assert accepted["status"] == "recorded" and accepted["cycle_paid"] is True
@@ -0,0 +1,65 @@
+"""
+Test Agent: Policy context loader
+Tests that the set-based bulk loader matches per-policy loading, windows the
+interaction history per policy and pages filtered runs in due-date order.
+"""
+import pytest
+import uuid
+from datetime import date, timedelta
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import write_db
+from app.db.policy_context import load_policy_state, load_policy_states, iter_policy_states
+
+
+async def seed():
+    tag = uuid.uuid4().hex[:8]
+    segment = f"TEST-SEG-{tag}"
+    today = date.today()
+    policies = []
+    async with write_db() as db:
+        for i, due_in in enumerate([20, 5, 12, 90]):
+            pid, cid = f"SLI-TEST-CTX-{tag}-{i}", f"CUST-TEST-{tag}-{i}"
+            await db.execute(
+                "INSERT INTO customers (customer_id, name, preferred_channel, segment) VALUES (?, ?, 'Email', ?)",
+                (cid, f"Customer {i}", segment))
+            await db.execute(
+                "INSERT INTO policies (policy_id, customer_id, policy_type, annual_premium, premium_due_date) "
+                "VALUES (?, ?, 'Term', 1000, ?)", (pid, cid, (today + timedelta(days=due_in)).isoformat()))
+            await db.execute("INSERT INTO policy_state (policy_id) VALUES (?)", (pid,))
+            policies.append(pid)
+        await db.executemany(
+            "INSERT INTO interactions (policy_id, channel, message_direction, content, created_at) VALUES (?, 'Email', 'OUTBOUND', ?, ?)",
+            [(policies[0], f"msg {n}", f"2026-01-01 10:{n:02d}:00") for n in range(25)]
+            + [(policies[1], "only", "2026-01-02 10:00:00")]
+        )
+    return segment, policies
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_windows_history_per_policy():
+    _, policies = await seed()
+    states = await load_policy_states(policies + ["SLI-DOES-NOT-EXIST"])
+    assert set(states) == set(policies)
+
+    history = states[policies[0]]["interaction_history"]
+    assert len(history) == 20
+    assert history[0]["content"] == "msg 24" and history[-1]["content"] == "msg 5"
+    assert [h["content"] for h in states[policies[1]]["interaction_history"]] == ["only"]
+    assert states[policies[2]]["interaction_history"] == []
+
+    single = await load_policy_state(policies[0])
+    assert single == states[policies[0]]
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_filter_in_due_order():
+    segment, policies = await seed()
+    pages = [page async for page in iter_policy_states(due_within_days=30, segment=segment, page_size=2)]
+    assert [len(p) for p in pages] == [2, 1]
+    assert [s["policy_id"] for page in pages for s in page] == [policies[1], policies[2], policies[0]]
+
+    pages = [page async for page in iter_policy_states(policy_ids=policies, page_size=3, history_limit=0)]
+    assert [len(p) for p in pages] == [3, 1]
+    assert all(s["interaction_history"] == [] for page in pages for s in page)
@@ -0,0 +1,61 @@
+"""
+Test Agent: Decision rules fast path
+Tests rule matching over interaction counts, that a rule-decided channel
+skips the orchestrator LLM and Critique A, and that ambiguous cases fall through.
+"""
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.orchestrator as orchestrator
+from app.agents.rules import evaluate_rules
+from app.agents.workflow import route_after_orchestrator
+
+
+def state(**overrides):
+    base = {"policy_id": "SLI-TEST-RULES", "policy_status": "ACTIVE", "preferred_channel": "WhatsApp",
+            "distress_flag": False, "objection_count": 0, "interaction_history": []}
+    return {**base, **overrides}
+
+
+def sent(channel, n):
+    return [{"channel": channel, "direction": "OUTBOUND", "content": "reminder"}] * n
+
+
+def decided(s):
+    matched = evaluate_rules(s)
+    return (matched[0]["id"], matched[1].get("channel")) if matched else None
+
+
+def test_rules_cover_clear_cut_cases_in_order():
+    assert decided(state()) == ("R4-FIRST-CONTACT", "WhatsApp")
+    assert decided(state(interaction_history=sent("WhatsApp", 2))) == ("R5-PREFERRED-NO-REPLY", "WhatsApp")
+    # Preferred exhausted: least-tried other channel, ties in CHANNELS order
+    assert decided(state(interaction_history=sent("WhatsApp", 3) + sent("Email", 1))) == ("R6-PREFERRED-EXHAUSTED", "Voice")
+    assert decided(state(interaction_history=sent("WhatsApp", 3))) == ("R6-PREFERRED-EXHAUSTED", "Email")
+    assert decided(state(policy_status="PAID", distress_flag=True)) == ("R1-PAID", None)
+    assert decided(state(distress_flag=True, objection_count=5)) == ("R2-DISTRESS", None)
+    assert decided(state(objection_count=3)) == ("R3-OBJECTIONS", None)
+
+    # Ambiguous: a reply to interpret, or every channel exhausted
+    reply = [{"channel": "WhatsApp", "direction": "INBOUND", "content": "call me next week"}]
+    assert decided(state(interaction_history=sent("WhatsApp", 1) + reply)) is None
+    exhausted = sent("WhatsApp", 3) + sent("Email", 3) + sent("Voice", 3)
+    assert decided(state(interaction_history=exhausted)) is None
+    assert evaluate_rules(state(), channel_rules=False) is None
+
+
+@pytest.mark.asyncio
+async def test_rule_decision_skips_llm_and_critique_a(monkeypatch):
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+    monkeypatch.setattr(orchestrator, "call_llm_json", no_llm)
+
+    result = await orchestrator.orchestrator_node(state(interaction_history=sent("WhatsApp", 1)))
+    assert result["selected_channel"] == "WhatsApp" and result["decision_rule"] == "R5-PREFERRED-NO-REPLY"
+    assert "R5-PREFERRED-NO-REPLY" in result["audit_trail"][0]
+    assert route_after_orchestrator(result) == "planner"
+
+    escalated = await orchestrator.orchestrator_node(state(objection_count=4))
+    assert escalated["current_node"] == "ESCALATION" and escalated["decision_rule"] == "R3-OBJECTIONS"
+    assert route_after_orchestrator(escalated) == "escalation"
@@ -0,0 +1,73 @@
+"""
+Test Agent: Speculative Critique A + Planner
+Tests that the speculative plan (and draft) is kept when Critique A keeps the
+channel, rebuilt from the same retrieval when it switches, and counted.
+"""
+import asyncio
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.speculative as speculative
+from app.utils.metrics import hit_rate, metrics
+
+
+def patch_agents(monkeypatch, verdict, calls):
+    async def critique(state):
+        calls.append("critique")
+        await asyncio.sleep(0.05)
+        return {"critique_a_result": verdict.get("verdict", "APPROVED"), **verdict,
+                "current_node": "PLANNER", "audit_trail": ["[CRITIQUE_A]"]}
+
+    def retrieve(state):
+        calls.append("retrieve")
+        return "policy docs", "playbooks"
+
+    async def plan(state, policy_context, obj_context):
+        calls.append(f"plan:{state['selected_channel']}")
+        await asyncio.sleep(0.05)
+        return {"current_node": "DRAFT_AND_GREETING", "execution_plan": {"channel": state["selected_channel"]},
+                "audit_trail": ["[PLANNER]"]}
+
+    async def draft(state):
+        calls.append(f"draft:{state['execution_plan']['channel']}")
+        return {"final_message": "Hi", "current_node": "CRITIQUE_B", "audit_trail": ["[DRAFT]"]}
+
+    monkeypatch.setattr(speculative, "critique_a_node", critique)
+    monkeypatch.setattr(speculative, "retrieve_planner_context", retrieve)
+    monkeypatch.setattr(speculative, "build_plan", plan)
+    monkeypatch.setattr("app.agents.workflow.parallel_draft_and_greeting", draft)
+
+
+STATE = {"policy_id": "SLI-TEST-SPEC", "selected_channel": "WhatsApp"}
+
+
+@pytest.mark.asyncio
+async def test_hit_keeps_plan_and_draft(monkeypatch):
+    calls = []
+    patch_agents(monkeypatch, {"verdict": "APPROVED"}, calls)
+    monkeypatch.setattr(speculative.settings, "speculative_draft", True)
+    metrics.reset()
+
+    started = asyncio.get_running_loop().time()
+    updates = await speculative.critique_and_plan_node(dict(STATE))
+    assert asyncio.get_running_loop().time() - started < 0.095  # planner overlapped critique
+    assert updates["execution_plan"] == {"channel": "WhatsApp"} and updates["final_message"] == "Hi"
+    assert updates["current_node"] == "CRITIQUE_B"  # draft kept, skip draft_and_greeting
+    assert sorted(calls) == ["critique", "draft:WhatsApp", "plan:WhatsApp", "retrieve"]
+    assert hit_rate(metrics.counters, "speculation") == 1.0
+
+
+@pytest.mark.asyncio
+async def test_channel_override_replans_without_retrieving_again(monkeypatch):
+    calls = []
+    patch_agents(monkeypatch, {"verdict": "OVERRIDE", "selected_channel": "Voice"}, calls)
+    monkeypatch.setattr(speculative.settings, "speculative_draft", True)
+    metrics.reset()
+
+    updates = await speculative.critique_and_plan_node(dict(STATE))
+    assert updates["selected_channel"] == "Voice" and updates["execution_plan"] == {"channel": "Voice"}
+    assert updates["current_node"] == "DRAFT_AND_GREETING" and "final_message" not in updates
+    assert calls.count("retrieve") == 1 and "plan:Voice" in calls
+    assert "draft:Voice" not in calls
+    assert hit_rate(metrics.counters, "speculation") == 0.0
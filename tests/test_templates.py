@@ -0,0 +1,73 @@
+"""
+Test Agent: Greeting/closing templates
+Tests that library cohorts render without an LLM call, that a missing cohort is
+generated once (even under concurrency) and reused from the DB, that bad variants
+are rejected, and that the disclosure line is always appended verbatim.
+"""
+import asyncio
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.agents.greeting_closing as greeting_closing
+import app.agents.templates as templates
+from app.agents.templates import DISCLOSURE, cohort, get_variant, valid_variant
+
+
+def state(language, tone="friendly", channel="WhatsApp", cta_type="payment_link"):
+    return {"customer_name": "Meera Iyer", "policy_type": "Term", "premium_due_date": "2026-11-30",
+            "selected_channel": channel, "preferred_language": language,
+            "execution_plan": {"language": language, "tone": tone, "cta_type": cta_type}}
+
+
+@pytest.mark.asyncio
+async def test_library_cohorts_render_without_llm(monkeypatch):
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+    monkeypatch.setattr(templates, "call_llm_json", no_llm)
+    monkeypatch.setattr(greeting_closing, "call_llm", no_llm)
+
+    result = await greeting_closing.greeting_closing_node(state("Hindi", tone="formal", channel="Email"))
+    assert result["greeting"] == "आदरणीय Meera जी, नमस्कार।"
+    assert "Term" in result["closing"] and "2026-11-30" in result["closing"] and "[PAYMENT_LINK]" in result["closing"]
+    assert result["closing"].endswith(DISCLOSURE)
+
+    voice = await greeting_closing.greeting_closing_node(state("English", channel="Voice", cta_type="ivr_press1"))
+    assert voice["greeting"].startswith("Hello Meera!") and "Press 1" in voice["closing"]
+    # Unknown tone falls back to friendly
+    assert cohort("english", "casual", "Fax") == ("English", "friendly", "Email")
+
+
+@pytest.mark.asyncio
+async def test_missing_cohort_generated_once_and_reused(monkeypatch):
+    language = f"Lang{uuid.uuid4().hex[:8]}"
+    calls = []
+
+    async def fake_llm(system, user):
+        calls.append(user)
+        await asyncio.sleep(0.01)
+        return {"greeting": "Vanakkam {first_name}!", "closing": "Renew {policy_type} by {due_date}. {cta}"}
+    monkeypatch.setattr(templates, "call_llm_json", fake_llm)
+
+    variants = await asyncio.gather(*(get_variant(language, "empathetic", "Email") for _ in range(5)))
+    assert len(calls) == 1 and all(v == variants[0] for v in variants)
+
+    # Another process (empty in-process cache) reads the stored variant
+    templates._generated.clear()
+    result = await greeting_closing.greeting_closing_node(state(language, tone="empathetic", channel="Email"))
+    assert len(calls) == 1
+    assert result["greeting"] == "Vanakkam Meera!"
+    assert result["closing"] == f"Renew Term by 2026-11-30. You can renew in a minute here: [PAYMENT_LINK]\n\n{DISCLOSURE}"
+
+
+@pytest.mark.asyncio
+async def test_invalid_generated_variant_falls_back_to_english(monkeypatch):
+    async def bad_llm(system, user):
+        return {"greeting": "Hello {name}", "closing": "Bye"}
+    monkeypatch.setattr(templates, "call_llm_json", bad_llm)
+
+    assert not valid_variant({"greeting": "Hi {first_name}", "closing": "{cta} {0}"})
+    assert not valid_variant({"error": "Could not parse JSON"})
+    variant = await get_variant(f"Lang{uuid.uuid4().hex[:8]}", "hni", "Email")
+    assert variant == templates.LIBRARY[("English", "hni", "*")]
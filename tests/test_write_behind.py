@@ -0,0 +1,78 @@
+"""
+Test Agent: Write-behind queue
+Tests batching order rules, full drain on shutdown and per-call durability.
+"""
+import pytest
+import uuid
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.pool import read_db
+from app.db.write_behind import WriteBehindQueue, _plan_batch
+
+LOG_SQL = "INSERT INTO workflow_logs (policy_id, node_name, content) VALUES (?, ?, ?)"
+STATE_SQL = "UPDATE policy_state SET current_node=? WHERE policy_id=?"
+
+
+def test_plan_batch_coalesces_inserts_and_keeps_update_order():
+    batch = [
+        (LOG_SQL, ("P1", "orchestrator", "a"), None),
+        (STATE_SQL, ("CRITIQUE_A", "P1"), None),
+        (LOG_SQL, ("P1", "critique_a", "b"), None),
+        (STATE_SQL, ("PLANNER", "P1"), None),
+        ("UPDATE policy_state SET last_channel=? WHERE policy_id=?", ("Email", "P1"), None),
+        (STATE_SQL, ("COMPLETED", "P1"), None),
+    ]
+    plan = _plan_batch(batch)
+    assert plan[0] == (STATE_SQL, [("CRITIQUE_A", "P1"), ("PLANNER", "P1")])
+    assert plan[1][0].startswith("UPDATE policy_state SET last_channel")
+    assert plan[2] == (STATE_SQL, [("COMPLETED", "P1")])
+    assert plan[3] == (LOG_SQL, [("P1", "orchestrator", "a"), ("P1", "critique_a", "b")])
+
+
+def test_unknown_durability_rejected():
+    with pytest.raises(ValueError):
+        WriteBehindQueue(durability="eventually")
+
+
+@pytest.mark.asyncio
+async def test_close_drains_all_buffered_writes():
+    policy_id = f"SLI-TEST-WB-{uuid.uuid4().hex[:8]}"
+    queue = WriteBehindQueue(batch_size=7, flush_interval_ms=60_000, durability="buffered")
+    queue.start()
+    for i in range(25):
+        await queue.submit(LOG_SQL, (policy_id, f"node_{i}", "buffered"))
+    await queue.close()
+
+    async with read_db() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM workflow_logs WHERE policy_id=?", (policy_id,))
+        assert (await cursor.fetchone())[0] == 25
+    assert queue.stats["rows"] == 25
+    assert queue.stats["max_batch"] == 7
+
+
+@pytest.mark.asyncio
+async def test_group_commit_waits_for_commit():
+    policy_id = f"SLI-TEST-WB-GC-{uuid.uuid4().hex[:8]}"
+    queue = WriteBehindQueue(batch_size=100, flush_interval_ms=5, durability="group_commit")
+    queue.start()
+    await queue.submit(LOG_SQL, (policy_id, "node", "committed"))
+    async with read_db() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM workflow_logs WHERE policy_id=?", (policy_id,))
+        assert (await cursor.fetchone())[0] == 1
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_per_call_durability_overrides_queue_default():
+    policy_id = f"SLI-TEST-WB-SEND-{uuid.uuid4().hex[:8]}"
+    queue = WriteBehindQueue(batch_size=100, flush_interval_ms=60_000, durability="buffered")
+    queue.start()
+    await queue.submit(LOG_SQL, (policy_id, "buffered", "later"))
+    await queue.submit_many([(LOG_SQL, (policy_id, "send", "now")), (LOG_SQL, (policy_id, "send", "now"))],
+                            durability="immediate")
+    async with read_db() as db:
+        cursor = await db.execute("SELECT node_name, COUNT(*) FROM workflow_logs WHERE policy_id=? GROUP BY 1",
+                                  (policy_id,))
+        assert [tuple(r) for r in await cursor.fetchall()] == [("send", 2)]
+    await queue.close()